@@ -3,8 +3,9 @@ Advanced API endpoints for sentiment analysis
 Includes model comparison, batch processing, and analytics
 """
 
-from flask import Blueprint, request, jsonify
-from typing import List, Dict, Any
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+import json
 import logging
 import time
 import sys
@@ -14,7 +15,8 @@ from datetime import datetime
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from .advanced_model import get_advanced_analyzer, predict_advanced, predict_batch, get_model_stats
+from .advanced_model import (COMPARE_MODES, get_advanced_analyzer, predict_advanced, predict_batch,
+                             get_model_stats)
 from config.config import config
 
 logger = logging.getLogger('sentiment_analyzer.advanced_api')
@@ -22,6 +24,41 @@ logger = logging.getLogger('sentiment_analyzer.advanced_api')
 # Create blueprint for advanced endpoints
 advanced_bp = Blueprint('advanced', __name__, url_prefix='/api/v2')
 
+def comparison_payload(result) -> Dict[str, Any]:
+    """Response body for a model comparison"""
+    return {
+        'status': 'success',
+        'text': result.text,
+        'consensus': {
+            'sentiment': result.consensus_sentiment,
+            'confidence': round(result.average_confidence, 4),
+            'agreement_score': round(result.agreement_score, 4)
+        },
+        'model_results': [
+            {
+                'model': r.model_name,
+                'sentiment': r.sentiment,
+                'confidence': round(r.confidence, 4),
+                'probabilities': ({label: round(p, 4) for label, p in r.probabilities.items()}
+                                  if r.probabilities else None),
+                'processing_time': round(r.processing_time, 4)
+            }
+            for r in result.results
+        ],
+        'mode': result.mode,
+        'models_run': result.models_run,
+        'skipped_models': result.skipped_models,
+        'routing': result.routing,
+        'processing_time': round(result.processing_time, 4),
+        'timestamp': datetime.now().isoformat()
+    }
+
+def compare_mode_error(mode: Any) -> Optional[str]:
+    """Validation error for a requested comparison mode, or None if it is valid"""
+    if mode is not None and mode not in COMPARE_MODES:
+        return f'Field "mode" must be one of: {", ".join(COMPARE_MODES)}'
+    return None
+
 @advanced_bp.route('/compare', methods=['POST'])
 def compare_models():
     """Compare sentiment analysis across multiple models"""
@@ -41,33 +78,22 @@ def compare_models():
                 'status': 'error'
             }), 400
         
+        mode = data.get('mode', None)
+        error = compare_mode_error(mode)
+        if error is not None:
+            return jsonify({
+                'error': error,
+                'status': 'error'
+            }), 400
+        
         # Get models to use (default to all available)
         models = data.get('models', None)
         
         # Perform comparison
-        result = predict_advanced(text, models)
+        result = predict_advanced(text, models, mode)
         
         # Format response
-        response = {
-            'status': 'success',
-            'text': result.text,
-            'consensus': {
-                'sentiment': result.consensus_sentiment,
-                'confidence': round(result.average_confidence, 4),
-                'agreement_score': round(result.agreement_score, 4)
-            },
-            'model_results': [
-                {
-                    'model': r.model_name,
-                    'sentiment': r.sentiment,
-                    'confidence': round(r.confidence, 4),
-                    'processing_time': round(r.processing_time, 4)
-                }
-                for r in result.results
-            ],
-            'processing_time': round(result.processing_time, 4),
-            'timestamp': datetime.now().isoformat()
-        }
+        response = comparison_payload(result)
         
         logger.info(f"Model comparison completed for text length {len(text)}")
         return jsonify(response)
@@ -79,50 +105,65 @@ def compare_models():
             'status': 'error'
         }), 500
 
+def batch_error(data: Any) -> Optional[str]:
+    """Validation error for a batch request body, or None if it is valid"""
+    if not data or 'texts' not in data:
+        return 'Missing required field: texts (array)'
+    
+    texts = data['texts']
+    if not isinstance(texts, list):
+        return 'Field "texts" must be an array'
+    
+    if len(texts) == 0:
+        return 'At least one text is required'
+    
+    if len(texts) > 50:  # Limit batch size
+        return 'Maximum 50 texts allowed per batch'
+    
+    # Validate all texts
+    for i, text in enumerate(texts):
+        if not isinstance(text, str):
+            return f'Text at index {i} must be a string'
+        
+        if len(text.strip()) == 0 or len(text) > config.MAX_TEXT_LENGTH:
+            return f'Text at index {i} must be between 1 and {config.MAX_TEXT_LENGTH} characters'
+    
+    return None
+
+def batch_payload(texts: List[str], results: List[Any], total_time: float) -> Dict[str, Any]:
+    """Response body for a batch analysis"""
+    return {
+        'status': 'success',
+        'batch_size': len(texts),
+        'results': [
+            {
+                'index': i,
+                'text': texts[i],
+                'sentiment': r.sentiment,
+                'confidence': round(r.confidence, 4),
+                'processing_time': round(r.processing_time, 4)
+            }
+            for i, r in enumerate(results)
+        ],
+        'total_processing_time': round(total_time, 4),
+        'average_processing_time': round(total_time / len(texts), 4),
+        'timestamp': datetime.now().isoformat()
+    }
+
 @advanced_bp.route('/batch', methods=['POST'])
 def batch_analyze():
     """Analyze multiple texts in batch"""
     try:
         data = request.get_json()
         
-        if not data or 'texts' not in data:
+        error = batch_error(data)
+        if error is not None:
             return jsonify({
-                'error': 'Missing required field: texts (array)',
+                'error': error,
                 'status': 'error'
             }), 400
         
         texts = data['texts']
-        if not isinstance(texts, list):
-            return jsonify({
-                'error': 'Field "texts" must be an array',
-                'status': 'error'
-            }), 400
-        
-        if len(texts) == 0:
-            return jsonify({
-                'error': 'At least one text is required',
-                'status': 'error'
-            }), 400
-        
-        if len(texts) > 50:  # Limit batch size
-            return jsonify({
-                'error': 'Maximum 50 texts allowed per batch',
-                'status': 'error'
-            }), 400
-        
-        # Validate all texts
-        for i, text in enumerate(texts):
-            if not isinstance(text, str):
-                return jsonify({
-                    'error': f'Text at index {i} must be a string',
-                    'status': 'error'
-                }), 400
-            
-            if len(text.strip()) == 0 or len(text) > config.MAX_TEXT_LENGTH:
-                return jsonify({
-                    'error': f'Text at index {i} must be between 1 and {config.MAX_TEXT_LENGTH} characters',
-                    'status': 'error'
-                }), 400
         
         # Get model to use
         model_key = data.get('model', None)
@@ -133,23 +174,7 @@ def batch_analyze():
         total_time = time.time() - start_time
         
         # Format response
-        response = {
-            'status': 'success',
-            'batch_size': len(texts),
-            'results': [
-                {
-                    'index': i,
-                    'text': texts[i],
-                    'sentiment': r.sentiment,
-                    'confidence': round(r.confidence, 4),
-                    'processing_time': round(r.processing_time, 4)
-                }
-                for i, r in enumerate(results)
-            ],
-            'total_processing_time': round(total_time, 4),
-            'average_processing_time': round(total_time / len(texts), 4),
-            'timestamp': datetime.now().isoformat()
-        }
+        response = batch_payload(texts, results, total_time)
         
         logger.info(f"Batch analysis completed for {len(texts)} texts")
         return jsonify(response)
@@ -161,37 +186,223 @@ def batch_analyze():
             'status': 'error'
         }), 500
 
+def _read_ndjson_texts(stream, max_line_bytes: int) -> Iterator[Tuple[int, Optional[str], Any, Optional[str]]]:
+    """
+    Read (index, text, id, error) records from an NDJSON stream, one line at a time.
+    
+    Each line is a JSON string or an object with "text" and an optional "id".
+    Blank lines are skipped; oversized or malformed lines yield an error instead.
+    """
+    index = 0
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        
+        if len(line) > max_line_bytes and not line.endswith(b'\n'):
+            # Discard the rest of an oversized line without buffering it
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(max_line_bytes)
+            yield index, None, None, f'Line exceeds {max_line_bytes} bytes'
+            index += 1
+            continue
+        
+        line = line.strip()
+        if not line:
+            continue
+        
+        yield (index,) + parse_ndjson_line(line)
+        index += 1
+
+def parse_ndjson_line(line: bytes) -> Tuple[Optional[str], Any, Optional[str]]:
+    """Parse one non-blank NDJSON line into (text, id, error)"""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None, None, 'Line is not valid JSON'
+    
+    record_id = record.get('id') if isinstance(record, dict) else None
+    text = record.get('text') if isinstance(record, dict) else record
+    
+    if not isinstance(text, str):
+        return None, record_id, 'Text must be a string'
+    if len(text.strip()) == 0 or len(text) > config.MAX_TEXT_LENGTH:
+        return None, record_id, f'Text must be between 1 and {config.MAX_TEXT_LENGTH} characters'
+    return text, record_id, None
+
+def stream_line(index: int, record_id: Any, result: Any, error: Optional[str]) -> str:
+    """NDJSON result line for one streamed input"""
+    if error is not None:
+        line = {'index': index, 'error': error}
+    else:
+        line = {
+            'index': index,
+            'sentiment': result.sentiment,
+            'confidence': round(result.confidence, 4),
+            'processing_time': round(result.processing_time, 4)
+        }
+    if record_id is not None:
+        line['id'] = record_id
+    return json.dumps(line) + '\n'
+
+def stream_summary(status: str, totals: Dict[str, int], total_time: float) -> str:
+    """Final NDJSON line of a streamed batch"""
+    return json.dumps({'summary': {
+        'status': status,
+        'processed': totals['processed'],
+        'rejected': totals['rejected'],
+        'total_processing_time': round(total_time, 4),
+        'timestamp': datetime.now().isoformat()
+    }}) + '\n'
+
+@advanced_bp.route('/batch/stream', methods=['POST'])
+def batch_analyze_stream():
+    """
+    Analyze an unbounded NDJSON upload, streaming NDJSON results back
+    
+    Lines are read incrementally and inferred in chunks of ?chunk_size texts
+    (at most config.STREAM_CHUNK_SIZE), so memory stays flat regardless of
+    upload size. Each result line carries the input index (and id, if given);
+    a final line holds the summary. Clients should read results while uploading.
+    """
+    model_key = request.args.get('model')
+    analyzer = get_advanced_analyzer()
+    if model_key is not None and model_key not in analyzer.model_configs:
+        return jsonify({
+            'error': f'Unknown model: {model_key}',
+            'status': 'error'
+        }), 400
+    
+    try:
+        chunk_size = int(request.args.get('chunk_size', config.STREAM_CHUNK_SIZE))
+    except ValueError:
+        return jsonify({
+            'error': 'chunk_size must be an integer',
+            'status': 'error'
+        }), 400
+    chunk_size = max(1, min(chunk_size, config.STREAM_CHUNK_SIZE))
+    
+    # The body is consumed incrementally, so the app-wide request size cap does not apply
+    # (None would fall back to MAX_CONTENT_LENGTH; the per-request setter needs Flask >= 3.1)
+    request.max_content_length = config.STREAM_MAX_CONTENT_LENGTH or sys.maxsize
+    stream = request.stream
+    
+    totals = {'processed': 0, 'rejected': 0}
+    
+    def flush(chunk):
+        """Infer the valid texts of a chunk and render every record in input order"""
+        valid = [record for record in chunk if record[3] is None]
+        results = iter(analyzer.batch_predict([text for _, text, _, _ in valid], model_key) if valid else [])
+        
+        for index, _, record_id, error in chunk:
+            yield stream_line(index, record_id, next(results) if error is None else None, error)
+        
+        totals['processed'] += len(valid)
+        totals['rejected'] += len(chunk) - len(valid)
+    
+    def generate():
+        start_time = time.time()
+        chunk = []
+        
+        try:
+            for record in _read_ndjson_texts(stream, config.STREAM_MAX_LINE_BYTES):
+                chunk.append(record)
+                if len(chunk) >= chunk_size:
+                    yield from flush(chunk)
+                    chunk = []
+            
+            if chunk:
+                yield from flush(chunk)
+            status = 'success'
+        except Exception as e:
+            logger.error(f"Error in streaming batch analysis after {totals['processed']} texts: {e}")
+            status = 'error'
+        
+        logger.info(f"Streaming batch analysis completed for {totals['processed']} texts "
+                    f"({totals['rejected']} rejected)")
+        yield stream_summary(status, totals, time.time() - start_time)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def models_payload() -> Dict[str, Any]:
+    """Response body describing every model"""
+    analyzer = get_advanced_analyzer()
+    available_models = analyzer.get_available_models()
+    performance_stats = get_model_stats()
+    pool_stats = analyzer.get_pool_stats()
+    
+    models_info = []
+    for model_key, model_config in analyzer.model_configs.items():
+        stats = performance_stats.get(model_key, {})
+        pool_entry = pool_stats['models'].get(model_key, {})
+        last_used = pool_entry.get('last_used')
+        
+        models_info.append({
+            'key': model_key,
+            'name': model_config['name'],
+            'supported_labels': list(model_config['label_mapping'].values()),
+            'available': model_key in available_models,
+            'state': pool_entry.get('state'),
+            'memory_mb': round(pool_entry.get('memory_bytes', 0) / (1024 * 1024), 2),
+            'last_used': datetime.fromtimestamp(last_used).isoformat() if last_used else None,
+            'performance': {
+                'total_predictions': stats.get('total_predictions', 0),
+                'average_processing_time': round(stats.get('average_processing_time', 0), 4),
+                'error_rate': round(stats.get('error_rate', 0), 4),
+                'load_time': round(stats.get('load_time', 0), 4)
+            }
+        })
+    
+    return {
+        'status': 'success',
+        'total_models': len(models_info),
+        'loaded_models': pool_stats['loaded'],
+        'memory_budget_mb': round(pool_stats['memory_budget_bytes'] / (1024 * 1024), 2),
+        'resident_memory_mb': round(pool_stats['resident_bytes'] / (1024 * 1024), 2),
+        'models': models_info,
+        'timestamp': datetime.now().isoformat()
+    }
+
+def analytics_payload() -> Dict[str, Any]:
+    """Response body with overall and per-model statistics"""
+    performance_stats = get_model_stats()
+    
+    # Calculate overall statistics
+    total_predictions = sum(stats.get('total_predictions', 0) for stats in performance_stats.values())
+    total_errors = sum(stats.get('total_errors', 0) for stats in performance_stats.values())
+    
+    if total_predictions > 0:
+        overall_error_rate = total_errors / (total_predictions + total_errors)
+        avg_processing_time = sum(
+            stats.get('average_processing_time', 0) * stats.get('total_predictions', 0)
+            for stats in performance_stats.values()
+        ) / total_predictions
+    else:
+        overall_error_rate = 0
+        avg_processing_time = 0
+    
+    return {
+        'status': 'success',
+        'overall_stats': {
+            'total_predictions': total_predictions,
+            'total_errors': total_errors,
+            'overall_error_rate': round(overall_error_rate, 4),
+            'average_processing_time': round(avg_processing_time, 4)
+        },
+        'model_performance': performance_stats,
+        'cache': get_advanced_analyzer().get_cache_stats(),
+        'executors': get_advanced_analyzer().get_executor_stats(),
+        'processes': get_advanced_analyzer().get_process_stats(),
+        'compare': get_advanced_analyzer().get_compare_stats(),
+        'routing': get_advanced_analyzer().get_routing_stats(),
+        'timestamp': datetime.now().isoformat()
+    }
+
 @advanced_bp.route('/models', methods=['GET'])
 def get_models():
     """Get information about available models"""
     try:
-        analyzer = get_advanced_analyzer()
-        available_models = analyzer.get_available_models()
-        performance_stats = get_model_stats()
-        
-        models_info = []
-        for model_key in available_models:
-            model_config = analyzer.model_configs[model_key]
-            stats = performance_stats.get(model_key, {})
-            
-            models_info.append({
-                'key': model_key,
-                'name': model_config['name'],
-                'supported_labels': list(model_config['label_mapping'].values()),
-                'performance': {
-                    'total_predictions': stats.get('total_predictions', 0),
-                    'average_processing_time': round(stats.get('average_processing_time', 0), 4),
-                    'error_rate': round(stats.get('error_rate', 0), 4),
-                    'load_time': round(stats.get('load_time', 0), 4)
-                }
-            })
-        
-        response = {
-            'status': 'success',
-            'total_models': len(models_info),
-            'models': models_info,
-            'timestamp': datetime.now().isoformat()
-        }
+        response = models_payload()
         
         return jsonify(response)
         
@@ -206,33 +417,7 @@ def get_models():
 def get_analytics():
     """Get analytics and performance statistics"""
     try:
-        performance_stats = get_model_stats()
-        
-        # Calculate overall statistics
-        total_predictions = sum(stats.get('total_predictions', 0) for stats in performance_stats.values())
-        total_errors = sum(stats.get('total_errors', 0) for stats in performance_stats.values())
-        
-        if total_predictions > 0:
-            overall_error_rate = total_errors / (total_predictions + total_errors)
-            avg_processing_time = sum(
-                stats.get('average_processing_time', 0) * stats.get('total_predictions', 0)
-                for stats in performance_stats.values()
-            ) / total_predictions
-        else:
-            overall_error_rate = 0
-            avg_processing_time = 0
-        
-        response = {
-            'status': 'success',
-            'overall_stats': {
-                'total_predictions': total_predictions,
-                'total_errors': total_errors,
-                'overall_error_rate': round(overall_error_rate, 4),
-                'average_processing_time': round(avg_processing_time, 4)
-            },
-            'model_performance': performance_stats,
-            'timestamp': datetime.now().isoformat()
-        }
+        response = analytics_payload()
         
         return jsonify(response)
         
@@ -243,6 +428,32 @@ def get_analytics():
             'status': 'error'
         }), 500
 
+def test_models_payload(text: str, result) -> Dict[str, Any]:
+    """Response body for a test run of every model"""
+    return {
+        'status': 'success',
+        'test_text': text,
+        'results': {
+            'consensus': {
+                'sentiment': result.consensus_sentiment,
+                'confidence': round(result.average_confidence, 4),
+                'agreement_score': round(result.agreement_score, 4)
+            },
+            'individual_models': [
+                {
+                    'model': r.model_name,
+                    'sentiment': r.sentiment,
+                    'confidence': round(r.confidence, 4),
+                    'processing_time': round(r.processing_time, 4),
+                    'status': 'success' if r.sentiment != 'Error' else 'error'
+                }
+                for r in result.results
+            ],
+            'total_processing_time': round(result.processing_time, 4)
+        },
+        'timestamp': datetime.now().isoformat()
+    }
+
 @advanced_bp.route('/test-models', methods=['POST'])
 def test_models():
     """Test all models with a sample text"""
@@ -259,31 +470,7 @@ def test_models():
         # Test all models
         result = predict_advanced(text)
         
-        response = {
-            'status': 'success',
-            'test_text': text,
-            'results': {
-                'consensus': {
-                    'sentiment': result.consensus_sentiment,
-                    'confidence': round(result.average_confidence, 4),
-                    'agreement_score': round(result.agreement_score, 4)
-                },
-                'individual_models': [
-                    {
-                        'model': r.model_name,
-                        'sentiment': r.sentiment,
-                        'confidence': round(r.confidence, 4),
-                        'processing_time': round(r.processing_time, 4),
-                        'status': 'success' if r.sentiment != 'Error' else 'error'
-                    }
-                    for r in result.results
-                ],
-                'total_processing_time': round(result.processing_time, 4)
-            },
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        return jsonify(response)
+        return jsonify(test_models_payload(text, result))
         
     except Exception as e:
         logger.error(f"Error testing models: {e}")
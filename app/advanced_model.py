@@ -4,24 +4,41 @@ Supports multiple models, comparison, and batch processing
 """
 
 import logging
+import threading
 import time
 import json
 import sys
 import os
 from typing import List, Dict, Any, Tuple, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from transformers import pipeline
 import torch
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, CancelledError, as_completed, wait
+from contextlib import contextmanager
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.config import config
+from .backends import backend_for, create_backend
+from .batching import length_buckets
+from .cache import (PredictionCache, get_prediction_store, iter_warmup_texts,
+                    model_fingerprint, text_hash)
+from .direct_inference import DirectClassifier
+from .executors import ExecutorPool
+from .long_text import build_classifier, long_text_variant
+from .model_pool import ModelPool
+from .model_processes import ModelProcess, plan_cpu_sets
+from .routing import ModelRouter
 
 logger = logging.getLogger('sentiment_analyzer.advanced_model')
 
+# 'full' runs every model; 'cascade' runs models cheapest first until the evidence is confident;
+# 'quorum' runs them all at once and returns when the outstanding votes can no longer change the consensus;
+# 'routed' runs only the one or two models whose domain fits the text
+COMPARE_MODES = ('full', 'cascade', 'quorum', 'routed')
+
 @dataclass
 class ModelResult:
     """Result from a single model prediction"""
@@ -30,6 +47,7 @@ class ModelResult:
     confidence: float
     processing_time: float
     timestamp: datetime
+    probabilities: Optional[Dict[str, float]] = None  # Full class distribution (mapped labels)
 
 @dataclass
 class ComparisonResult:
@@ -40,6 +58,22 @@ class ComparisonResult:
     average_confidence: float
     agreement_score: float  # How much models agree (0-1)
     processing_time: float
+    mode: str = 'full'  # One of COMPARE_MODES
+    models_run: List[str] = field(default_factory=list)  # Model keys that produced a result
+    skipped_models: List[str] = field(default_factory=list)  # Requested model keys never run
+    routing: Optional[Dict[str, Any]] = None  # Router decision ('routed' mode only)
+
+def run_pipeline(model: Any, direct: Optional[DirectClassifier], texts: List[str]) -> List[Any]:
+    """One forward pass through the direct classifier if there is one, else the pipeline"""
+    if direct is None:
+        if len(texts) == 1:
+            return [model(texts[0])]
+        return model(texts, batch_size=len(texts))
+    
+    return [
+        [{'label': label, 'score': score} for label, score in probabilities.items()]
+        for _, _, probabilities in direct.classify(texts)
+    ]
 
 class AdvancedSentimentAnalyzer:
     """Advanced sentiment analyzer with multiple models and comparison capabilities"""
@@ -49,216 +83,565 @@ class AdvancedSentimentAnalyzer:
         self.model_configs = {
             'primary': {
                 'name': 'fitsblb/YelpReviewsAnalyzer',
-                'label_mapping': {'LABEL_0': 'Negative', 'LABEL_1': 'Positive'}
+                'label_mapping': {'LABEL_0': 'Negative', 'LABEL_1': 'Positive'},
+                'cost': 66,  # Relative inference cost (millions of parameters); orders the cascade
+                'domain': 'review'  # Text the model was tuned on; used by the router
             },
             'distilbert': {
                 'name': 'distilbert-base-uncased-finetuned-sst-2-english',
-                'label_mapping': {'NEGATIVE': 'Negative', 'POSITIVE': 'Positive'}
+                'label_mapping': {'NEGATIVE': 'Negative', 'POSITIVE': 'Positive'},
+                'cost': 66,
+                'domain': 'general'
             },
             'cardiffnlp': {
                 'name': 'cardiffnlp/twitter-roberta-base-sentiment-latest',
-                'label_mapping': {'LABEL_0': 'Negative', 'LABEL_1': 'Neutral', 'LABEL_2': 'Positive'}
+                'label_mapping': {'LABEL_0': 'Negative', 'LABEL_1': 'Neutral', 'LABEL_2': 'Positive'},
+                'cost': 125,
+                'domain': 'social'
             },
             'finbert': {
                 'name': 'ProsusAI/finbert',
-                'label_mapping': {'negative': 'Negative', 'neutral': 'Neutral', 'positive': 'Positive'}
+                'label_mapping': {'negative': 'Negative', 'neutral': 'Neutral', 'positive': 'Positive'},
+                'cost': 110,
+                'domain': 'finance'
             }
         }
         self.performance_stats = {}
+        self.compare_stats = {mode: {'requests': 0, 'models_run': 0} for mode in COMPARE_MODES}
+        self.router = ModelRouter({key: cfg['domain'] for key, cfg in self.model_configs.items()},
+                                  close_ratio=config.COMPARE_ROUTE_CLOSE_RATIO)
+        self.backends = {}
+        self.direct = {}
+        self.cache = PredictionCache() if config.PREDICTION_CACHE_ENABLED else None
+        self.store = get_prediction_store()
+        self.isolated = config.MODEL_PROCESS_ISOLATION
+        self.cpu_sets = plan_cpu_sets(self.model_configs.keys()) if self.isolated else {}
         self._initialize_models()
     
     def _initialize_models(self):
-        """Initialize all available models"""
+        """Set up the lazy model pool (models load on first use)"""
         logger.info("Initializing advanced model manager...")
         
-        for model_key, model_config in self.model_configs.items():
-            try:
-                logger.info(f"Loading model: {model_config['name']}")
-                start_time = time.time()
-                
-                # Try to load the model
-                model = pipeline(
-                    "sentiment-analysis",
-                    model=model_config['name'],
-                    return_all_scores=True,
-                    device=0 if torch.cuda.is_available() else -1
-                )
-                
-                # Test the model
-                test_result = model("This is a test.")
-                logger.info(f"Model {model_key} test successful: {test_result}")
-                
-                load_time = time.time() - start_time
-                self.models[model_key] = model
-                self.performance_stats[model_key] = {
-                    'load_time': load_time,
-                    'predictions': 0,
-                    'total_time': 0,
-                    'errors': 0
-                }
-                
-                logger.info(f"✅ Model {model_key} loaded successfully in {load_time:.2f}s")
-                
-            except Exception as e:
-                logger.warning(f"❌ Failed to load model {model_key}: {e}")
-                # Don't fail completely, just skip this model
-                continue
+        self.pool = ModelPool(self.model_configs.keys(), self._load_model, self._unload_model)
+        self.executors = ExecutorPool(self.model_configs.keys())
+        
+        logger.info(f"✅ Advanced model manager initialized with {len(self.model_configs)} models "
+                    f"(loaded on demand)")
+    
+    def _load_model(self, model_key: str) -> int:
+        """Load one model for the pool and return its resident memory in bytes"""
+        model_config = self.model_configs[model_key]
+        backend = create_backend(backend_for(model_key))
+        logger.info(f"Loading model: {model_config['name']} (backend: {backend.name})")
+        start_time = time.time()
+        
+        # Try to load the model (in its own pinned process when isolated)
+        if self.isolated:
+            model = ModelProcess(model_key, model_config['name'], backend.name, self.cpu_sets[model_key])
+            backend.mirror(model.backend_stats)
+        else:
+            model = backend.load(
+                model_config['name'],
+                pipeline_factory=pipeline,
+                return_all_scores=True,
+                device=0 if torch.cuda.is_available() else -1
+            )
+            backend.release_base()
+        
+        # Test the model
+        test_result = model("This is a test.")
+        logger.info(f"Model {model_key} test successful: {test_result}")
+        
+        load_time = time.time() - start_time
+        self.models[model_key] = model
+        self.backends[model_key] = backend
+        if config.DIRECT_INFERENCE or config.LONG_TEXT_MODE:
+            direct = build_classifier(model)
+            if direct is not None:
+                self.direct[model_key] = direct
         
-        if not self.models:
-            raise Exception("No models could be loaded!")
+        stats = self.performance_stats.setdefault(model_key, {
+            'load_time': load_time,
+            'predictions': 0,
+            'total_time': 0,
+            'errors': 0,
+            'cache_hits': 0
+        })
+        stats['load_time'] = load_time
         
-        logger.info(f"✅ Advanced model manager initialized with {len(self.models)} models")
+        logger.info(f"✅ Model {model_key} loaded successfully in {load_time:.2f}s")
+        return backend.get_stats()['weights_bytes']
     
-    def predict_single_model(self, text: str, model_key: str) -> ModelResult:
-        """Predict sentiment using a single model"""
-        if model_key not in self.models:
-            raise ValueError(f"Model {model_key} not available")
+    def _unload_model(self, model_key: str):
+        """Drop every reference to an evicted model so its memory can be freed"""
+        model = self.models.pop(model_key, None)
+        if isinstance(model, ModelProcess):
+            model.close()
+        self.direct.pop(model_key, None)
+        backend = self.backends.get(model_key)
+        if backend is not None:
+            backend.base_model = None
+    
+    def load_models(self, model_keys: Optional[List[str]] = None) -> List[str]:
+        """Load models (in parallel) ahead of use; returns the keys that loaded"""
+        with self.pool.using(model_keys or list(self.model_configs.keys())) as loaded:
+            return loaded
+    
+    @contextmanager
+    def _require_model(self, model_key: str):
+        """Hold a model resident for a ``with`` block, raising ValueError if it cannot be used"""
+        with self.pool.using([model_key] if model_key in self.model_configs else []) as loaded:
+            if not loaded:
+                raise ValueError(f"Model {model_key} not available")
+            yield
+    
+    def predict_single_model(self, text: str, model_key: str, use_cache: bool = True,
+                             abandoned: Optional[threading.Event] = None) -> ModelResult:
+        """
+        Predict sentiment using a single model
         
+        ``abandoned`` is checked before loading and again before the forward pass;
+        once it is set the call raises CancelledError instead of running the model.
+        """
+        self._check_abandoned(abandoned, model_key)
+        with self._require_model(model_key):
+            return self._predict_single_model(text, model_key, use_cache, abandoned)
+    
+    @staticmethod
+    def _check_abandoned(abandoned: Optional[threading.Event], model_key: str):
+        """Raise CancelledError when the caller no longer wants this model's answer"""
+        if abandoned is not None and abandoned.is_set():
+            raise CancelledError(f"Prediction with {model_key} is no longer needed")
+    
+    def _predict_single_model(self, text: str, model_key: str, use_cache: bool,
+                              abandoned: Optional[threading.Event] = None) -> ModelResult:
+        """Predict with a model the caller holds resident"""
         start_time = time.time()
         
+        cache_keys = self._cache_keys([text], model_key) if use_cache else [None]
+        cached = self._lookup_cached(cache_keys)[0]
+        if cached is not None:
+            return self._cached_result(cached, model_key, start_time)
+        
+        self._check_abandoned(abandoned, model_key)
+        
         try:
-            model = self.models[model_key]
-            model_config = self.model_configs[model_key]
-            
             # Get prediction
-            raw_result = model(text)
-            
-            # Handle different output formats
-            if isinstance(raw_result, list) and len(raw_result) > 0:
-                if isinstance(raw_result[0], list):
-                    # Handle nested list format [[{...}]]
-                    scores = raw_result[0]
-                else:
-                    # Handle direct list format [{...}]
-                    scores = raw_result
-            else:
-                scores = raw_result
-            
-            # Find the highest confidence prediction
-            best_prediction = max(scores, key=lambda x: x['score'])
-            
-            # Map label to human-readable format
-            raw_label = best_prediction['label']
-            mapped_label = model_config['label_mapping'].get(raw_label, raw_label)
-            
+            raw_result = self._run_model(model_key, [text])[0]
             processing_time = time.time() - start_time
+            self.backends[model_key].record(processing_time)
+            
+            result = self._build_result(raw_result, model_key, processing_time)
             
             # Update stats
             self.performance_stats[model_key]['predictions'] += 1
             self.performance_stats[model_key]['total_time'] += processing_time
             
-            return ModelResult(
-                model_name=model_config['name'],
-                sentiment=mapped_label,
-                confidence=best_prediction['score'],
-                processing_time=processing_time,
-                timestamp=datetime.now()
-            )
+            self._remember(cache_keys, [result])
+            
+            return result
             
         except Exception as e:
             self.performance_stats[model_key]['errors'] += 1
             processing_time = time.time() - start_time
             logger.error(f"Error in model {model_key}: {e}")
             
-            return ModelResult(
-                model_name=model_config['name'],
-                sentiment="Error",
-                confidence=0.0,
-                processing_time=processing_time,
-                timestamp=datetime.now()
-            )
+            return self._error_result(model_key, processing_time)
     
-    def predict_with_comparison(self, text: str, models: Optional[List[str]] = None) -> ComparisonResult:
+    def _run_model(self, model_key: str, texts: List[str]) -> List[Any]:
+        """One forward pass; returns per-text [{'label', 'score'}, ...] over all classes"""
+        return run_pipeline(self.models[model_key], self.direct.get(model_key), texts)
+    
+    def _build_result(self, raw_result: Any, model_key: str, processing_time: float) -> ModelResult:
+        """Convert raw pipeline output for one text into a ModelResult"""
+        model_config = self.model_configs[model_key]
+        
+        # Handle different output formats
+        if isinstance(raw_result, list) and len(raw_result) > 0:
+            if isinstance(raw_result[0], list):
+                # Handle nested list format [[{...}]]
+                scores = raw_result[0]
+            else:
+                # Handle direct list format [{...}]
+                scores = raw_result
+        else:
+            scores = raw_result
+        
+        # Find the highest confidence prediction
+        best_prediction = max(scores, key=lambda x: x['score'])
+        
+        # Map label to human-readable format
+        raw_label = best_prediction['label']
+        mapped_label = model_config['label_mapping'].get(raw_label, raw_label)
+        
+        probabilities = {}
+        for score in scores:
+            label = model_config['label_mapping'].get(score['label'], score['label'])
+            probabilities[label] = probabilities.get(label, 0.0) + float(score['score'])
+        
+        return ModelResult(
+            model_name=model_config['name'],
+            sentiment=mapped_label,
+            confidence=best_prediction['score'],
+            processing_time=processing_time,
+            timestamp=datetime.now(),
+            probabilities=probabilities
+        )
+    
+    def _fingerprint(self, model_key: str) -> str:
+        """Fingerprint of a loaded model, used to key cached predictions"""
+        model = self.models.get(model_key)
+        revision = getattr(getattr(getattr(model, 'model', None), 'config', None), '_commit_hash', None)
+        backend = self.backends.get(model_key)
+        variant = f"advanced:{model_key}"
+        if backend is not None and backend.active and backend.reduces_precision:
+            variant += f":{backend.name}"  # Reduced-precision outputs may differ from fp32
+        if long_text_variant():
+            variant += f":{long_text_variant()}"  # Windowed predictions of long texts differ from truncated ones
+        # Label mappings differ from SentimentAnalyzer's, so keep entries apart in the shared store
+        return model_fingerprint(self.model_configs[model_key]['name'],
+                                 revision if isinstance(revision, str) else None,
+                                 variant=variant)
+    
+    def _cache_keys(self, texts: List[str], model_key: str) -> List[Optional[Tuple[str, str]]]:
+        """(fingerprint, text hash) key per text, or None when caching is off"""
+        if self.cache is None and self.store is None:
+            return [None] * len(texts)
+        fingerprint = self._fingerprint(model_key)
+        return [(fingerprint, text_hash(text)) if isinstance(text, str) else None for text in texts]
+    
+    def _lookup_cached(self, cache_keys: List[Optional[Tuple[str, str]]]
+                       ) -> List[Optional[Tuple[str, float, Dict[str, float]]]]:
+        """
+        Look keys up in the in-process cache, then in the shared on-disk store
+        
+        Entries without a class distribution (stored before distributions were kept)
+        count as misses, so consensus never depends on what happened to be cached.
+        """
+        results = [None] * len(cache_keys)
+        
+        if self.cache is not None:
+            for i, key in enumerate(cache_keys):
+                if key is not None:
+                    results[i] = self.cache.get(key)
+        
+        if self.store is not None:
+            missing = [i for i, key in enumerate(cache_keys) if key is not None and results[i] is None]
+            if missing:
+                found = self.store.get_many(cache_keys[missing[0]][0],
+                                            [cache_keys[i][1] for i in missing], probabilities=True)
+                for i in missing:
+                    hit = found.get(cache_keys[i][1])
+                    if hit is not None and hit[2]:
+                        results[i] = hit
+                        if self.cache is not None:
+                            self.cache.set(cache_keys[i], hit)
+        
+        return results
+    
+    def _remember(self, cache_keys: List[Optional[Tuple[str, str]]], results: List[ModelResult]):
+        """Write freshly computed predictions to both cache tiers"""
+        entries = [(key, (r.sentiment, r.confidence, r.probabilities))
+                   for key, r in zip(cache_keys, results)
+                   if key is not None and r.sentiment != "Error" and r.probabilities]
+        if not entries:
+            return
+        
+        if self.cache is not None:
+            for key, value in entries:
+                self.cache.set(key, value)
+        
+        if self.store is not None:
+            self.store.set_many(entries[0][0][0], [(key[1], *value) for key, value in entries])
+    
+    def _cached_result(self, cached: Tuple[str, float, Dict[str, float]], model_key: str,
+                       start_time: float) -> ModelResult:
+        """Build a ModelResult from a cached prediction"""
+        sentiment, confidence, probabilities = cached
+        self.performance_stats[model_key]['cache_hits'] += 1
+        return ModelResult(
+            model_name=self.model_configs[model_key]['name'],
+            sentiment=sentiment,
+            confidence=confidence,
+            processing_time=time.time() - start_time,
+            timestamp=datetime.now(),
+            probabilities=dict(probabilities)
+        )
+    
+    def _error_result(self, model_key: str, processing_time: float = 0.0) -> ModelResult:
+        """Build the placeholder result reported for a failed prediction"""
+        return ModelResult(
+            model_name=self.model_configs[model_key]['name'],
+            sentiment="Error",
+            confidence=0.0,
+            processing_time=processing_time,
+            timestamp=datetime.now()
+        )
+    
+    def predict_with_comparison(self, text: str, models: Optional[List[str]] = None,
+                                use_cache: bool = True, mode: Optional[str] = None) -> ComparisonResult:
         """Predict sentiment using multiple models and compare results"""
         if models is None:
-            models = list(self.models.keys())
+            models = self.get_available_models()
+        mode = mode or config.COMPARE_MODE
+        if mode not in COMPARE_MODES:
+            raise ValueError(f"Unknown comparison mode: {mode}")
         
         start_time = time.time()
+        routing = None
+        
+        if mode == 'routed':
+            decision = self.router.route(text, models)
+            routing = decision.to_dict()
+            results, models_run = self._run_all(text, decision.models, use_cache)
+        elif mode == 'cascade':
+            results, models_run = self._run_cascade(text, models, use_cache)
+        elif mode == 'quorum':
+            results, models_run = self._run_quorum(text, models, use_cache)
+        else:
+            results, models_run = self._run_all(text, models, use_cache)
+        
+        consensus_sentiment, average_confidence, agreement_score = self._consensus(results)
+        
+        stats = self.compare_stats[mode]
+        stats['requests'] += 1
+        stats['models_run'] += len(models_run)
+        
+        total_time = time.time() - start_time
+        
+        return ComparisonResult(
+            text=text,
+            results=results,
+            consensus_sentiment=consensus_sentiment,
+            average_confidence=average_confidence,
+            agreement_score=agreement_score,
+            processing_time=total_time,
+            mode=mode,
+            models_run=models_run,
+            skipped_models=[model for model in models if model not in models_run],
+            routing=routing
+        )
+    
+    def _run_all(self, text: str, models: List[str], use_cache: bool) -> Tuple[List[ModelResult], List[str]]:
+        """Run every model concurrently; returns the results and the keys that produced them"""
         results = []
+        models_run = []
         
-        # Use ThreadPoolExecutor for parallel predictions
-        with ThreadPoolExecutor(max_workers=len(models)) as executor:
+        # Load any models this comparison needs, in parallel, and hold them until it finishes
+        with self.pool.using(models) as loaded:
+            # Run each model on its own long-lived executor (bounded concurrency and threads)
             future_to_model = {
-                executor.submit(self.predict_single_model, text, model): model 
-                for model in models if model in self.models
+                self.executors.submit(model, self.predict_single_model, text, model, use_cache): model
+                for model in loaded
             }
             
             for future in as_completed(future_to_model):
                 try:
                     result = future.result()
                     results.append(result)
+                    models_run.append(future_to_model[future])
                 except Exception as e:
                     model_name = future_to_model[future]
                     logger.error(f"Model {model_name} failed: {e}")
         
+        return results, models_run
+    
+    def _run_cascade(self, text: str, models: List[str], use_cache: bool) -> Tuple[List[ModelResult], List[str]]:
+        """Run models cheapest first, stopping once the accumulated evidence is confident"""
+        results = []
+        models_run = []
+        
+        for model in self._cascade_order(models):
+            try:
+                # Models load only when the cascade reaches them
+                result = self.executors.submit(model, self.predict_single_model, text, model, use_cache).result()
+            except Exception as e:
+                logger.error(f"Model {model} failed: {e}")
+                continue
+            results.append(result)
+            models_run.append(model)
+            if self._evidence_is_confident(results):
+                break
+        
+        return results, models_run
+    
+    def _run_quorum(self, text: str, models: List[str], use_cache: bool) -> Tuple[List[ModelResult], List[str]]:
+        """Run every model concurrently, returning once the consensus is settled or the deadline passes"""
+        results = []
+        models_run = []
+        deadline = config.COMPARE_DEADLINE
+        expires_at = time.monotonic() + deadline if deadline > 0 else None
+        
+        # Models load on their own executors, so a slow load counts against the deadline too
+        abandoned = threading.Event()
+        future_to_model = {
+            self.executors.submit(model, self.predict_single_model, text, model, use_cache, abandoned): model
+            for model in models if model in self.model_configs
+        }
+        
+        pending = set(future_to_model)
+        while pending:
+            timeout = None if expires_at is None else max(0.0, expires_at - time.monotonic())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                logger.warning(f"Comparison deadline of {deadline}s expired with {len(pending)} models outstanding")
+                break
+            for future in done:
+                try:
+                    results.append(future.result())
+                    models_run.append(future_to_model[future])
+                except Exception as e:
+                    logger.error(f"Model {future_to_model[future]} failed: {e}")
+            if self._consensus_is_settled(results, len(pending)):
+                break
+        
+        # Drop the stragglers: queued calls are cancelled, and running ones skip their forward
+        # pass unless it has already started, so the next request for that model does not
+        # queue behind work nobody will read
+        abandoned.set()
+        for future in pending:
+            future.cancel()
+        
+        return results, models_run
+    
+    def _consensus_is_settled(self, results: List[ModelResult], outstanding: int) -> bool:
+        """Whether ``outstanding`` more votes (at most 1 each) could still change the soft-vote winner"""
+        valid_results = [r for r in results if r.sentiment != "Error"]
+        if not valid_results:
+            return False
+        
+        votes = sorted(self._soft_votes(valid_results).values(), reverse=True) + [0.0]
+        return votes[0] - votes[1] > outstanding
+    
+    def _cascade_order(self, models: List[str]) -> List[str]:
+        """Models cheapest first: by measured latency once each has run, else by configured cost"""
+        models = [model for model in models if model in self.model_configs]
+        stats = self.performance_stats
+        if all(stats.get(model, {}).get('predictions') for model in models):
+            return sorted(models, key=lambda model: stats[model]['total_time'] / stats[model]['predictions'])
+        return sorted(models, key=lambda model: self.model_configs[model].get('cost', 0))
+    
+    @staticmethod
+    def _soft_votes(valid_results: List[ModelResult]) -> Dict[str, float]:
+        """Sum of each model's class distribution (results without one vote with their top confidence)"""
+        sentiment_votes = {}
+        for result in valid_results:
+            for sentiment, probability in (result.probabilities or {result.sentiment: result.confidence}).items():
+                sentiment_votes[sentiment] = sentiment_votes.get(sentiment, 0) + probability
+        return sentiment_votes
+    
+    def _evidence_is_confident(self, results: List[ModelResult]) -> bool:
+        """Whether the mean distribution of the results so far clears the cascade thresholds"""
+        valid_results = [r for r in results if r.sentiment != "Error"]
+        if not valid_results:
+            return False
+        
+        votes = sorted(self._soft_votes(valid_results).values(), reverse=True) + [0.0]
+        top = votes[0] / len(valid_results)
+        margin = (votes[0] - votes[1]) / len(valid_results)
+        return (top >= config.COMPARE_CASCADE_CONFIDENCE or
+                (config.COMPARE_CASCADE_MARGIN > 0 and margin >= config.COMPARE_CASCADE_MARGIN))
+    
+    def _consensus(self, results: List[ModelResult]) -> Tuple[str, float, float]:
+        """Consensus sentiment, average confidence and agreement score of a set of results"""
         # Calculate consensus and agreement
         valid_results = [r for r in results if r.sentiment != "Error"]
         
         if not valid_results:
             # All models failed
-            consensus_sentiment = "Error"
-            average_confidence = 0.0
-            agreement_score = 0.0
-        else:
-            # Find consensus sentiment (most common)
-            sentiment_votes = {}
-            confidence_sum = 0
-            
-            for result in valid_results:
-                sentiment = result.sentiment
-                sentiment_votes[sentiment] = sentiment_votes.get(sentiment, 0) + result.confidence
-                confidence_sum += result.confidence
-            
-            consensus_sentiment = max(sentiment_votes, key=sentiment_votes.get)
-            average_confidence = confidence_sum / len(valid_results)
-            
-            # Calculate agreement score (how many models agree with consensus)
-            agreeing_models = sum(1 for r in valid_results if r.sentiment == consensus_sentiment)
-            agreement_score = agreeing_models / len(valid_results)
+            return "Error", 0.0, 0.0
         
-        total_time = time.time() - start_time
+        # Find consensus sentiment by soft voting over each model's class distribution
+        sentiment_votes = self._soft_votes(valid_results)
+        consensus_sentiment = max(sentiment_votes, key=sentiment_votes.get)
+        average_confidence = sum(r.confidence for r in valid_results) / len(valid_results)
         
-        return ComparisonResult(
-            text=text,
-            results=results,
-            consensus_sentiment=consensus_sentiment,
-            average_confidence=average_confidence,
-            agreement_score=agreement_score,
-            processing_time=total_time
-        )
+        # Calculate agreement score (how many models agree with consensus)
+        agreeing_models = sum(1 for r in valid_results if r.sentiment == consensus_sentiment)
+        agreement_score = agreeing_models / len(valid_results)
+        
+        return consensus_sentiment, average_confidence, agreement_score
     
     def batch_predict(self, texts: List[str], model_key: Optional[str] = None) -> List[ModelResult]:
         """Predict sentiment for multiple texts"""
-        if model_key and model_key not in self.models:
-            raise ValueError(f"Model {model_key} not available")
-        
         # Use first available model if none specified
         if model_key is None:
-            model_key = list(self.models.keys())[0]
+            available = self.get_available_models()
+            if not available:
+                raise ValueError("No models available")
+            model_key = available[0]
         
+        with self._require_model(model_key):
+            return self._batch_predict(texts, model_key)
+    
+    def _batch_predict(self, texts: List[str], model_key: str) -> List[ModelResult]:
+        """Batch prediction with a model the caller holds resident"""
         logger.info(f"Processing batch of {len(texts)} texts with model {model_key}")
         
-        results = []
-        for i, text in enumerate(texts):
+        model = self.models[model_key]
+        results: List[Optional[ModelResult]] = [None] * len(texts)
+        
+        cache_keys = self._cache_keys(texts, model_key)
+        for i, cached in enumerate(self._lookup_cached(cache_keys)):
+            if cached is not None:
+                results[i] = self._cached_result(cached, model_key, time.time())
+        pending = [i for i, result in enumerate(results) if result is None]
+        
+        # Sort by token length and bucket so each forward pass pads as little as possible
+        buckets = length_buckets(self._token_lengths(model, [texts[i] for i in pending]),
+                                 config.BATCH_BUCKET_SIZE,
+                                 config.BATCH_BUCKET_MAX_TOKENS)
+        
+        processed = len(texts) - len(pending)
+        for bucket in buckets:
+            bucket = [pending[i] for i in bucket]
+            bucket_texts = [texts[i] for i in bucket]
+            start_time = time.time()
+            
             try:
-                result = self.predict_single_model(text, model_key)
-                results.append(result)
+                raw_results = self._run_model(model_key, bucket_texts)
+                if len(raw_results) != len(bucket_texts):
+                    raise ValueError(f"Model returned {len(raw_results)} results "
+                                     f"for {len(bucket_texts)} texts")
+                
+                bucket_time = time.time() - start_time
+                self.backends[model_key].record(bucket_time, len(bucket_texts))
+                per_text_time = bucket_time / len(bucket_texts)
+                for index, raw_result in zip(bucket, raw_results):
+                    results[index] = self._build_result(raw_result, model_key, per_text_time)
+                self._remember([cache_keys[i] for i in bucket], [results[i] for i in bucket])
+                
+                self.performance_stats[model_key]['predictions'] += len(bucket_texts)
+                self.performance_stats[model_key]['total_time'] += bucket_time
                 
-                if (i + 1) % 10 == 0:
-                    logger.info(f"Processed {i + 1}/{len(texts)} texts")
-                    
             except Exception as e:
-                logger.error(f"Error processing text {i}: {e}")
-                results.append(ModelResult(
-                    model_name=self.model_configs[model_key]['name'],
-                    sentiment="Error",
-                    confidence=0.0,
-                    processing_time=0.0,
-                    timestamp=datetime.now()
-                ))
+                # Retry the bucket one text at a time so only the bad item maps to Error
+                logger.warning(f"Batched forward pass failed for bucket of {len(bucket_texts)} texts, "
+                               f"retrying individually: {e}")
+                for index in bucket:
+                    try:
+                        results[index] = self.predict_single_model(texts[index], model_key)
+                    except Exception as item_error:
+                        logger.error(f"Error processing text {index}: {item_error}")
+                        results[index] = self._error_result(model_key)
+            
+            processed += len(bucket_texts)
+            logger.debug(f"Processed {processed}/{len(texts)} texts")
         
         return results
     
+    def _token_lengths(self, model: Any, texts: List[str]) -> List[int]:
+        """Token length of every text, falling back to character length"""
+        tokenizer = getattr(model, 'tokenizer', None)
+        if tokenizer is not None:
+            try:
+                encodings = tokenizer(texts, truncation=True)
+                return [len(ids) for ids in encodings['input_ids']]
+            except Exception as e:
+                logger.debug(f"Tokenizer length estimate failed, using character lengths: {e}")
+        
+        return [len(text) if isinstance(text, str) else 0 for text in texts]
+    
     def get_model_performance(self) -> Dict[str, Dict[str, Any]]:
         """Get performance statistics for all models"""
         performance = {}
@@ -277,14 +660,71 @@ class AdvancedSentimentAnalyzer:
                 'total_errors': stats['errors'],
                 'average_processing_time': avg_time,
                 'error_rate': error_rate,
-                'load_time': stats['load_time']
+                'load_time': stats['load_time'],
+                'cache_hits': stats.get('cache_hits', 0),
+                'backend': self.backends[model_key].get_stats() if model_key in self.backends else None
             }
         
         return performance
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get prediction cache and shared store hit, miss and eviction counters"""
+        return {
+            'memory': self.cache.get_stats() if self.cache is not None else {'enabled': False},
+            'store': self.store.get_stats() if self.store is not None else {'enabled': False}
+        }
+    
+    def get_compare_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get comparison counts and average models run per comparison, by mode"""
+        return {
+            mode: {
+                'requests': stats['requests'],
+                'models_run': stats['models_run'],
+                'average_models_run': stats['models_run'] / stats['requests'] if stats['requests'] else 0.0
+            }
+            for mode, stats in self.compare_stats.items()
+        }
+    
+    def get_routing_stats(self) -> Dict[str, Any]:
+        """Get routed comparison counts per domain and the average models routed per comparison"""
+        return self.router.get_stats()
+    
+    def get_executor_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-model executor concurrency and queue-wait statistics"""
+        return self.executors.get_stats()
+    
+    def get_process_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get pid, CPU set and call counters of every model process (empty unless isolated)"""
+        return {key: model.get_stats() for key, model in list(self.models.items())
+                if isinstance(model, ModelProcess)}
+    
+    def warm_cache(self, path: str, model_keys: Optional[List[str]] = None) -> int:
+        """Pre-warm the prediction caches by replaying a JSONL request log through each model"""
+        model_keys = model_keys or self.get_available_models()
+        chunk_size = config.BATCH_BUCKET_SIZE
+        replayed = 0
+        
+        try:
+            texts = [text[:config.MAX_TEXT_LENGTH] for text in iter_warmup_texts(path)]
+        except OSError as e:
+            logger.warning(f"Cache warm-up file {path} unreadable: {e}")
+            return 0
+        
+        for model_key in model_keys:
+            for start in range(0, len(texts), chunk_size):
+                self.batch_predict(texts[start:start + chunk_size], model_key)
+            replayed += len(texts)
+        
+        logger.info(f"Cache warm-up replayed {len(texts)} texts through {len(model_keys)} models")
+        return replayed
+    
     def get_available_models(self) -> List[str]:
-        """Get list of successfully loaded models"""
-        return list(self.models.keys())
+        """Get list of models that are loaded or can be loaded on demand"""
+        return [key for key in self.model_configs if self.pool.is_available(key)]
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get load state, memory footprint and last-used time of every model"""
+        return self.pool.get_stats()
 
 # Global instance
 advanced_analyzer = None
@@ -294,13 +734,18 @@ def get_advanced_analyzer() -> AdvancedSentimentAnalyzer:
     global advanced_analyzer
     if advanced_analyzer is None:
         advanced_analyzer = AdvancedSentimentAnalyzer()
+        if config.MODEL_POOL_PRELOAD:
+            advanced_analyzer.load_models([key.strip() for key in config.MODEL_POOL_PRELOAD.split(',') if key.strip()])
+        if config.PREDICTION_STORE_WARMUP_FILE:
+            advanced_analyzer.warm_cache(config.PREDICTION_STORE_WARMUP_FILE)
     return advanced_analyzer
 
 # Convenience functions for backward compatibility
-def predict_advanced(text: str, models: Optional[List[str]] = None) -> ComparisonResult:
+def predict_advanced(text: str, models: Optional[List[str]] = None,
+                     mode: Optional[str] = None) -> ComparisonResult:
     """Predict with model comparison"""
     analyzer = get_advanced_analyzer()
-    return analyzer.predict_with_comparison(text, models)
+    return analyzer.predict_with_comparison(text, models, mode=mode)
 
 def predict_batch(texts: List[str], model_key: Optional[str] = None) -> List[ModelResult]:
     """Predict sentiment for multiple texts"""
@@ -9,7 +9,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.config import config
 from config.logging_config import get_logger
-from .model import predict, ModelError
+from .model import (predict, get_health_monitor, get_inference_stats, get_load_status,
+                    preload_model, start_background_load, wait_for_model, ModelError)
 
 # Initialize logger
 logger = get_logger('app')
@@ -37,6 +38,20 @@ else:
 logger.info(f"Starting Sentiment Analyzer application in {os.getenv('FLASK_ENV', 'development')} mode")
 logger.info(f"Using model: {config.MODEL_NAME}")
 
+# Preloading (gunicorn master) loads before workers fork and they start their own probes;
+# otherwise load off-thread so the server binds its port immediately
+if config.MODEL_PRELOAD:
+    preload_model()
+else:
+    if config.MODEL_BACKGROUND_LOAD:
+        start_background_load()
+    
+    # Probe the model in the background when traffic is idle, so readiness stays current
+    get_health_monitor().start()
+
+# Endpoints that need the sentiment model; held, then rejected, while it loads
+MODEL_ENDPOINTS = {'home', 'api_analyze'}
+
 
 @app.before_request
 def log_request_info():
@@ -46,6 +61,31 @@ def log_request_info():
     logger.debug(f"Request: {request.method} {request.url} from {request.remote_addr}")
 
 
+@app.before_request
+def require_model_ready():
+    """Hold model-bound requests while the model loads in the background, then answer 503."""
+    if request.endpoint not in MODEL_ENDPOINTS or (request.endpoint == 'home' and request.method != 'POST'):
+        return None
+    
+    if wait_for_model(config.MODEL_READY_TIMEOUT):
+        return None
+    
+    logger.warning(f"Rejecting {request.method} {request.path}: model still loading")
+    if request.path.startswith('/api/'):
+        response = jsonify({
+            'error': 'Service Unavailable',
+            'message': 'Model is still loading. Please retry shortly.',
+            'status': 'loading'
+        })
+    else:
+        response = app.make_response(render_template('error.html',
+                                                     error_code=503,
+                                                     error_message="The AI model is still starting up. Please try again shortly."))
+    response.status_code = 503
+    response.headers['Retry-After'] = str(max(1, int(config.MODEL_READY_TIMEOUT)))
+    return response
+
+
 @app.after_request
 def log_response_info(response):
     """Log response information including processing time."""
@@ -248,32 +288,125 @@ def api_analyze():
 
 @app.route("/api/health", methods=["GET"])
 def health_check():
-    """Health check endpoint for monitoring and load balancers."""
-    try:
-        # Quick model check with simple text
-        predict("test")
-        
-        return jsonify({
+    """
+    Health check endpoint for monitoring and load balancers.
+    
+    Answered from the cached outcome of recent inferences. Pass ``?deep=1`` for a
+    real inference (rate-limited; repeated calls get the cached deep result).
+    """
+    body, status_code = health_payload(request.args.get('deep', '').lower() in ('1', 'true', 'yes'))
+    return jsonify(body), status_code
+
+
+def health_payload(deep):
+    """Health check body and status code (``deep`` runs a real, rate-limited inference)."""
+    monitor = get_health_monitor()
+    status = get_load_status()
+    
+    deep_result = None
+    if deep or status['state'] == 'not_started':
+        # Lazy-loading deployments load the model on the first health check
+        deep_result = monitor.deep_check()
+        status = get_load_status()
+    
+    health = monitor.get_stats()
+    healthy = status['ready'] and health['healthy'] and (deep_result is None or deep_result.get('ok', False))
+    
+    if healthy:
+        return {
             'status': 'healthy',
             'model': config.MODEL_NAME,
             'version': '1.0.0',
+            'last_inference': health['last_inference'],
+            'deep_check': deep_result,
             'timestamp': time.time()
-        })
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return jsonify({
-            'status': 'unhealthy',
-            'error': str(e),
-            'timestamp': time.time()
-        }), 503
+        }, 200
+    
+    if not status['ready']:
+        error = status['error'] or f"Model {status['state'].replace('_', ' ')}"
+    else:
+        error = (health['last_inference'] or {}).get('error') or 'Recent inferences failed'
+    logger.error(f"Health check failed: {error}")
+    return {
+        'status': 'unhealthy',
+        'error': error,
+        'deep_check': deep_result,
+        'timestamp': time.time()
+    }, 503
+
+
+@app.route("/api/live", methods=["GET"])
+def liveness():
+    """Liveness probe: the process is up and serving HTTP (never touches the model)."""
+    return jsonify({
+        'status': 'alive',
+        'timestamp': time.time()
+    })
+
+
+@app.route("/api/ready", methods=["GET"])
+def readiness():
+    """
+    Readiness probe: 200 once the model has loaded and recent inferences succeed.
+    
+    Reports the result and latency of the last real or background inference.
+    """
+    body, status_code = readiness_payload()
+    return jsonify(body), status_code
+
+
+def readiness_payload():
+    """Readiness probe body and status code."""
+    status = get_load_status()
+    if status['state'] == 'not_started':
+        # Lazy-loading deployments start loading on the first probe
+        start_background_load()
+        status = get_load_status()
+    
+    health = get_health_monitor().get_stats()
+    ready = status['ready'] and health['healthy']
+    
+    if ready:
+        state = 'ready'
+    elif status['ready']:
+        state = 'degraded'
+    else:
+        state = status['state']
+    
+    return {
+        'status': state,
+        'model': config.MODEL_NAME,
+        'load_time': status['load_time'],
+        'error': status['error'],
+        'last_inference': health['last_inference'],
+        'consecutive_failures': health['consecutive_failures'],
+        'timestamp': time.time()
+    }, 200 if ready else 503
+
+
+@app.route("/api/metrics", methods=["GET"])
+def api_metrics():
+    """Serving metrics endpoint (queue depth, batch-size histograms)."""
+    return jsonify({
+        'inference': get_inference_stats(),
+        'timestamp': time.time()
+    })
 
 
 @app.route("/api/info", methods=["GET"])
 def api_info():
     """API information endpoint."""
+    return jsonify(info_payload())
+
+
+def info_payload():
+    """API information body."""
     endpoints = {
         'analyze': '/api/analyze',
         'health': '/api/health',
+        'liveness': '/api/live',
+        'readiness': '/api/ready',
+        'metrics': '/api/metrics',
         'info': '/api/info'
     }
     
@@ -282,12 +415,13 @@ def api_info():
         endpoints.update({
             'compare_models': '/api/v2/compare',
             'batch_analyze': '/api/v2/batch',
+            'batch_stream': '/api/v2/batch/stream',
             'models_info': '/api/v2/models',
             'analytics': '/api/v2/analytics',
             'test_models': '/api/v2/test-models'
         })
     
-    return jsonify({
+    return {
         'name': 'Sentiment Analyzer API',
         'version': '2.0.0' if ADVANCED_FEATURES_AVAILABLE else '1.0.0',
         'model': config.MODEL_NAME,
@@ -303,7 +437,7 @@ def api_info():
             'rate_limit': config.API_RATE_LIMIT,
             'max_batch_size': 50 if ADVANCED_FEATURES_AVAILABLE else 1
         }
-    })
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,582 @@
+"""
+ASGI (asyncio) variant of the API.
+
+The JSON routes of app.app and the advanced API are served by coroutines that
+await an InferenceQueue: model calls run on a dedicated, bounded thread pool
+(which in turn reaches replica or model processes when those are enabled), so
+an open connection costs an event-loop task rather than an OS thread while it
+waits for its client or its inference. Request and response bodies are the
+same as the Flask routes'. The HTML web interface is the Flask app, mounted
+underneath.
+
+Run with: uvicorn app.asgi:app --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import functools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+from config.logging_config import get_logger
+from .app import (app as flask_app, health_payload, info_payload, readiness_payload,
+                  validate_text_input)
+from .model import ModelError, get_inference_stats, predict, wait_for_model
+
+# Initialize logger
+logger = get_logger('asgi')
+
+# Try to import advanced features
+try:
+    from .advanced_api import (analytics_payload, batch_error, batch_payload, comparison_payload,
+                               compare_mode_error, models_payload, parse_ndjson_line, stream_line, stream_summary,
+                               test_models_payload)
+    from .advanced_model import get_advanced_analyzer, predict_advanced, predict_batch
+    ADVANCED_FEATURES_AVAILABLE = True
+except ImportError as e:
+    logger.warning(f"Advanced features not available: {e}")
+    ADVANCED_FEATURES_AVAILABLE = False
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError:
+    WSGIMiddleware = None
+
+
+class InferenceQueueFull(ModelError):
+    """Raised when more inference calls are pending than the queue admits."""
+    pass
+
+
+class RequestBodyError(Exception):
+    """Raised for bodies the Flask routes could not read (too large, not JSON)."""
+    pass
+
+
+class InferenceQueue:
+    """Bounded hand-off from the event loop to a dedicated inference thread pool."""
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None):
+        """
+        Args:
+            workers: Threads running model calls (defaults to config.ASGI_INFERENCE_WORKERS)
+            max_pending: Calls admitted at once, running or waiting (defaults to config.ASGI_MAX_PENDING)
+        """
+        self.workers = workers or config.ASGI_INFERENCE_WORKERS
+        self.max_pending = max_pending or config.ASGI_MAX_PENDING
+        self._executor = None  # Created on first use, so the queue can be restarted after shutdown()
+        # Only touched from the event loop thread, so no lock
+        self._stats = {
+            'pending': 0,
+            'max_pending_seen': 0,
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'rejected': 0,
+            'total_time': 0.0,
+        }
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        Run a blocking model call on the inference threads and await its result.
+
+        Raises:
+            InferenceQueueFull: If max_pending calls are already admitted
+        """
+        stats = self._stats
+        if stats['pending'] >= self.max_pending:
+            stats['rejected'] += 1
+            raise InferenceQueueFull(f"{stats['pending']} inference calls pending")
+
+        stats['pending'] += 1
+        stats['submitted'] += 1
+        stats['max_pending_seen'] = max(stats['max_pending_seen'], stats['pending'])
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='asgi-inference')
+        start_time = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._executor,
+                                                                      functools.partial(fn, *args))
+            stats['completed'] += 1
+            return result
+        except Exception:
+            stats['failed'] += 1
+            raise
+        finally:
+            stats['pending'] -= 1
+            stats['total_time'] += time.perf_counter() - start_time
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, admission and latency counters."""
+        stats = dict(self._stats)
+        finished = stats['completed'] + stats['failed']
+        return {
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'pending': stats['pending'],
+            'max_pending_seen': stats['max_pending_seen'],
+            'submitted': stats['submitted'],
+            'completed': stats['completed'],
+            'failed': stats['failed'],
+            'rejected': stats['rejected'],
+            'average_time': stats['total_time'] / finished if finished else 0.0,
+        }
+
+    def shutdown(self):
+        """Release the inference threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# Global inference queue
+inference = InferenceQueue()
+
+
+def _is_json(request: Request) -> bool:
+    """Whether the request declares a JSON body (as Flask's ``request.is_json``)."""
+    mimetype = request.headers.get('content-type', '').split(';')[0].strip().lower()
+    return mimetype == 'application/json' or (mimetype.startswith('application/') and mimetype.endswith('+json'))
+
+
+async def _read_body(request: Request, limit: Optional[int]) -> bytes:
+    """Read the body, refusing more than ``limit`` bytes."""
+    length = request.headers.get('content-length', '')
+    if limit and length.isdigit() and int(length) > limit:
+        raise RequestBodyError(f"Request body exceeds {limit} bytes")
+
+    body = bytearray()
+    async for data in request.stream():
+        body += data
+        if limit and len(body) > limit:
+            raise RequestBodyError(f"Request body exceeds {limit} bytes")
+    return bytes(body)
+
+
+async def _get_json(request: Request) -> Any:
+    """Parse a JSON body the way Flask's ``request.get_json()`` accepts it."""
+    if not _is_json(request):
+        raise RequestBodyError("Content-Type must be application/json")
+    body = await _read_body(request, config.MAX_CONTENT_LENGTH)
+    try:
+        return json.loads(body)
+    except ValueError as e:
+        raise RequestBodyError(f"Failed to decode JSON object: {e}")
+
+
+async def _wait_until_ready(timeout: float) -> bool:
+    """Await a model that is loading in the background without holding a thread."""
+    deadline = time.monotonic() + timeout
+    while not wait_for_model(0):
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(0.05)
+    return True
+
+
+def _busy_response() -> JSONResponse:
+    return JSONResponse({
+        'error': 'Server is busy, please retry shortly',
+        'status': 'error'
+    }, status_code=503, headers={'Retry-After': '1'})
+
+
+async def api_analyze(request: Request) -> JSONResponse:
+    """REST API endpoint for sentiment analysis (same contract as the Flask route)."""
+    if not await _wait_until_ready(config.MODEL_READY_TIMEOUT):
+        logger.warning(f"Rejecting {request.method} {request.url.path}: model still loading")
+        return JSONResponse({
+            'error': 'Service Unavailable',
+            'message': 'Model is still loading. Please retry shortly.',
+            'status': 'loading'
+        }, status_code=503, headers={'Retry-After': str(max(1, int(config.MODEL_READY_TIMEOUT)))})
+
+    try:
+        if not _is_json(request):
+            logger.warning("API request without JSON content type")
+            return JSONResponse({
+                'error': 'Bad Request',
+                'message': 'Content-Type must be application/json'
+            }, status_code=400)
+
+        data = await _get_json(request)
+        if not data:
+            return JSONResponse({
+                'error': 'Bad Request',
+                'message': 'Empty JSON payload'
+            }, status_code=400)
+
+        text = data.get('text')
+        logger.info("Processing API sentiment analysis request")
+
+        # Validate input
+        validated_text = validate_text_input(text)
+
+        # Get prediction with timing
+        start_time = time.time()
+        label, score = await inference.run(predict, validated_text)
+        processing_time = time.time() - start_time
+
+        logger.info(f"API sentiment analysis completed: {label} ({score:.3f}) in {processing_time:.3f}s")
+
+        return JSONResponse({
+            'sentiment': label,
+            'confidence': round(score, 4),
+            'processing_time': round(processing_time, 3),
+            'text_length': len(validated_text)
+        })
+
+    except ValueError as e:
+        logger.warning(f"API validation error: {e}")
+        return JSONResponse({
+            'error': 'Validation Error',
+            'message': str(e)
+        }, status_code=400)
+
+    except ModelError as e:
+        logger.error(f"API model error: {e}")
+        return JSONResponse({
+            'error': 'Model Error',
+            'message': 'AI model is temporarily unavailable'
+        }, status_code=503)
+
+    except Exception as e:
+        logger.error(f"Unexpected API error: {e}", exc_info=True)
+        return JSONResponse({
+            'error': 'Internal Server Error',
+            'message': 'An unexpected error occurred'
+        }, status_code=500)
+
+
+async def health_check(request: Request) -> JSONResponse:
+    """Health check endpoint (a deep check runs off the event loop)."""
+    deep = request.query_params.get('deep', '').lower() in ('1', 'true', 'yes')
+    body, status_code = await asyncio.to_thread(health_payload, deep)
+    return JSONResponse(body, status_code=status_code)
+
+
+async def liveness(request: Request) -> JSONResponse:
+    """Liveness probe: the process is up and serving HTTP (never touches the model)."""
+    return JSONResponse({
+        'status': 'alive',
+        'timestamp': time.time()
+    })
+
+
+async def readiness(request: Request) -> JSONResponse:
+    """Readiness probe: 200 once the model has loaded and recent inferences succeed."""
+    body, status_code = readiness_payload()
+    return JSONResponse(body, status_code=status_code)
+
+
+async def api_metrics(request: Request) -> JSONResponse:
+    """Serving metrics endpoint, with the ASGI inference queue."""
+    return JSONResponse({
+        'inference': get_inference_stats(),
+        'asgi_queue': inference.get_stats(),
+        'timestamp': time.time()
+    })
+
+
+async def api_info(request: Request) -> JSONResponse:
+    """API information endpoint."""
+    return JSONResponse(info_payload())
+
+
+async def compare_models(request: Request) -> JSONResponse:
+    """Compare sentiment analysis across multiple models"""
+    try:
+        data = await _get_json(request)
+
+        if not data or 'text' not in data:
+            return JSONResponse({
+                'error': 'Missing required field: text',
+                'status': 'error'
+            }, status_code=400)
+
+        text = data['text'].strip()
+        if not text or len(text) > config.MAX_TEXT_LENGTH:
+            return JSONResponse({
+                'error': f'Text must be between 1 and {config.MAX_TEXT_LENGTH} characters',
+                'status': 'error'
+            }, status_code=400)
+
+        mode = data.get('mode', None)
+        error = compare_mode_error(mode)
+        if error is not None:
+            return JSONResponse({
+                'error': error,
+                'status': 'error'
+            }, status_code=400)
+
+        result = await inference.run(predict_advanced, text, data.get('models', None), mode)
+
+        logger.info(f"Model comparison completed for text length {len(text)}")
+        return JSONResponse(comparison_payload(result))
+
+    except InferenceQueueFull:
+        return _busy_response()
+
+    except Exception as e:
+        logger.error(f"Error in model comparison: {e}")
+        return JSONResponse({
+            'error': 'Internal server error during model comparison',
+            'status': 'error'
+        }, status_code=500)
+
+
+async def batch_analyze(request: Request) -> JSONResponse:
+    """Analyze multiple texts in batch"""
+    try:
+        data = await _get_json(request)
+
+        error = batch_error(data)
+        if error is not None:
+            return JSONResponse({
+                'error': error,
+                'status': 'error'
+            }, status_code=400)
+
+        texts = data['texts']
+        start_time = time.time()
+        results = await inference.run(predict_batch, texts, data.get('model', None))
+        total_time = time.time() - start_time
+
+        logger.info(f"Batch analysis completed for {len(texts)} texts")
+        return JSONResponse(batch_payload(texts, results, total_time))
+
+    except InferenceQueueFull:
+        return _busy_response()
+
+    except Exception as e:
+        logger.error(f"Error in batch analysis: {e}")
+        return JSONResponse({
+            'error': 'Internal server error during batch analysis',
+            'status': 'error'
+        }, status_code=500)
+
+
+async def _aiter_ndjson_texts(chunks: AsyncIterator[bytes], max_line_bytes: int,
+                              max_content_length: int) -> AsyncIterator[Tuple[int, Optional[str], Any, Optional[str]]]:
+    """
+    Read (index, text, id, error) records from a streamed NDJSON body.
+
+    Same records as the Flask route's reader: blank lines are skipped, and an
+    oversized line yields one error while the rest of it is discarded unbuffered.
+    """
+    index = 0
+    received = 0
+    buffer = bytearray()
+    discarding = False
+
+    async for data in chunks:
+        received += len(data)
+        if max_content_length and received > max_content_length:
+            raise RequestBodyError(f"Request body exceeds {max_content_length} bytes")
+        buffer += data
+
+        while True:
+            newline = buffer.find(b'\n')
+            if newline < 0:
+                break
+            line = bytes(buffer[:newline]).strip()
+            del buffer[:newline + 1]
+            if discarding:
+                discarding = False
+            elif newline > max_line_bytes:
+                yield index, None, None, f'Line exceeds {max_line_bytes} bytes'
+                index += 1
+            elif line:
+                yield (index,) + parse_ndjson_line(line)
+                index += 1
+
+        if discarding:
+            buffer.clear()
+        elif len(buffer) > max_line_bytes:
+            yield index, None, None, f'Line exceeds {max_line_bytes} bytes'
+            index += 1
+            buffer.clear()
+            discarding = True
+
+    line = bytes(buffer).strip()
+    if line and not discarding:
+        yield (index,) + parse_ndjson_line(line)
+
+
+class BatchStreamEndpoint:
+    """
+    Analyze an unbounded NDJSON upload, streaming NDJSON results back
+
+    Lines are parsed as they arrive and inferred in chunks of ?chunk_size texts
+    (at most config.STREAM_CHUNK_SIZE) on the inference queue. A plain ASGI
+    endpoint rather than a StreamingResponse, which would compete with the
+    upload for ``receive`` messages while results are being sent.
+    """
+
+    async def __call__(self, scope, receive, send):
+        request = Request(scope, receive)
+        model_key = request.query_params.get('model')
+        analyzer = await asyncio.to_thread(get_advanced_analyzer)
+        if model_key is not None and model_key not in analyzer.model_configs:
+            response = JSONResponse({
+                'error': f'Unknown model: {model_key}',
+                'status': 'error'
+            }, status_code=400)
+            return await response(scope, receive, send)
+
+        try:
+            chunk_size = int(request.query_params.get('chunk_size', config.STREAM_CHUNK_SIZE))
+        except ValueError:
+            response = JSONResponse({
+                'error': 'chunk_size must be an integer',
+                'status': 'error'
+            }, status_code=400)
+            return await response(scope, receive, send)
+        chunk_size = max(1, min(chunk_size, config.STREAM_CHUNK_SIZE))
+
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', b'application/x-ndjson')]})
+
+        async def write(line: str):
+            await send({'type': 'http.response.body', 'body': line.encode('utf-8'), 'more_body': True})
+
+        totals = {'processed': 0, 'rejected': 0}
+
+        async def flush(chunk):
+            """Infer the valid texts of a chunk and write every record in input order"""
+            valid = [record for record in chunk if record[3] is None]
+            texts = [text for _, text, _, _ in valid]
+            results = iter(await inference.run(analyzer.batch_predict, texts, model_key) if valid else [])
+
+            for index, _, record_id, error in chunk:
+                await write(stream_line(index, record_id, next(results) if error is None else None, error))
+            totals['processed'] += len(valid)
+            totals['rejected'] += len(chunk) - len(valid)
+
+        start_time = time.time()
+        chunk = []
+        try:
+            async for record in _aiter_ndjson_texts(request.stream(), config.STREAM_MAX_LINE_BYTES,
+                                                    config.STREAM_MAX_CONTENT_LENGTH):
+                chunk.append(record)
+                if len(chunk) >= chunk_size:
+                    await flush(chunk)
+                    chunk = []
+
+            if chunk:
+                await flush(chunk)
+            status = 'success'
+        except Exception as e:
+            logger.error(f"Error in streaming batch analysis after {totals['processed']} texts: {e}")
+            status = 'error'
+
+        logger.info(f"Streaming batch analysis completed for {totals['processed']} texts "
+                    f"({totals['rejected']} rejected)")
+        await write(stream_summary(status, totals, time.time() - start_time))
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+
+async def get_models(request: Request) -> JSONResponse:
+    """Get information about available models"""
+    try:
+        return JSONResponse(await asyncio.to_thread(models_payload))
+    except Exception as e:
+        logger.error(f"Error getting models info: {e}")
+        return JSONResponse({
+            'error': 'Internal server error getting models information',
+            'status': 'error'
+        }, status_code=500)
+
+
+async def get_analytics(request: Request) -> JSONResponse:
+    """Get analytics and performance statistics"""
+    try:
+        return JSONResponse(await asyncio.to_thread(analytics_payload))
+    except Exception as e:
+        logger.error(f"Error getting analytics: {e}")
+        return JSONResponse({
+            'error': 'Internal server error getting analytics',
+            'status': 'error'
+        }, status_code=500)
+
+
+async def test_models(request: Request) -> JSONResponse:
+    """Test all models with a sample text"""
+    try:
+        data = await _get_json(request)
+        text = data.get('text', 'This is a test message for model comparison.')
+
+        if len(text) > config.MAX_TEXT_LENGTH:
+            return JSONResponse({
+                'error': f'Text must not exceed {config.MAX_TEXT_LENGTH} characters',
+                'status': 'error'
+            }, status_code=400)
+
+        result = await inference.run(predict_advanced, text)
+        return JSONResponse(test_models_payload(text, result))
+
+    except InferenceQueueFull:
+        return _busy_response()
+
+    except Exception as e:
+        logger.error(f"Error testing models: {e}")
+        return JSONResponse({
+            'error': 'Internal server error testing models',
+            'status': 'error'
+        }, status_code=500)
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    # Model loading and health probes are started by app.app on import
+    yield
+    inference.shutdown()
+
+
+routes = [
+    Route('/api/analyze', api_analyze, methods=['POST']),
+    Route('/api/health', health_check, methods=['GET']),
+    Route('/api/live', liveness, methods=['GET']),
+    Route('/api/ready', readiness, methods=['GET']),
+    Route('/api/metrics', api_metrics, methods=['GET']),
+    Route('/api/info', api_info, methods=['GET']),
+]
+
+if ADVANCED_FEATURES_AVAILABLE:
+    routes += [
+        Route('/api/v2/compare', compare_models, methods=['POST']),
+        Route('/api/v2/batch', batch_analyze, methods=['POST']),
+        Route('/api/v2/batch/stream', BatchStreamEndpoint(), methods=['POST']),
+        Route('/api/v2/models', get_models, methods=['GET']),
+        Route('/api/v2/analytics', get_analytics, methods=['GET']),
+        Route('/api/v2/test-models', test_models, methods=['POST']),
+    ]
+
+# The web interface (templates, form posts) stays on Flask, run in a2wsgi's thread pool
+if WSGIMiddleware is not None:
+    routes.append(Mount('/', app=WSGIMiddleware(flask_app)))
+else:
+    logger.warning("a2wsgi not installed; the ASGI app serves the JSON API only")
+
+app = Starlette(routes=routes, lifespan=lifespan)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    host = os.getenv('HOST', config.HOST)
+    port = int(os.getenv('PORT', config.PORT))
+    logger.info(f"Starting ASGI server on {host}:{port}")
+    uvicorn.run(app, host=host, port=port)
@@ -0,0 +1,273 @@
+"""
+Inference backends for transformer sentiment models.
+
+Both the single-model analyzer and the advanced multi-model manager load their
+pipelines through a backend, which decides how the model executes: eager fp32,
+dynamic INT8, TorchScript-traced, torch.compile or bfloat16. Each backend keeps
+its own load time, weight memory and latency statistics so modes can be compared
+per node. A backend that fails to prepare or warm up falls back to eager fp32.
+"""
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+import torch
+from transformers.modeling_outputs import SequenceClassifierOutput
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+from config.logging_config import get_logger
+from .quantization import model_size_bytes, quantize_dynamic_int8, select_quantized_engine
+from .weights import load_mapped_model
+
+# Initialize logger
+logger = get_logger('backends')
+
+WARMUP_TEXT = "This is a test."
+
+
+class InferenceBackend:
+    """Eager fp32 execution; base class for the optimized backends."""
+
+    name = 'eager'
+    precision = 'fp32'
+    reduces_precision = False  # True when outputs may drift from fp32 (guarded by callers)
+    warmup = False  # Run one inference after preparing to surface backend failures early
+
+    def __init__(self):
+        self.active = False
+        self.fallback_reason = None
+        self.base_model = None
+        self.mapped_weights = False  # Parameters are views of mmap'd safetensors
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._stats = {
+            'load_time': 0.0,
+            'weights_bytes': 0,
+            'calls': 0,
+            'texts': 0,
+            'total_latency': 0.0,
+        }
+
+    def load(self, model_name: str, pipeline_factory: Callable[..., Any], **pipeline_kwargs) -> Any:
+        """
+        Build a sentiment pipeline and switch it to this backend.
+
+        Args:
+            model_name: Hub id or local directory of the model
+            pipeline_factory: ``transformers.pipeline`` (injectable for tests)
+            **pipeline_kwargs: Extra arguments for the pipeline factory
+
+        Returns:
+            The pipeline, executing through this backend (or eager on fallback)
+        """
+        start_time = time.perf_counter()
+        model = model_name
+        if config.MODEL_MMAP_WEIGHTS:
+            mapped = load_mapped_model(model_name)
+            if mapped is not None:
+                model, pipeline_kwargs['tokenizer'] = mapped
+                self.mapped_weights = True
+        pipe = pipeline_factory("sentiment-analysis", model=model, **pipeline_kwargs)
+        self.apply(pipe)
+        self._stats['load_time'] = time.perf_counter() - start_time
+        return pipe
+
+    def apply(self, pipe: Any):
+        """Swap the pipeline's model for this backend's variant, in place."""
+        self.base_model = getattr(pipe, 'model', None)
+        try:
+            pipe.model = self.optimize(self.base_model, pipe)
+            if self.warmup:
+                pipe(WARMUP_TEXT)  # Surface tracing/compilation failures now, not on a request
+            self.active = True
+        except Exception as e:
+            self.revert(pipe)
+            self.fallback_reason = str(e)
+            logger.warning(f"Backend '{self.name}' unavailable, falling back to eager fp32: {e}")
+
+        self._stats['weights_bytes'] = self._weights_bytes(pipe)
+
+    def optimize(self, model: torch.nn.Module, pipe: Any) -> torch.nn.Module:
+        """Return the model to execute; eager runs the loaded model as-is."""
+        return model
+
+    def revert(self, pipe: Any):
+        """Restore the original fp32 model (e.g. when an accuracy guard fails)."""
+        if self.base_model is not None:
+            self.base_model.__dict__.pop('forward', None)  # Undo forward patching
+            pipe.model = self.base_model
+        self.active = False
+        self._stats['weights_bytes'] = self._weights_bytes(pipe)
+
+    def mirror(self, stats: Dict[str, Any]):
+        """Take the load outcome of the same backend loaded in another process."""
+        self.active = stats['active']
+        self.fallback_reason = stats['fallback_reason']
+        self.mapped_weights = stats.get('mapped_weights', False)
+        self._stats['load_time'] = stats['load_time']
+        self._stats['weights_bytes'] = stats['weights_bytes']
+
+    def release_base(self):
+        """Drop the reference to the fp32 model once it is no longer needed."""
+        self.base_model = None
+
+    @staticmethod
+    def _weights_bytes(pipe: Any) -> int:
+        try:
+            return model_size_bytes(pipe.model)
+        except Exception:
+            return 0
+
+    def record(self, latency: float, texts: int = 1):
+        """Record the latency of one pipeline call covering ``texts`` inputs."""
+        with self._lock:
+            self._stats['calls'] += 1
+            self._stats['texts'] += texts
+            self._stats['total_latency'] += latency
+            self._latencies.append(latency)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get load time, weight memory and latency statistics."""
+        with self._lock:
+            stats = dict(self._stats)
+            latencies = sorted(self._latencies)
+
+        def percentile(q):
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else 0.0
+
+        return {
+            'backend': self.name,
+            'active': self.active,
+            'fallback_reason': self.fallback_reason,
+            'load_time': stats['load_time'],
+            'weights_bytes': stats['weights_bytes'],
+            'mapped_weights': self.mapped_weights,
+            'calls': stats['calls'],
+            'texts': stats['texts'],
+            'average_latency': stats['total_latency'] / stats['calls'] if stats['calls'] else 0.0,
+            'average_latency_per_text': stats['total_latency'] / stats['texts'] if stats['texts'] else 0.0,
+            'p50_latency': percentile(0.50),
+            'p95_latency': percentile(0.95),
+        }
+
+
+class DynamicInt8Backend(InferenceBackend):
+    """Dynamic INT8 quantization of all Linear layers."""
+
+    name = 'dynamic_int8'
+    precision = 'int8'
+    reduces_precision = True
+    warmup = True
+
+    def optimize(self, model, pipe):
+        if select_quantized_engine() is None:
+            raise RuntimeError("no quantized engine available")
+        return quantize_dynamic_int8(model)
+
+
+class BFloat16Backend(InferenceBackend):
+    """bfloat16 weights and activations (fast on CPUs with AVX512-BF16/AMX)."""
+
+    name = 'bf16'
+    precision = 'bf16'
+    reduces_precision = True
+    warmup = True
+
+    def optimize(self, model, pipe):
+        import copy
+        return copy.deepcopy(model).to(torch.bfloat16)
+
+
+class _LogitsModule(torch.nn.Module):
+    """Positional-argument wrapper returning only logits, suitable for tracing."""
+
+    def __init__(self, model: torch.nn.Module, input_names):
+        super().__init__()
+        self.model = model
+        self.input_names = list(input_names)
+
+    def forward(self, *tensors):
+        return self.model(**dict(zip(self.input_names, tensors))).logits
+
+
+class TorchScriptBackend(InferenceBackend):
+    """TorchScript-traced and frozen forward pass."""
+
+    name = 'torchscript'
+    warmup = True
+
+    def optimize(self, model, pipe):
+        example = pipe.tokenizer(WARMUP_TEXT, return_tensors='pt')
+        input_names = list(example.keys())
+
+        with torch.no_grad():
+            traced = torch.jit.trace(_LogitsModule(model, input_names),
+                                     tuple(example[name] for name in input_names),
+                                     check_trace=False)
+            traced = torch.jit.freeze(traced.eval())
+
+        eager_forward = model.forward
+
+        def traced_forward(*args, **kwargs):
+            # Calls the trace does not cover (extra outputs, missing inputs) stay eager
+            if args or set(kwargs) - set(input_names) or any(kwargs.get(name) is None for name in input_names):
+                return eager_forward(*args, **kwargs)
+            return SequenceClassifierOutput(logits=traced(*(kwargs[name] for name in input_names)))
+
+        model.forward = traced_forward
+        return model
+
+
+class CompileBackend(InferenceBackend):
+    """torch.compile with dynamic shapes (compiles on the warm-up call)."""
+
+    name = 'compile'
+    warmup = True
+
+    def optimize(self, model, pipe):
+        model.forward = torch.compile(model.forward, dynamic=True)
+        return model
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (InferenceBackend, DynamicInt8Backend, TorchScriptBackend, CompileBackend, BFloat16Backend)
+}
+
+
+def create_backend(name: Optional[str]) -> InferenceBackend:
+    """
+    Instantiate a backend by name.
+
+    Args:
+        name: One of BACKENDS (unknown or empty names fall back to eager)
+
+    Returns:
+        A fresh backend instance
+    """
+    backend_class = BACKENDS.get((name or InferenceBackend.name).lower())
+    if backend_class is None:
+        logger.warning(f"Unknown inference backend '{name}', using eager fp32")
+        backend_class = InferenceBackend
+    return backend_class()
+
+
+def backend_for(model_key: str) -> str:
+    """
+    Backend name configured for a model key.
+
+    config.MODEL_BACKENDS maps keys to backends (``"default=dynamic_int8,finbert=bf16"``,
+    where ``default`` is the single-model analyzer);
+    keys without an entry use config.MODEL_BACKEND.
+    """
+    for entry in (config.MODEL_BACKENDS or '').split(','):
+        key, _, backend = entry.partition('=')
+        if key.strip() == model_key and backend.strip():
+            return backend.strip()
+    return config.MODEL_BACKEND
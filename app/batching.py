@@ -0,0 +1,281 @@
+"""
+Request coalescing for sentiment inference.
+
+Concurrent callers submit single texts; a background worker gathers them into
+batches bounded by a maximum batch size and a maximum wait window, runs one
+batched forward pass and hands every caller back its own result.
+"""
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+from config.logging_config import get_logger
+
+# Initialize logger
+logger = get_logger('batching')
+
+
+def _bucket_label(value: int) -> str:
+    """Return the power-of-two histogram bucket label for a non-negative count."""
+    if value <= 0:
+        return "0"
+    low = 1 << (value.bit_length() - 1)
+    high = (low << 1) - 1
+    return str(low) if low == high else f"{low}-{high}"
+
+
+def length_buckets(lengths: Sequence[int], max_batch_size: int,
+                   max_tokens: Optional[int] = None) -> List[List[int]]:
+    """
+    Group item indices into batches of similar length to minimise padding.
+
+    Items are sorted by length and cut into consecutive buckets holding at most
+    ``max_batch_size`` items and, when given, at most ``max_tokens`` padded tokens
+    (longest item in the bucket times the bucket size).
+
+    Args:
+        lengths: Token (or character) length of every item
+        max_batch_size: Upper bound on items per bucket
+        max_tokens: Optional upper bound on padded tokens per bucket
+
+    Returns:
+        List of buckets, each a list of indices into ``lengths``
+    """
+    max_batch_size = max(1, max_batch_size)
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+
+    buckets = []
+    current = []
+    for index in order:
+        # Sorted ascending, so this item is the longest in the bucket so far
+        padded = lengths[index] * (len(current) + 1)
+        if current and (len(current) >= max_batch_size or
+                        (max_tokens and padded > max_tokens)):
+            buckets.append(current)
+            current = []
+        current.append(index)
+    if current:
+        buckets.append(current)
+
+    return buckets
+
+
+class _PendingRequest:
+    """A single text waiting for its slot in a batch."""
+
+    __slots__ = ('text', 'enqueued_at', 'done', 'result', 'error')
+
+    def __init__(self, text: str):
+        self.text = text
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-text predictions into batched forward passes.
+
+    A batch is dispatched as soon as it holds ``max_batch_size`` texts or the
+    oldest queued text has waited ``max_wait_ms`` milliseconds, whichever comes
+    first. Raising the wait window trades p50 latency for larger batches.
+    """
+
+    def __init__(self, predict_fn: Callable[[List[str]], Sequence[Tuple[str, float]]],
+                 max_batch_size: Optional[int] = None,
+                 max_wait_ms: Optional[float] = None):
+        """
+        Args:
+            predict_fn: Callable mapping a list of texts to a list of
+                (sentiment_label, confidence_score) tuples in the same order
+            max_batch_size: Upper bound on texts per forward pass
+                (defaults to config.MODEL_BATCH_SIZE)
+            max_wait_ms: Longest time the oldest request may wait for the
+                batch to fill (defaults to config.MODEL_BATCH_MAX_WAIT_MS)
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, max_batch_size or config.MODEL_BATCH_SIZE)
+        wait_ms = config.MODEL_BATCH_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms
+        self.max_wait = max(0.0, wait_ms) / 1000.0
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._worker = None
+        self._closed = False
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'batches': 0,
+            'errors': 0,
+            'max_queue_depth': 0,
+            'total_queue_wait': 0.0,
+            'total_batch_time': 0.0,
+        }
+        self._batch_size_histogram = {}
+        self._queue_depth_histogram = {}
+
+    def submit(self, text: str, timeout: Optional[float] = None) -> Tuple[str, float]:
+        """
+        Queue a text and block until its batch has been processed.
+
+        Args:
+            text: Input text to analyze
+            timeout: Seconds to wait for the result (defaults to config.REQUEST_TIMEOUT)
+
+        Returns:
+            Tuple of (sentiment_label, confidence_score)
+
+        Raises:
+            TimeoutError: If no result arrived within the timeout
+            Exception: Whatever the batch prediction function raised
+        """
+        pending = _PendingRequest(text)
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Micro-batcher has been shut down")
+            self._ensure_worker()
+            self._queue.append(pending)
+            depth = len(self._queue)
+            self._cond.notify()
+
+        with self._stats_lock:
+            self._stats['requests'] += 1
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], depth)
+            label = _bucket_label(depth)
+            self._queue_depth_histogram[label] = self._queue_depth_histogram.get(label, 0) + 1
+
+        wait_for = config.REQUEST_TIMEOUT if timeout is None else timeout
+        if not pending.done.wait(wait_for):
+            with self._cond:
+                try:
+                    self._queue.remove(pending)
+                except ValueError:
+                    pass  # Already picked up by the worker
+            raise TimeoutError(f"No batch result within {wait_for}s")
+
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _ensure_worker(self):
+        """Start the dispatch thread on first use. Caller must hold the condition."""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        """Dispatch loop: collect a batch, run it, repeat."""
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+
+                # Hold the batch open until it is full or the oldest request times out
+                deadline = self._queue[0].enqueued_at + self.max_wait
+                while len(self._queue) < self.max_batch_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                size = min(len(self._queue), self.max_batch_size)
+                batch = [self._queue.popleft() for _ in range(size)]
+
+            self._process(batch)
+
+    def _process(self, batch: List[_PendingRequest]):
+        """Run one forward pass for a batch and resolve every waiting caller."""
+        start_time = time.monotonic()
+        queue_wait = sum(start_time - p.enqueued_at for p in batch)
+
+        failed = False
+        try:
+            results = list(self.predict_fn([p.text for p in batch]))
+            if len(results) != len(batch):
+                raise RuntimeError(f"Batch prediction returned {len(results)} results "
+                                   f"for {len(batch)} texts")
+            for pending, result in zip(batch, results):
+                pending.result = result
+        except Exception as e:
+            failed = True
+            if len(batch) == 1:
+                logger.error(f"Prediction failed: {e}")
+                batch[0].error = e
+            else:
+                # Retry one text at a time so only the bad request sees the error
+                logger.warning(f"Batched prediction of {len(batch)} texts failed, retrying individually: {e}")
+                for pending in batch:
+                    try:
+                        pending.result = list(self.predict_fn([pending.text]))[0]
+                    except Exception as item_error:
+                        logger.error(f"Prediction failed: {item_error}")
+                        pending.error = item_error
+
+        batch_time = time.monotonic() - start_time
+        logger.debug(f"Processed batch of {len(batch)} texts in {batch_time:.3f}s")
+
+        # Record stats before releasing callers so they observe their own batch
+        with self._stats_lock:
+            self._stats['batches'] += 1
+            self._stats['errors'] += int(failed)
+            self._stats['total_queue_wait'] += queue_wait
+            self._stats['total_batch_time'] += batch_time
+            key = str(len(batch))
+            self._batch_size_histogram[key] = self._batch_size_histogram.get(key, 0) + 1
+
+        for pending in batch:
+            pending.done.set()
+
+    def queue_depth(self) -> int:
+        """Number of texts currently waiting for a batch."""
+        with self._cond:
+            return len(self._queue)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, batch-size histogram and timing statistics."""
+        depth = self.queue_depth()
+        with self._stats_lock:
+            stats = dict(self._stats)
+            batch_sizes = dict(self._batch_size_histogram)
+            queue_depths = dict(self._queue_depth_histogram)
+
+        requests = stats['requests']
+        batches = stats['batches']
+        return {
+            'enabled': True,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'queue_depth': depth,
+            'max_queue_depth': stats['max_queue_depth'],
+            'total_requests': requests,
+            'total_batches': batches,
+            'batch_errors': stats['errors'],
+            'average_batch_size': (sum(int(k) * v for k, v in batch_sizes.items()) / batches
+                                   if batches else 0),
+            'average_queue_wait': stats['total_queue_wait'] / requests if requests else 0,
+            'average_batch_time': stats['total_batch_time'] / batches if batches else 0,
+            'batch_size_histogram': dict(sorted(batch_sizes.items(), key=lambda kv: int(kv[0]))),
+            'queue_depth_histogram': dict(sorted(queue_depths.items(),
+                                                 key=lambda kv: int(kv[0].split('-')[0]))),
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting texts; queued texts are still processed before the worker exits."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            worker = self._worker
+        if wait and worker is not None:
+            worker.join()
@@ -0,0 +1,494 @@
+"""
+Multi-machine bulk scoring through lease files in a shared directory.
+
+The coordinator splits the input into shards and writes a job manifest that
+pins the model fingerprint. Workers on any number of machines then claim
+shards by creating lease files, renew them while scoring, and mark a shard
+done once its output is written. A lease that is not renewed expires, and
+the next worker to look takes the shard over. Finally the coordinator merges
+the per-shard outputs and statistics.
+
+Leases are numbered per shard and a claim atomically creates the next
+number, so two workers racing for an expired lease cannot both win. Expiry
+times come from the workers' clocks, which are assumed roughly in sync.
+
+Usage:
+    python -m app.bulk_coordinator plan Pre_processed/train /shared/job --shard-rows 50000
+    python -m app.bulk_coordinator work /shared/job        # on every machine
+    python -m app.bulk_coordinator merge /shared/job
+    python -m app.bulk_coordinator local Pre_processed/test /tmp/job --workers 4
+"""
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+from config.logging_config import get_logger
+from . import bulk_score
+from .bulk_score import DEFAULT_MODEL, MANIFEST_FILE, OUTPUT_FORMATS, STATS_FILE
+
+# Initialize logger
+logger = get_logger('bulk_coordinator')
+
+DEFAULT_LEASE_SECONDS = 300.0
+DEFAULT_POLL_INTERVAL = 5.0
+LEASE_DIR = 'leases'
+DONE_DIR = 'done'
+PARTS_DIR = 'parts'
+MERGED_FILE = 'scores'
+
+
+@dataclass
+class Lease:
+    """A worker's claim on one shard."""
+    shard: int
+    generation: int
+    path: str
+    worker: str
+    expires_at: float
+
+
+class LeaseDirectory:
+    """Shard leases and completion markers in a directory shared by all workers."""
+
+    def __init__(self, job_dir: str, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        """
+        Args:
+            job_dir: Shared job directory
+            lease_seconds: How long a claim stays valid without a renewal
+        """
+        self.lease_dir = os.path.join(job_dir, LEASE_DIR)
+        self.done_dir = os.path.join(job_dir, DONE_DIR)
+        self.lease_seconds = lease_seconds
+        os.makedirs(self.lease_dir, exist_ok=True)
+        os.makedirs(self.done_dir, exist_ok=True)
+
+    def _lease_path(self, shard: int, generation: int) -> str:
+        return os.path.join(self.lease_dir, f"shard-{shard:05d}.{generation:05d}.lease")
+
+    def _done_path(self, shard: int) -> str:
+        return os.path.join(self.done_dir, f"shard-{shard:05d}.json")
+
+    def _generations(self, shard: int) -> List[int]:
+        pattern = re.compile(rf"shard-{shard:05d}\.(\d+)\.lease$")
+        return sorted(int(match.group(1)) for match in map(pattern.search, os.listdir(self.lease_dir)) if match)
+
+    def _read_expiry(self, path: str) -> Optional[float]:
+        """Expiry recorded in a lease file, or None if the file is gone."""
+        try:
+            with open(path, 'r', encoding='utf-8') as handle:
+                return float(json.load(handle)['expires_at'])
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError, TypeError):
+            # Created but not yet written (or torn); judge by its age instead
+            try:
+                return os.stat(path).st_mtime + self.lease_seconds
+            except FileNotFoundError:
+                return None
+
+    def claim(self, shard: int, worker: str) -> Optional[Lease]:
+        """
+        Try to take a shard that is neither done nor validly leased.
+
+        Returns:
+            The new lease, or None when another worker holds the shard
+        """
+        if self.is_done(shard):
+            return None
+
+        generations = self._generations(shard)
+        if generations:
+            expires_at = self._read_expiry(self._lease_path(shard, generations[-1]))
+            if expires_at is not None and expires_at > time.time():
+                return None
+            generation = generations[-1] + 1
+        else:
+            generation = 0
+
+        path = self._lease_path(shard, generation)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return None  # Another worker claimed it first
+
+        lease = Lease(shard, generation, path, worker, time.time() + self.lease_seconds)
+        with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+            json.dump(self._lease_record(lease), handle)
+
+        for old in generations:
+            self._remove(self._lease_path(shard, old))
+        if generations:
+            logger.info(f"Worker {worker} took over expired lease on shard {shard}")
+        return lease
+
+    def _lease_record(self, lease: Lease) -> Dict[str, Any]:
+        return {'worker': lease.worker, 'host': socket.gethostname(), 'pid': os.getpid(),
+                'expires_at': lease.expires_at}
+
+    def renew(self, lease: Lease) -> bool:
+        """Extend a lease; returns False if it has been taken over."""
+        if not self.holds(lease):
+            return False
+        lease.expires_at = time.time() + self.lease_seconds
+        tmp_path = f"{lease.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            json.dump(self._lease_record(lease), handle)
+        os.replace(tmp_path, lease.path)
+        return True
+
+    def holds(self, lease: Lease) -> bool:
+        """Whether a lease is still the newest one on its shard."""
+        generations = self._generations(lease.shard)
+        return bool(generations) and generations[-1] == lease.generation
+
+    def release(self, lease: Lease):
+        """Give a shard back by removing this worker's lease file."""
+        self._remove(lease.path)
+
+    def is_done(self, shard: int) -> bool:
+        return os.path.exists(self._done_path(shard))
+
+    def mark_done(self, shard: int, stats: Dict[str, Any]):
+        """Record a finished shard with its statistics."""
+        path = self._done_path(shard)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            json.dump(stats, handle)
+        os.replace(tmp_path, path)
+
+    def done_records(self) -> Dict[int, Dict[str, Any]]:
+        """Statistics of every finished shard."""
+        records = {}
+        for path in glob.glob(os.path.join(self.done_dir, 'shard-*.json')):
+            with open(path, 'r', encoding='utf-8') as handle:
+                record = json.load(handle)
+            records[record['partition']] = record
+        return records
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def load_manifest(job_dir: str) -> Dict[str, Any]:
+    """Read a planned job's manifest."""
+    path = os.path.join(job_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        raise ValueError(f"{job_dir} has no job manifest; run 'plan' first")
+    with open(path, 'r', encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def plan_job(input_path: str, job_dir: str, model_key: str = DEFAULT_MODEL, text_column: str = 'text',
+             keep_columns: Sequence[str] = (), shard_rows: int = 50000, output_format: str = 'parquet',
+             overwrite: bool = False) -> Dict[str, Any]:
+    """
+    Split a dataset into shards and pin the model every worker must run.
+
+    Loads the model once through the same path as the workers to record its
+    fingerprint. Planning again with identical settings keeps finished shards.
+
+    Returns:
+        The job manifest
+    """
+    manifest = bulk_score.build_manifest(input_path, shard_rows, text_column, keep_columns,
+                                         model_key, output_format)
+    manifest['fingerprint'], _ = bulk_score.load_scorer(model_key)
+    manifest['shards'] = len(bulk_score.plan_partitions(manifest['num_rows'], shard_rows))
+
+    bulk_score.prepare_output(job_dir, manifest, overwrite)
+    os.makedirs(os.path.join(job_dir, PARTS_DIR), exist_ok=True)
+    LeaseDirectory(job_dir)
+
+    logger.info(f"Planned {manifest['shards']} shards of {shard_rows} rows from {input_path} "
+                f"(model fingerprint {manifest['fingerprint']})")
+    return manifest
+
+
+def _local_dedup_path(manifest: Dict[str, Any]) -> str:
+    """Per-machine dedup store (SQLite must not live on a network filesystem)."""
+    job_id = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"bulk-dedup-{job_id}.sqlite")
+
+
+def run_worker(job_dir: str, worker_id: Optional[str] = None, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+               poll_interval: float = DEFAULT_POLL_INTERVAL, batch_size: Optional[int] = None,
+               threads: int = 0, dedup_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Claim and score shards until every shard of the job is done.
+
+    The model is loaded on the first successful claim and must match the
+    fingerprint pinned by the plan. A shard that fails here is released for
+    other workers and not retried by this one.
+
+    Args:
+        job_dir: Shared job directory created by plan_job
+        worker_id: Name recorded in leases and stats (defaults to host-pid)
+        lease_seconds: Lease validity; renewed every third of it while scoring
+        poll_interval: Seconds to wait when every remaining shard is leased
+        batch_size: Texts per forward pass
+        threads: Torch intra-op threads (0 keeps the default)
+        dedup_path: Local SQLite file for duplicate texts (defaults to a temp file per job)
+
+    Returns:
+        Shards and rows scored by this worker, plus any shards it failed
+    """
+    manifest = load_manifest(job_dir)
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    leases = LeaseDirectory(job_dir, lease_seconds)
+    batch_size = batch_size or max(config.BATCH_BUCKET_SIZE, config.MODEL_BATCH_SIZE)
+    shards = bulk_score.plan_partitions(manifest['num_rows'], manifest['partition_rows'])
+    parts_dir = os.path.join(job_dir, PARTS_DIR)
+
+    summary = {'worker': worker_id, 'shards': [], 'rows': 0, 'failed': []}
+    loaded = False
+
+    while True:
+        pending = [shard for shard in shards
+                   if shard[0] not in summary['failed'] and not leases.is_done(shard[0])]
+        if not pending:
+            break
+
+        lease = None
+        for shard, start, stop in pending:
+            lease = leases.claim(shard, worker_id)
+            if lease is not None:
+                break
+        if lease is None:
+            time.sleep(poll_interval)
+            continue
+
+        stop_renewing = threading.Event()
+        renewer = threading.Thread(target=_keep_renewed, args=(leases, lease, stop_renewing),
+                                   name=f'lease-{shard}', daemon=True)
+        renewer.start()
+        try:
+            if not loaded:
+                columns = list(dict.fromkeys([manifest['text_column'], *manifest['keep_columns']]))
+                fingerprint = bulk_score.init_worker(manifest['input'], columns, manifest['model'],
+                                                     manifest['model_name'],
+                                                     dedup_path or _local_dedup_path(manifest), threads)
+                if fingerprint != manifest['fingerprint']:
+                    raise ValueError(f"Worker model fingerprint {fingerprint} does not match "
+                                     f"the job's {manifest['fingerprint']}")
+                loaded = True
+
+            task = bulk_score.make_task(manifest, shard, start, stop, parts_dir, batch_size)
+            stats = bulk_score.score_partition(task)
+            stats['worker'] = worker_id
+
+            if leases.is_done(shard) and not leases.holds(lease):
+                logger.warning(f"Worker {worker_id} lost the lease on shard {shard}; "
+                               f"another worker finished it")
+                continue
+            leases.mark_done(shard, stats)
+            summary['shards'].append(shard)
+            summary['rows'] += stats['rows']
+            logger.info(f"Worker {worker_id} finished shard {shard} ({stats['rows']} rows)")
+        except Exception as e:
+            logger.error(f"Worker {worker_id} failed on shard {shard}: {e}")
+            if not loaded:
+                raise
+            summary['failed'].append(shard)
+        finally:
+            stop_renewing.set()
+            renewer.join()
+            leases.release(lease)
+
+    if loaded:
+        bulk_score._worker.clear()
+    return summary
+
+
+def _keep_renewed(leases: LeaseDirectory, lease: Lease, stop: threading.Event):
+    """Renew a lease every third of its lifetime until stopped or taken over."""
+    while not stop.wait(leases.lease_seconds / 3):
+        if not leases.renew(lease):
+            logger.warning(f"Lease on shard {lease.shard} was taken over by another worker")
+            return
+
+
+def merge_job(job_dir: str, output_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Concatenate per-shard outputs in row order and combine their statistics.
+
+    Args:
+        job_dir: Shared job directory
+        output_path: Merged file (defaults to ``scores.parquet``/``scores.arrow`` in the job directory)
+
+    Returns:
+        Job statistics with a per-worker breakdown (also written to ``_stats.json``)
+    """
+    manifest = load_manifest(job_dir)
+    records = LeaseDirectory(job_dir).done_records()
+    if len(records) < manifest['shards']:
+        raise ValueError(f"{manifest['shards'] - len(records)} of {manifest['shards']} shards are not done yet")
+
+    output_format = manifest['format']
+    output_path = output_path or os.path.join(job_dir, MERGED_FILE + OUTPUT_FORMATS[output_format])
+    parts_dir = os.path.join(job_dir, PARTS_DIR)
+    tmp_path = f"{output_path}.tmp-{os.getpid()}"
+
+    writer = None
+    sink = None
+    try:
+        for shard in range(manifest['shards']):
+            table = bulk_score.open_table(bulk_score.partition_path(parts_dir, shard, output_format))
+            if writer is None:
+                if output_format == 'parquet':
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                else:
+                    sink = pa.OSFile(tmp_path, 'wb')
+                    writer = pa.ipc.new_file(sink, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+        if sink is not None:
+            sink.close()
+    if writer is not None:
+        os.replace(tmp_path, output_path)
+
+    summary = bulk_score.summarize(records.values(), manifest['num_rows'], manifest['shards'])
+    summary['output'] = output_path if writer is not None else None
+    summary['workers'] = {}
+    for record in records.values():
+        worker = summary['workers'].setdefault(record.get('worker', 'unknown'), {'shards': 0, 'rows': 0})
+        worker['shards'] += 1
+        worker['rows'] += record['rows']
+    if summary['fingerprints'] not in ([], [manifest['fingerprint']]):
+        logger.warning(f"Shards were scored by models other than the planned {manifest['fingerprint']}")
+
+    with open(os.path.join(job_dir, STATS_FILE), 'w', encoding='utf-8') as handle:
+        json.dump(summary, handle, indent=2)
+
+    logger.info(f"Merged {manifest['shards']} shards ({summary['rows']} rows) into {output_path}")
+    return summary
+
+
+def run_local(input_path: str, job_dir: str, workers: int = 2, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+              poll_interval: float = 0.5, batch_size: Optional[int] = None, **plan_kwargs) -> Dict[str, Any]:
+    """
+    Plan, score with several local worker processes and merge, all on one machine.
+
+    Returns:
+        Merged job statistics
+    """
+    manifest = plan_job(input_path, job_dir, **plan_kwargs)
+
+    from .executors import plan_thread_budget
+
+    threads = plan_thread_budget(workers, workers_per_model=1)
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=run_worker, name=f'bulk-worker-{i}', args=(job_dir,),
+                        kwargs={'worker_id': f'local-{i}', 'lease_seconds': lease_seconds,
+                                'poll_interval': poll_interval, 'batch_size': batch_size,
+                                'threads': threads, 'dedup_path': _local_dedup_path(manifest)})
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    failed = [process.name for process in processes if process.exitcode != 0]
+    if failed:
+        logger.warning(f"Local workers exited with errors: {', '.join(failed)}")
+    return merge_job(job_dir)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command-line arguments for the coordinator and its workers."""
+    parser = argparse.ArgumentParser(prog='python -m app.bulk_coordinator',
+                                     description="Score a dataset with workers that share a job directory.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_plan_arguments(command):
+        command.add_argument('input', help="Arrow/Parquet file or directory (e.g. Pre_processed/train)")
+        command.add_argument('job_dir', help="Shared job directory")
+        command.add_argument('--model', default=DEFAULT_MODEL,
+                             help="'default' for the configured model, or an advanced model key")
+        command.add_argument('--text-column', default='text')
+        command.add_argument('--keep-columns', nargs='*', default=[])
+        command.add_argument('--shard-rows', type=int, default=50000)
+        command.add_argument('--format', choices=sorted(OUTPUT_FORMATS), default='parquet')
+        command.add_argument('--overwrite', action='store_true', help="Discard a previous job in job_dir")
+
+    add_plan_arguments(commands.add_parser('plan', help="Split the input into shards"))
+
+    work = commands.add_parser('work', help="Claim and score shards until the job is done")
+    work.add_argument('job_dir')
+    work.add_argument('--worker-id', default=None)
+    work.add_argument('--lease-seconds', type=float, default=DEFAULT_LEASE_SECONDS)
+    work.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL)
+    work.add_argument('--batch-size', type=int, default=None)
+    work.add_argument('--threads', type=int, default=0)
+
+    merge = commands.add_parser('merge', help="Merge shard outputs and statistics")
+    merge.add_argument('job_dir')
+    merge.add_argument('--output', default=None)
+
+    local = commands.add_parser('local', help="Plan, score with local workers and merge")
+    add_plan_arguments(local)
+    local.add_argument('--workers', type=int, default=2)
+    local.add_argument('--lease-seconds', type=float, default=DEFAULT_LEASE_SECONDS)
+    local.add_argument('--batch-size', type=int, default=None)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Entry point for ``python -m app.bulk_coordinator``."""
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == 'work':
+            result = run_worker(args.job_dir, worker_id=args.worker_id, lease_seconds=args.lease_seconds,
+                                poll_interval=args.poll_interval, batch_size=args.batch_size,
+                                threads=args.threads)
+            ok = not result['failed']
+        elif args.command == 'merge':
+            result = merge_job(args.job_dir, args.output)
+            ok = result['complete']
+        else:
+            plan_kwargs = {'model_key': args.model, 'text_column': args.text_column,
+                           'keep_columns': args.keep_columns, 'shard_rows': args.shard_rows,
+                           'output_format': args.format, 'overwrite': args.overwrite}
+            if args.command == 'plan':
+                result = plan_job(args.input, args.job_dir, **plan_kwargs)
+                ok = True
+            else:
+                result = run_local(args.input, args.job_dir, workers=args.workers,
+                                   lease_seconds=args.lease_seconds, batch_size=args.batch_size,
+                                   **plan_kwargs)
+                ok = result['complete']
+    except (ValueError, OSError, pa.ArrowException) as e:
+        logger.error(f"Bulk {args.command} failed: {e}")
+        return 1
+
+    print(json.dumps(result, indent=2))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
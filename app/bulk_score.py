@@ -0,0 +1,503 @@
+"""
+Offline bulk scoring of Arrow and Parquet datasets.
+
+The input (a ``save_to_disk`` directory such as ``Pre_processed/test``, an
+Arrow IPC file or stream, or a Parquet file) is memory-mapped, split into
+fixed-size row partitions and scored by a pool of worker processes that each
+load the model once. Every partition is written as its own Parquet or Arrow
+file and recorded in a checkpoint, so rerunning a killed job with the same
+arguments only scores the partitions that had not finished. Exact-duplicate
+texts (after cache normalization) are scored once per run.
+
+Usage:
+    python -m app.bulk_score Pre_processed/test scores/test --workers 4
+    python -m app.bulk_score reviews.parquet scores/reviews --model distilbert --keep-columns labels
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+from config.logging_config import get_logger
+from .cache import PersistentPredictionStore, text_hash
+
+# Initialize logger
+logger = get_logger('bulk_score')
+
+DEFAULT_MODEL = 'default'  # The single-model SentimentAnalyzer; any other key is an advanced model
+MANIFEST_FILE = '_manifest.json'
+CHECKPOINT_FILE = '_checkpoint.jsonl'
+STATS_FILE = '_stats.json'
+DEDUP_STORE_FILE = '_dedup.sqlite'
+OUTPUT_FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+
+def resolve_input_files(path: str) -> List[str]:
+    """
+    List the data files behind an input path.
+
+    Args:
+        path: Arrow/Parquet file, or a directory of them (e.g. a ``save_to_disk`` split)
+
+    Returns:
+        Sorted data file paths
+    """
+    if os.path.isdir(path):
+        files = sorted(glob.glob(os.path.join(path, '*.arrow')) + glob.glob(os.path.join(path, '*.parquet')))
+        if not files:
+            raise ValueError(f"No .arrow or .parquet files in {path}")
+        return files
+    if not os.path.exists(path):
+        raise ValueError(f"Input not found: {path}")
+    return [path]
+
+
+def open_table(path: str, columns: Optional[Sequence[str]] = None) -> pa.Table:
+    """
+    Open one data file without copying it into memory where the format allows.
+
+    Arrow IPC files and streams (the ``save_to_disk`` format) are memory-mapped
+    and read zero-copy; Parquet is decoded from a memory map, column subset only.
+
+    Args:
+        path: Arrow or Parquet file
+        columns: Columns to keep (all when None)
+
+    Returns:
+        Table backed by the mapped file
+    """
+    if path.endswith('.parquet'):
+        return pq.read_table(path, columns=list(columns) if columns else None, memory_map=True)
+
+    source = pa.memory_map(path, 'r')
+    try:
+        table = pa.ipc.open_file(source).read_all()
+    except pa.ArrowInvalid:
+        source.seek(0)
+        table = pa.ipc.open_stream(source).read_all()
+    return table.select(list(columns)) if columns else table
+
+
+def open_dataset(files: Sequence[str], columns: Optional[Sequence[str]] = None) -> pa.Table:
+    """Concatenate the tables of several data files (chunks are not copied)."""
+    tables = [open_table(path, columns) for path in files]
+    return tables[0] if len(tables) == 1 else pa.concat_tables(tables)
+
+
+def count_rows(files: Sequence[str]) -> int:
+    """Total rows across data files, read from metadata where possible."""
+    total = 0
+    for path in files:
+        if path.endswith('.parquet'):
+            total += pq.ParquetFile(path, memory_map=True).metadata.num_rows
+        else:
+            total += open_table(path).num_rows
+    return total
+
+
+def plan_partitions(num_rows: int, partition_rows: int) -> List[Tuple[int, int, int]]:
+    """
+    Split a row range into fixed-size partitions.
+
+    Returns:
+        (partition_id, start_row, stop_row) per partition
+    """
+    if partition_rows <= 0:
+        raise ValueError("partition_rows must be positive")
+    return [(index, start, min(start + partition_rows, num_rows))
+            for index, start in enumerate(range(0, num_rows, partition_rows))]
+
+
+def partition_path(output_dir: str, partition_id: int, output_format: str) -> str:
+    """Output file for one partition."""
+    return os.path.join(output_dir, f"part-{partition_id:05d}{OUTPUT_FORMATS[output_format]}")
+
+
+def load_scorer(model_key: str = DEFAULT_MODEL) -> Tuple[str, Callable[[List[str]], List[Tuple[str, float]]]]:
+    """
+    Load a model through the service's own loading path.
+
+    Args:
+        model_key: ``default`` for the SentimentAnalyzer, otherwise an advanced model key
+
+    Returns:
+        Tuple of (model fingerprint, function mapping texts to (sentiment, confidence) tuples)
+    """
+    if model_key == DEFAULT_MODEL:
+        from .model import ModelError, SentimentAnalyzer
+
+        analyzer = SentimentAnalyzer()
+
+        def score(texts: List[str]) -> List[Tuple[str, float]]:
+            try:
+                return analyzer.predict_batch(texts)
+            except ModelError as e:
+                # Retry one text at a time so only the bad item maps to Error
+                logger.warning(f"Batch of {len(texts)} texts failed, retrying individually: {e}")
+                results = []
+                for text in texts:
+                    try:
+                        results.append(analyzer.predict_batch([text])[0])
+                    except ModelError:
+                        results.append(("Error", 0.0))
+                return results
+
+        return analyzer.fingerprint, score
+
+    from .advanced_model import AdvancedSentimentAnalyzer
+
+    advanced = AdvancedSentimentAnalyzer()
+    if model_key not in advanced.load_models([model_key]):
+        raise ValueError(f"Model {model_key} not available")
+
+    def score_advanced(texts: List[str]) -> List[Tuple[str, float]]:
+        return [(result.sentiment, float(result.confidence))
+                for result in advanced.batch_predict(texts, model_key)]
+
+    return advanced._fingerprint(model_key), score_advanced
+
+
+# Per-process worker state, set up once by init_worker
+_worker = {}
+
+
+def init_worker(files: List[str], columns: List[str], model_key: str, model_name: str,
+                dedup_path: str, threads: int) -> str:
+    """
+    Map the input and load the model once per worker process.
+
+    Returns:
+        Fingerprint of the loaded model
+    """
+    import torch
+
+    if threads:
+        torch.set_num_threads(threads)
+    config.MODEL_NAME = model_name
+
+    fingerprint, score = load_scorer(model_key)
+    _worker.update({
+        'table': open_dataset(files, columns),
+        'fingerprint': fingerprint,
+        'score': score,
+        'dedup': PersistentPredictionStore(dedup_path, ttl=0),
+    })
+    return fingerprint
+
+
+def score_partition(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Score one partition and write it atomically.
+
+    Returns:
+        Partition statistics for the checkpoint
+    """
+    start_time = time.perf_counter()
+    table = _worker['table'].slice(task['start'], task['stop'] - task['start'])
+    texts = table.column(task['text_column']).to_pylist()
+
+    # Group rows by normalized text so each distinct text is scored once
+    groups = {}
+    for row, text in enumerate(texts):
+        if isinstance(text, str) and text.strip():
+            text = text[:config.MAX_TEXT_LENGTH]
+            groups.setdefault(text_hash(text), (text, []))[1].append(row)
+
+    fingerprint = _worker['fingerprint']
+    results = _worker['dedup'].get_many(fingerprint, list(groups))
+    pending = [hash_ for hash_ in groups if hash_ not in results]
+
+    batch_size = task['batch_size']
+    for offset in range(0, len(pending), batch_size):
+        chunk = pending[offset:offset + batch_size]
+        scored = _worker['score']([groups[hash_][0] for hash_ in chunk])
+        results.update(zip(chunk, scored))
+        _worker['dedup'].set_many(fingerprint, [(hash_, sentiment, confidence)
+                                                for hash_, (sentiment, confidence) in zip(chunk, scored)
+                                                if sentiment != "Error"])
+
+    hashes = [None] * len(texts)
+    sentiments = [None] * len(texts)
+    confidences = [None] * len(texts)
+    for hash_, (_, rows) in groups.items():
+        sentiment, confidence = results[hash_]
+        for row in rows:
+            hashes[row] = hash_
+            sentiments[row] = sentiment
+            confidences[row] = confidence
+
+    output = pa.table({
+        'row': pa.array(range(task['start'], task['stop']), type=pa.int64()),
+        'text_hash': pa.array(hashes, type=pa.string()),
+        'sentiment': pa.array(sentiments, type=pa.string()),
+        'confidence': pa.array(confidences, type=pa.float64()),
+    })
+    for column in task['keep_columns']:
+        output = output.append_column(column, table.column(column))
+
+    path = partition_path(task['output_dir'], task['partition'], task['format'])
+    _write_table(output, path, task['format'])
+
+    non_empty = sum(len(rows) for _, rows in groups.values())
+    return {
+        'partition': task['partition'],
+        'start': task['start'],
+        'stop': task['stop'],
+        'rows': len(texts),
+        'scored': len(pending),
+        'duplicates': non_empty - len(pending),
+        'empty': len(texts) - non_empty,
+        'errors': sum(1 for sentiment in sentiments if sentiment == "Error"),
+        'seconds': time.perf_counter() - start_time,
+        'fingerprint': fingerprint,
+        'pid': os.getpid(),
+    }
+
+
+def _write_table(table: pa.Table, path: str, output_format: str):
+    """Write a table via a temporary file and an atomic rename."""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    if output_format == 'parquet':
+        pq.write_table(table, tmp_path)
+    else:
+        with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def _read_checkpoint(output_dir: str) -> Dict[int, Dict[str, Any]]:
+    """Partitions recorded as finished whose output file still exists."""
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    done = {}
+    if not os.path.exists(path):
+        return done
+
+    with open(path, 'r', encoding='utf-8') as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A torn last line from a killed run
+            done[record['partition']] = record
+    return done
+
+
+def prepare_output(output_dir: str, manifest: Dict[str, Any], overwrite: bool):
+    """Create the output directory, refusing to resume a run with different settings."""
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as handle:
+            previous = json.load(handle)
+        if previous != manifest:
+            if not overwrite:
+                changed = sorted(key for key in set(previous) | set(manifest)
+                                 if previous.get(key) != manifest.get(key))
+                raise ValueError(f"{output_dir} holds a run with different settings ({', '.join(changed)}); "
+                                 f"use --overwrite to start over")
+            shutil.rmtree(output_dir)
+    elif overwrite and os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as handle:
+        json.dump(manifest, handle, indent=2)
+
+
+def build_manifest(input_path: str, partition_rows: int, text_column: str, keep_columns: Sequence[str],
+                   model_key: str, output_format: str) -> Dict[str, Any]:
+    """
+    Describe a scoring run; a run may only resume into a directory with an identical manifest.
+
+    Returns:
+        Input files, row count and every setting that changes the output
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format}")
+
+    files = [os.path.abspath(path) for path in resolve_input_files(input_path)]
+    return {
+        'input': files,
+        'num_rows': count_rows(files),
+        'partition_rows': partition_rows,
+        'text_column': text_column,
+        'keep_columns': list(keep_columns),
+        'model': model_key,
+        'model_name': config.MODEL_NAME,
+        'max_text_length': config.MAX_TEXT_LENGTH,
+        'format': output_format,
+    }
+
+
+def make_task(manifest: Dict[str, Any], partition: int, start: int, stop: int,
+              output_dir: str, batch_size: int) -> Dict[str, Any]:
+    """Work item for score_partition."""
+    return {
+        'partition': partition,
+        'start': start,
+        'stop': stop,
+        'text_column': manifest['text_column'],
+        'keep_columns': manifest['keep_columns'],
+        'batch_size': batch_size,
+        'output_dir': output_dir,
+        'format': manifest['format'],
+    }
+
+
+def run_bulk_score(input_path: str, output_dir: str, model_key: str = DEFAULT_MODEL,
+                   text_column: str = 'text', keep_columns: Sequence[str] = (),
+                   workers: int = 1, partition_rows: int = 10000, batch_size: Optional[int] = None,
+                   output_format: str = 'parquet', overwrite: bool = False) -> Dict[str, Any]:
+    """
+    Score every row of a dataset and write partitioned output.
+
+    Args:
+        input_path: Arrow/Parquet file or directory of them
+        output_dir: Directory for part files, checkpoint and run statistics
+        model_key: ``default`` or an advanced model key
+        text_column: Column holding the review text
+        keep_columns: Input columns copied to the output (e.g. ``labels``)
+        workers: Worker processes (1 scores in this process)
+        partition_rows: Rows per output partition (the unit of resume)
+        batch_size: Texts per forward pass (defaults to the warm-up chunk size)
+        output_format: ``parquet`` or ``arrow``
+        overwrite: Discard any previous run in output_dir
+
+    Returns:
+        Run statistics (also written to ``_stats.json``)
+    """
+    manifest = build_manifest(input_path, partition_rows, text_column, keep_columns, model_key, output_format)
+    prepare_output(output_dir, manifest, overwrite)
+
+    files = manifest['input']
+    columns = list(dict.fromkeys([text_column, *keep_columns]))
+    num_rows = manifest['num_rows']
+    batch_size = batch_size or max(config.BATCH_BUCKET_SIZE, config.MODEL_BATCH_SIZE)
+
+    partitions = plan_partitions(num_rows, partition_rows)
+    done = {partition: record for partition, record in _read_checkpoint(output_dir).items()
+            if os.path.exists(partition_path(output_dir, partition, output_format))}
+    tasks = [make_task(manifest, partition, start, stop, output_dir, batch_size)
+             for partition, start, stop in partitions if partition not in done]
+
+    logger.info(f"Bulk scoring {num_rows} rows from {input_path}: {len(partitions)} partitions, "
+                f"{len(done)} already done, {len(tasks)} to score with {workers} workers")
+
+    start_time = time.perf_counter()
+    if tasks:
+        from .executors import plan_thread_budget
+
+        workers = max(1, min(workers, len(tasks)))
+        initargs = (files, columns, model_key, config.MODEL_NAME,
+                    os.path.join(output_dir, DEDUP_STORE_FILE),
+                    plan_thread_budget(workers, workers_per_model=1) if workers > 1 else 0)
+
+        with open(os.path.join(output_dir, CHECKPOINT_FILE), 'a', encoding='utf-8') as checkpoint:
+            def record(stats: Dict[str, Any]):
+                checkpoint.write(json.dumps(stats) + '\n')
+                checkpoint.flush()
+                os.fsync(checkpoint.fileno())
+                done[stats['partition']] = stats
+                logger.info(f"Partition {stats['partition']} done: {stats['rows']} rows, "
+                            f"{stats['scored']} scored, {stats['duplicates']} duplicates "
+                            f"({len(done)}/{len(partitions)})")
+
+            if workers == 1:
+                init_worker(*initargs)
+                try:
+                    for task in tasks:
+                        record(score_partition(task))
+                finally:
+                    _worker.clear()
+            else:
+                # Spawn, not fork: the parent may hold torch and logging threads
+                context = multiprocessing.get_context('spawn')
+                with context.Pool(workers, initializer=init_worker, initargs=initargs) as pool:
+                    for stats in pool.imap_unordered(score_partition, tasks):
+                        record(stats)
+
+    summary = summarize(done.values(), num_rows, len(partitions))
+    summary['resumed_partitions'] = len(partitions) - len(tasks)
+    summary['elapsed'] = time.perf_counter() - start_time
+    with open(os.path.join(output_dir, STATS_FILE), 'w', encoding='utf-8') as handle:
+        json.dump(summary, handle, indent=2)
+
+    logger.info(f"Bulk scoring finished: {summary['rows']} rows, {summary['scored']} scored, "
+                f"{summary['duplicates']} duplicates in {summary['elapsed']:.1f}s")
+    return summary
+
+
+def summarize(records: Sequence[Dict[str, Any]], num_rows: int, num_partitions: int) -> Dict[str, Any]:
+    """Combine per-partition statistics into run totals."""
+    records = list(records)
+    fingerprints = sorted({record['fingerprint'] for record in records})
+    if len(fingerprints) > 1:
+        logger.warning(f"Partitions were scored by different models: {fingerprints}")
+
+    seconds = sum(record['seconds'] for record in records)
+    rows = sum(record['rows'] for record in records)
+    return {
+        'num_rows': num_rows,
+        'partitions': num_partitions,
+        'completed_partitions': len(records),
+        'complete': len(records) == num_partitions,
+        'rows': rows,
+        'scored': sum(record['scored'] for record in records),
+        'duplicates': sum(record['duplicates'] for record in records),
+        'empty': sum(record['empty'] for record in records),
+        'errors': sum(record['errors'] for record in records),
+        'fingerprints': fingerprints,
+        'worker_seconds': seconds,
+        'rows_per_worker_second': rows / seconds if seconds else 0.0,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command-line arguments for the bulk scorer."""
+    parser = argparse.ArgumentParser(prog='python -m app.bulk_score',
+                                     description="Score an Arrow/Parquet dataset offline.")
+    parser.add_argument('input', help="Arrow/Parquet file or directory (e.g. Pre_processed/test)")
+    parser.add_argument('output', help="Output directory for part files and run statistics")
+    parser.add_argument('--model', default=DEFAULT_MODEL,
+                        help="'default' for the configured model, or an advanced model key")
+    parser.add_argument('--text-column', default='text')
+    parser.add_argument('--keep-columns', nargs='*', default=[],
+                        help="Input columns copied to the output (e.g. labels)")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--partition-rows', type=int, default=10000)
+    parser.add_argument('--batch-size', type=int, default=None)
+    parser.add_argument('--format', choices=sorted(OUTPUT_FORMATS), default='parquet')
+    parser.add_argument('--overwrite', action='store_true', help="Discard a previous run in the output directory")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Entry point for ``python -m app.bulk_score``."""
+    args = build_parser().parse_args(argv)
+    try:
+        summary = run_bulk_score(args.input, args.output, model_key=args.model,
+                                 text_column=args.text_column, keep_columns=args.keep_columns,
+                                 workers=args.workers, partition_rows=args.partition_rows,
+                                 batch_size=args.batch_size, output_format=args.format,
+                                 overwrite=args.overwrite)
+    except (ValueError, OSError, pa.ArrowException) as e:
+        logger.error(f"Bulk scoring failed: {e}")
+        return 1
+
+    print(json.dumps(summary, indent=2))
+    return 0 if summary['complete'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
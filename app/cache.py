@@ -0,0 +1,435 @@
+"""
+Prediction caching for sentiment inference.
+
+Entries are keyed by a fingerprint of the loaded model (name and revision) plus
+a hash of the normalized text, so a model upgrade never serves stale
+predictions. Two tiers are provided: an in-process LRU cache and an on-disk
+SQLite store shared by every worker process on a host.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterator, Optional, Sequence, Tuple
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+from config.logging_config import get_logger
+
+# Initialize logger
+logger = get_logger('cache')
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text for cache lookups.
+
+    Applies Unicode NFC normalization and collapses runs of whitespace, so
+    trivially different spellings of the same review share a cache entry.
+    """
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def text_hash(text: str) -> str:
+    """Hex SHA-256 digest of the normalized text."""
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def model_fingerprint(model_name: str, revision: Optional[str] = None,
+                      variant: Optional[str] = None) -> str:
+    """
+    Identify a loaded model for cache keying.
+
+    Args:
+        model_name: Name or path of the loaded model
+        revision: Model revision (commit hash), if known
+        variant: Inference variant that changes outputs (e.g. quantization), if any
+
+    Returns:
+        Short hex digest that changes whenever the weights or variant change
+    """
+    digest = hashlib.sha256()
+    for part in (model_name, revision or '', variant or ''):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:16]
+
+
+def _estimate_size(value: Any) -> int:
+    """Rough in-memory size of a cached value in bytes."""
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        size += sum(_estimate_size(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    return size
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with a time-to-live and a memory ceiling."""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None,
+                 max_bytes: Optional[int] = None):
+        """
+        Args:
+            max_entries: Maximum number of entries (defaults to config.PREDICTION_CACHE_MAX_ENTRIES)
+            ttl: Seconds an entry stays valid, 0 for no expiry (defaults to config.PREDICTION_CACHE_TTL)
+            max_bytes: Approximate memory ceiling (defaults to config.PREDICTION_CACHE_MAX_MB)
+        """
+        self.max_entries = config.PREDICTION_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl = config.PREDICTION_CACHE_TTL if ttl is None else ttl
+        self.max_bytes = (int(config.PREDICTION_CACHE_MAX_MB * 1024 * 1024)
+                          if max_bytes is None else max_bytes)
+
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for a key, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting least-recently-used entries to stay within bounds."""
+        size = _estimate_size(key) + _estimate_size(value)
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def _remove(self, key: Hashable):
+        """Drop an entry and release its accounted size. Caller must hold the lock."""
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit, miss and eviction counters plus current occupancy."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'enabled': True,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'memory_bytes': self._bytes,
+                'max_memory_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'hit_rate': self._hits / lookups if lookups else 0,
+            }
+
+
+class PersistentPredictionStore:
+    """
+    On-disk prediction store shared by all worker processes on a host.
+
+    Backed by SQLite in WAL mode, so many readers proceed concurrently with a
+    single writer and entries survive restarts and deploys. Rows are keyed by
+    (model fingerprint, text hash). With a TTL, expired rows are deleted when
+    the store opens and again every ``prune_every`` rows written.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None, prune_every: Optional[int] = None):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+            ttl: Seconds an entry stays valid, 0 for no expiry (defaults to config.PREDICTION_STORE_TTL)
+            prune_every: Rows written between deletions of expired rows
+                (defaults to config.PREDICTION_STORE_PRUNE_EVERY)
+        """
+        self.path = path
+        self.ttl = config.PREDICTION_STORE_TTL if ttl is None else ttl
+        self.prune_every = max(1, config.PREDICTION_STORE_PRUNE_EVERY if prune_every is None else prune_every)
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._errors = 0
+        self._pruned = 0
+        self._writes_since_prune = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            " fingerprint TEXT NOT NULL,"
+            " text_hash TEXT NOT NULL,"
+            " sentiment TEXT NOT NULL,"
+            " confidence REAL NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " probabilities TEXT,"
+            " PRIMARY KEY (fingerprint, text_hash)"
+            ") WITHOUT ROWID"
+        )
+        # Stores created before class distributions were kept gain the column in place
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(predictions)")}
+        if 'probabilities' not in columns:
+            conn.execute("ALTER TABLE predictions ADD COLUMN probabilities TEXT")
+        conn.commit()
+        self.prune()
+        logger.info(f"Persistent prediction store ready at {path}")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection, reopened after a fork."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get_many(self, fingerprint: str, hashes: Sequence[str],
+                 probabilities: bool = False) -> Dict[str, Tuple[Any, ...]]:
+        """
+        Look up several texts for one model.
+
+        Args:
+            fingerprint: Model fingerprint
+            hashes: Text hashes to look up
+            probabilities: Also return the stored class distributions
+
+        Returns:
+            Mapping from text hash to (sentiment_label, confidence_score) for the hits, or to
+            (sentiment_label, confidence_score, distribution) with ``probabilities``, where the
+            distribution is None for entries stored without one
+        """
+        if not hashes:
+            return {}
+
+        found = {}
+        min_created = time.time() - self.ttl if self.ttl > 0 else 0
+        unique = list(dict.fromkeys(hashes))
+        try:
+            conn = self._connection()
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f"SELECT text_hash, sentiment, confidence, probabilities FROM predictions "
+                    f"WHERE fingerprint = ? AND created_at >= ? AND text_hash IN ({placeholders})",
+                    [fingerprint, min_created, *chunk]
+                ).fetchall()
+                for hash_, sentiment, confidence, distribution in rows:
+                    if probabilities:
+                        found[hash_] = (sentiment, float(confidence),
+                                        json.loads(distribution) if distribution else None)
+                    else:
+                        found[hash_] = (sentiment, float(confidence))
+        except sqlite3.Error as e:
+            logger.warning(f"Prediction store lookup failed: {e}")
+            with self._stats_lock:
+                self._errors += 1
+            return {}
+
+        with self._stats_lock:
+            self._hits += len(found)
+            self._misses += len(unique) - len(found)
+        return found
+
+    def set_many(self, fingerprint: str, entries: Sequence[Tuple[Any, ...]]):
+        """
+        Store several predictions for one model.
+
+        Args:
+            fingerprint: Model fingerprint
+            entries: (text_hash, sentiment_label, confidence_score) tuples, optionally
+                followed by the {label: probability} class distribution
+        """
+        if not entries:
+            return
+
+        now = time.time()
+        try:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO predictions "
+                    "(fingerprint, text_hash, sentiment, confidence, created_at, probabilities) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(fingerprint, entry[0], entry[1], float(entry[2]), now,
+                      json.dumps(entry[3]) if len(entry) > 3 and entry[3] else None)
+                     for entry in entries]
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Prediction store write failed: {e}")
+            with self._stats_lock:
+                self._errors += 1
+            return
+
+        with self._stats_lock:
+            self._writes += len(entries)
+            self._writes_since_prune += len(entries)
+            due = self._writes_since_prune >= self.prune_every
+            if due:
+                self._writes_since_prune = 0
+        if due:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        Delete rows older than the TTL (reads already ignore them) so the file stops growing.
+
+        Returns:
+            Number of rows deleted
+        """
+        if self.ttl <= 0:
+            return 0
+
+        try:
+            conn = self._connection()
+            with conn:
+                deleted = conn.execute("DELETE FROM predictions WHERE created_at < ?",
+                                       (time.time() - self.ttl,)).rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"Prediction store pruning failed: {e}")
+            with self._stats_lock:
+                self._errors += 1
+            return 0
+
+        with self._stats_lock:
+            self._pruned += deleted
+        if deleted:
+            logger.debug(f"Pruned {deleted} expired predictions from {self.path}")
+        return deleted
+
+    def count(self) -> int:
+        """Number of stored predictions across all models."""
+        return self._connection().execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit, miss and write counters for this process."""
+        with self._stats_lock:
+            lookups = self._hits + self._misses
+            return {
+                'enabled': True,
+                'path': self.path,
+                'ttl': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'writes': self._writes,
+                'pruned': self._pruned,
+                'errors': self._errors,
+                'hit_rate': self._hits / lookups if lookups else 0,
+            }
+
+
+# Global store instance (one per process, shared on disk)
+_prediction_store = None
+_prediction_store_lock = threading.Lock()
+
+
+def get_prediction_store() -> Optional[PersistentPredictionStore]:
+    """
+    Get or open the host-wide persistent prediction store.
+
+    Returns:
+        The store, or None when config.PREDICTION_STORE_PATH is not set
+        or the database cannot be opened
+    """
+    global _prediction_store
+
+    if not config.PREDICTION_STORE_PATH:
+        return None
+
+    with _prediction_store_lock:
+        if _prediction_store is None:
+            try:
+                _prediction_store = PersistentPredictionStore(config.PREDICTION_STORE_PATH)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Could not open prediction store {config.PREDICTION_STORE_PATH}: {e}")
+                return None
+
+    return _prediction_store
+
+
+def iter_warmup_texts(path: str) -> Iterator[str]:
+    """
+    Yield texts from a JSONL request log for cache pre-warming.
+
+    Each line may be an /api/analyze body ({"text": ...}), a /api/v2/batch body
+    ({"texts": [...]}) or a bare JSON string. Malformed lines and records holding
+    no text are skipped, and their number is logged once the file is read.
+    """
+    skipped = 0
+    with open(path, 'r', encoding='utf-8') as handle:
+        for line_number, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.debug(f"Skipping malformed warm-up line {line_number}")
+                skipped += 1
+                continue
+
+            if isinstance(record, str):
+                texts = [record]
+            elif isinstance(record, dict):
+                texts = record.get('texts') or [record.get('text')]
+            else:
+                texts = []
+
+            texts = [text for text in texts if isinstance(text, str) and text.strip()]
+            if not texts:
+                skipped += 1
+            yield from texts
+
+    if skipped:
+        logger.warning(f"Skipped {skipped} warm-up records in {path} without a 'text', 'texts' or string body")
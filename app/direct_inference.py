@@ -0,0 +1,113 @@
+"""
+Direct logits inference for sequence-classification models.
+
+Skips the transformers pipeline's per-call sanitizing and dict post-processing:
+texts go straight through the fast tokenizer and the model forward under
+``torch.inference_mode``, and a vectorized softmax over the logits yields the
+full class-probability vector for every text alongside its argmax label.
+"""
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+import torch
+from transformers import PreTrainedTokenizerBase
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.logging_config import get_logger
+
+# Initialize logger
+logger = get_logger('direct_inference')
+
+
+class DirectClassifier:
+    """Tokenizer + model forward + softmax over a loaded sentiment pipeline."""
+
+    def __init__(self, pipe: Any):
+        """
+        Args:
+            pipe: Loaded text-classification pipeline. Its ``model`` is read on every
+                call, so backends and accuracy guards may swap it at any time.
+        """
+        self.pipeline = pipe
+        self.tokenizer = pipe.tokenizer
+
+        model_config = pipe.model.config
+        self.labels = [model_config.id2label[i] for i in range(model_config.num_labels)]
+        self.multi_label = (model_config.num_labels == 1 or
+                            getattr(model_config, 'problem_type', None) == 'multi_label_classification')
+
+        # Some tokenizers report an effectively unbounded model_max_length
+        max_length = getattr(self.tokenizer, 'model_max_length', None) or 512
+        positions = getattr(model_config, 'max_position_embeddings', None)
+        if positions:
+            max_length = min(max_length, positions)
+        self.max_length = max_length
+
+    @classmethod
+    def from_pipeline(cls, pipe: Any) -> Optional['DirectClassifier']:
+        """
+        Build a direct classifier if the pipeline wraps a real model and fast tokenizer.
+
+        Returns:
+            DirectClassifier, or None when the pipeline cannot be bypassed
+            (e.g. a slow tokenizer or a test double)
+        """
+        model = getattr(pipe, 'model', None)
+        tokenizer = getattr(pipe, 'tokenizer', None)
+        if not isinstance(model, torch.nn.Module) or not isinstance(tokenizer, PreTrainedTokenizerBase):
+            return None
+        if not getattr(tokenizer, 'is_fast', False):
+            return None
+        try:
+            return cls(pipe)
+        except Exception as e:
+            logger.debug(f"Direct inference unavailable, using the pipeline: {e}")
+            return None
+
+    def predict_proba(self, texts: List[str]) -> torch.Tensor:
+        """
+        Class probabilities for a batch of texts.
+
+        Args:
+            texts: Input texts (padded to the longest, truncated to the model limit)
+
+        Returns:
+            Float tensor of shape (len(texts), num_labels)
+        """
+        model = self.pipeline.model
+        encodings = self.tokenizer(list(texts), padding=True, truncation=True,
+                                   max_length=self.max_length, return_tensors='pt')
+        device = getattr(model, 'device', None)
+        if device is not None:
+            encodings = encodings.to(device)
+
+        with torch.inference_mode():
+            logits = model(**encodings).logits.float()
+            if self.multi_label:
+                return torch.sigmoid(logits)
+            return torch.softmax(logits, dim=-1)
+
+    def classify(self, texts: List[str]) -> List[Tuple[str, float, Dict[str, float]]]:
+        """
+        Argmax label, its probability and the full probability vector per text.
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            List of (raw_label, score, {raw_label: probability}) in input order
+        """
+        if not texts:
+            return []
+
+        probabilities = self.predict_proba(texts)
+        scores, indices = probabilities.max(dim=-1)
+
+        rows = probabilities.tolist()
+        return [
+            (self.labels[index], score, dict(zip(self.labels, row)))
+            for index, score, row in zip(indices.tolist(), scores.tolist(), rows)
+        ]
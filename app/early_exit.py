@@ -0,0 +1,420 @@
+"""
+Early-exit inference for the fine-tuned DistilBERT classifier.
+
+Small classifier heads sit on the [CLS] token after intermediate transformer
+layers. At serve time texts run through the layers one at a time; after each
+layer with a head, every text whose head prediction has a normalized entropy
+below the exit threshold is answered there and dropped from the batch, so
+confident texts skip the remaining layers. The rest reach the model's own
+classifier. The heads are distilled from the full model's predictions on
+``Pre_processed/train`` with the backbone frozen.
+
+    python -m app.early_exit train models/exit_heads.pt
+    python -m app.early_exit curve models/exit_heads.pt --thresholds 0 0.1 0.2 0.3
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import torch
+import torch.nn.functional as F
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+from config.logging_config import get_logger
+from .direct_inference import DirectClassifier
+from .evaluation import evaluate_predictions, load_eval_split
+
+try:
+    from transformers.masking_utils import create_bidirectional_mask
+except ImportError:  # transformers 4.x: see _layer_mask
+    create_bidirectional_mask = None
+
+# Initialize logger
+logger = get_logger('early_exit')
+
+DEFAULT_THRESHOLDS = [0.0, 0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5]
+
+
+def _layer_mask(body: Any, hidden: torch.Tensor, attention_mask: torch.Tensor) -> Optional[torch.Tensor]:
+    """
+    The padding mask in the form DistilBERT's layers expect, as DistilBertModel.forward builds it.
+
+    transformers 5.x builds it for every attention implementation with
+    create_bidirectional_mask. On 4.x eager attention takes the 2-D mask, SDPA an
+    expanded 4-D float mask, and flash attention the 2-D mask or None without padding.
+    """
+    if create_bidirectional_mask is not None:
+        return create_bidirectional_mask(config=body.config, inputs_embeds=hidden, attention_mask=attention_mask)
+
+    implementation = getattr(body.config, '_attn_implementation', 'eager')
+    if implementation == 'sdpa':
+        from transformers.modeling_attn_mask_utils import _prepare_4d_attention_mask_for_sdpa
+
+        return _prepare_4d_attention_mask_for_sdpa(attention_mask, hidden.dtype, tgt_len=hidden.shape[1])
+    if implementation == 'flash_attention_2':
+        return attention_mask if (attention_mask == 0).any() else None
+    return attention_mask
+
+
+def normalized_entropy(probabilities: torch.Tensor) -> torch.Tensor:
+    """Entropy of each row divided by its maximum, log(num_labels): 0 = certain, 1 = uniform."""
+    entropy = -(probabilities * torch.log(probabilities.clamp_min(1e-12))).sum(dim=-1)
+    return entropy / math.log(probabilities.shape[-1])
+
+
+class ExitHeads(torch.nn.Module):
+    """One small classifier per intermediate layer, shaped like DistilBERT's own head."""
+
+    def __init__(self, layers: Sequence[int], dim: int, num_labels: int):
+        """
+        Args:
+            layers: Layer counts after which a head may answer (1 = after the first layer)
+            dim: Hidden size of the backbone
+            num_labels: Classes of the backbone's classifier
+        """
+        super().__init__()
+        self.layers = sorted(layers)
+        self.dim = dim
+        self.num_labels = num_labels
+        self.heads = torch.nn.ModuleDict({
+            str(layer): torch.nn.Sequential(torch.nn.Linear(dim, dim), torch.nn.ReLU(),
+                                            torch.nn.Dropout(0.1), torch.nn.Linear(dim, num_labels))
+            for layer in self.layers
+        })
+
+    def has_exit(self, layer: int) -> bool:
+        return str(layer) in self.heads
+
+    def forward(self, layer: int, cls_hidden: torch.Tensor) -> torch.Tensor:
+        """Logits of the head after ``layer`` from the [CLS] hidden state."""
+        return self.heads[str(layer)](cls_hidden)
+
+    def digest(self) -> str:
+        """Short hex digest of the exit layers and weights, used to key cached predictions."""
+        digest = hashlib.sha256(json.dumps(self.layers).encode('utf-8'))
+        for name, tensor in sorted(self.state_dict().items()):
+            digest.update(name.encode('utf-8'))
+            digest.update(tensor.detach().cpu().contiguous().numpy().tobytes())
+        return digest.hexdigest()[:16]
+
+    def save(self, path: str):
+        """Write the heads and their geometry to a torch file."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        torch.save({'layers': self.layers, 'dim': self.dim, 'num_labels': self.num_labels,
+                    'state_dict': self.state_dict()}, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'ExitHeads':
+        """Read heads written by save()."""
+        saved = torch.load(path, map_location='cpu', weights_only=True)
+        heads = cls(saved['layers'], saved['dim'], saved['num_labels'])
+        heads.load_state_dict(saved['state_dict'])
+        return heads.eval()
+
+
+def _layer_output(output: Any) -> torch.Tensor:
+    """Hidden states from a DistilBERT block (a tensor, or a tuple ending in it on transformers 4.x)."""
+    return output[-1] if isinstance(output, tuple) else output
+
+
+def train_exit_heads(model: Any, tokenizer: Any, texts: Sequence[str], epochs: int = 3, batch_size: int = 32,
+                     lr: float = 1e-3, max_length: int = 512, seed: int = 0) -> ExitHeads:
+    """
+    Distill exit heads from a frozen DistilBERT classifier.
+
+    Each head learns to reproduce the full model's class distribution from the
+    [CLS] hidden state after its layer, so an early answer agrees with the one
+    the remaining layers would have given.
+
+    Args:
+        model: DistilBertForSequenceClassification
+        tokenizer: Its fast tokenizer
+        texts: Training texts (labels are not needed)
+        epochs: Passes over the cached features
+        batch_size: Texts per forward pass and per optimizer step
+        lr: AdamW learning rate
+        max_length: Truncation length
+        seed: Shuffling and initialization seed
+
+    Returns:
+        Trained ExitHeads, one per layer except the last
+    """
+    torch.manual_seed(seed)
+    model.eval()
+    n_layers = len(model.distilbert.transformer.layer)
+    layers = list(range(1, n_layers))
+    features, targets = [], []
+
+    with torch.inference_mode():
+        for start in range(0, len(texts), batch_size):
+            encodings = tokenizer(list(texts[start:start + batch_size]), padding=True, truncation=True,
+                                  max_length=max_length, return_tensors='pt')
+            outputs = model(**encodings, output_hidden_states=True)
+            features.append(torch.stack([outputs.hidden_states[layer][:, 0] for layer in layers], dim=1).float())
+            targets.append(torch.softmax(outputs.logits.float(), dim=-1))
+
+    features, targets = torch.cat(features), torch.cat(targets)
+    heads = ExitHeads(layers, features.shape[-1], targets.shape[-1])
+    optimizer = torch.optim.AdamW(heads.parameters(), lr=lr)
+
+    heads.train()
+    for epoch in range(epochs):
+        total = 0.0
+        for batch in torch.randperm(len(targets)).split(batch_size):
+            loss = sum(F.cross_entropy(heads(layer, features[batch, i]), targets[batch])
+                       for i, layer in enumerate(layers))
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total += loss.item() * len(batch)
+        logger.info(f"Exit heads epoch {epoch + 1}/{epochs}: loss {total / max(len(targets), 1):.4f}")
+
+    return heads.eval()
+
+
+class EarlyExitClassifier(DirectClassifier):
+    """Direct classifier that stops each text at the first layer whose exit head is confident."""
+
+    def __init__(self, pipe: Any, heads: ExitHeads, threshold: Optional[float] = None):
+        """
+        Args:
+            pipe: Loaded DistilBERT text-classification pipeline
+            heads: Exit heads trained for this model
+            threshold: Normalized entropy below which a text exits (defaults to config.EARLY_EXIT_THRESHOLD;
+                0 runs every text through all layers)
+        """
+        super().__init__(pipe)
+        self.heads = heads.eval()
+        self.threshold = config.EARLY_EXIT_THRESHOLD if threshold is None else threshold
+        self.n_layers = len(pipe.model.distilbert.transformer.layer)
+        self._lock = threading.Lock()
+        self._stats = {'texts': 0, 'layers_run': 0, 'exits': {}}
+
+    @classmethod
+    def from_pipeline(cls, pipe: Any, heads: Optional[ExitHeads] = None,
+                      threshold: Optional[float] = None) -> Optional['EarlyExitClassifier']:
+        """
+        Build an early-exit classifier if the heads fit the pipeline's model.
+
+        Returns:
+            EarlyExitClassifier, or None for models other than DistilBERT single-label
+            classifiers (including TorchScript/compiled wrappers) or mismatched heads
+        """
+        if heads is None or DirectClassifier.from_pipeline(pipe) is None:
+            return None
+        model = pipe.model
+        if not hasattr(model, 'distilbert') or not hasattr(model, 'pre_classifier'):
+            logger.warning("Early exit needs an eager DistilBERT classifier; running all layers")
+            return None
+        n_layers = len(model.distilbert.transformer.layer)
+        if heads.num_labels != model.config.num_labels or heads.dim != model.config.dim or \
+                any(layer >= n_layers for layer in heads.layers):
+            logger.warning("Exit heads were trained for a different model; running all layers")
+            return None
+        classifier = cls(pipe, heads, threshold)
+        return None if classifier.multi_label else classifier
+
+    def _final_logits(self, model: Any, hidden: torch.Tensor) -> torch.Tensor:
+        """DistilBertForSequenceClassification's own head on the last layer's [CLS] state."""
+        pooled = torch.relu(model.pre_classifier(hidden[:, 0]))
+        return model.classifier(model.dropout(pooled))
+
+    def predict_proba(self, texts: List[str], threshold: Optional[float] = None) -> torch.Tensor:
+        """
+        Class probabilities for a batch of texts, exiting confident texts early.
+
+        Args:
+            texts: Input texts
+            threshold: Overrides the classifier's exit threshold for this call
+
+        Returns:
+            Float tensor of shape (len(texts), num_labels)
+        """
+        threshold = self.threshold if threshold is None else threshold
+        model = self.pipeline.model
+        body = model.distilbert
+        encodings = self.tokenizer(list(texts), padding=True, truncation=True,
+                                   max_length=self.max_length, return_tensors='pt')
+        device = getattr(model, 'device', None)
+        if device is not None:
+            encodings = encodings.to(device)
+
+        probabilities = torch.empty(len(texts), len(self.labels))
+        exit_layers = torch.full((len(texts),), self.n_layers)
+        active = torch.arange(len(texts))
+
+        with torch.inference_mode():
+            hidden = body.embeddings(encodings['input_ids'])
+            mask = _layer_mask(body, hidden, encodings['attention_mask'])
+
+            for depth, layer in enumerate(body.transformer.layer, start=1):
+                hidden = _layer_output(layer(hidden, mask))
+                if depth == self.n_layers:
+                    probabilities[active] = torch.softmax(self._final_logits(model, hidden).float(), dim=-1).cpu()
+                    break
+                if not self.heads.has_exit(depth):
+                    continue
+
+                scores = torch.softmax(self.heads(depth, hidden[:, 0]).float(), dim=-1)
+                done = (normalized_entropy(scores) < threshold).cpu()
+                if done.any():
+                    probabilities[active[done]] = scores[done.to(scores.device)].cpu()
+                    exit_layers[active[done]] = depth
+                    keep = ~done
+                    active = active[keep]
+                    if not len(active):
+                        break
+                    keep = keep.to(hidden.device)
+                    hidden = hidden[keep]
+                    mask = mask[keep] if mask is not None else None
+
+        with self._lock:
+            self._stats['texts'] += len(texts)
+            self._stats['layers_run'] += int(exit_layers.sum())
+            for depth, count in zip(*torch.unique(exit_layers, return_counts=True)):
+                self._stats['exits'][int(depth)] = self._stats['exits'].get(int(depth), 0) + int(count)
+        return probabilities
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the exit threshold and how many texts left at each layer."""
+        with self._lock:
+            stats = {'texts': self._stats['texts'], 'layers_run': self._stats['layers_run'],
+                     'exits': dict(sorted(self._stats['exits'].items()))}
+        average = stats['layers_run'] / stats['texts'] if stats['texts'] else float(self.n_layers)
+        return {
+            'enabled': True,
+            'threshold': self.threshold,
+            'layers': self.n_layers,
+            'exit_layers': self.heads.layers,
+            **stats,
+            'average_layers': average,
+            'layers_saved': 1 - average / self.n_layers,
+        }
+
+
+def load_exit_heads(path: Optional[str] = None) -> Optional[ExitHeads]:
+    """
+    Load the exit heads configured by config.EARLY_EXIT_HEADS_PATH.
+
+    Returns:
+        ExitHeads, or None when early exit is not configured or the file is unusable
+    """
+    path = path or config.EARLY_EXIT_HEADS_PATH
+    if not path:
+        return None
+    try:
+        heads = ExitHeads.load(path)
+    except (OSError, KeyError, RuntimeError, ValueError) as e:
+        logger.warning(f"Exit heads {path} unavailable, running all layers: {e}")
+        return None
+    logger.info(f"Exit heads loaded from {path} (after layers {heads.layers})")
+    return heads
+
+
+def latency_accuracy_curve(analyzer: Any, texts: Sequence[str], labels: Sequence[int],
+                           thresholds: Sequence[float] = DEFAULT_THRESHOLDS,
+                           batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Latency, accuracy and depth of early-exit inference at several thresholds.
+
+    Texts go straight to the model (SentimentAnalyzer._run_pipeline), bypassing
+    the prediction caches and tier 0, so every row measures real forward passes.
+
+    Args:
+        analyzer: SentimentAnalyzer serving with exit heads
+        texts: Input texts
+        labels: Gold label ids (see LABEL_IDS)
+        thresholds: Exit thresholds to evaluate (0 = full model baseline)
+        batch_size: Texts per forward pass (defaults to config.BATCH_BUCKET_SIZE)
+
+    Returns:
+        Dict with one row per threshold: macro_f1, accuracy, latency_per_text, average_layers
+        and speedup over the full model
+    """
+    original = analyzer.exit_threshold
+    rows = []
+    try:
+        for threshold in [0.0] + [t for t in thresholds if t != 0.0]:
+            analyzer.exit_threshold = threshold
+            direct = analyzer._direct_classifier()
+            if not isinstance(direct, EarlyExitClassifier):
+                raise ValueError("The analyzer is not serving with exit heads")
+            before = direct.get_stats()
+            row = {'threshold': threshold, **evaluate_predictions(analyzer._run_pipeline, texts, labels, batch_size)}
+            after = direct.get_stats()
+            texts_run = after['texts'] - before['texts']
+            row['average_layers'] = (after['layers_run'] - before['layers_run']) / texts_run if texts_run else 0.0
+            rows.append(row)
+    finally:
+        analyzer.exit_threshold = original
+
+    baseline = rows[0]['latency_per_text']
+    for row in rows:
+        row['speedup'] = baseline / row['latency_per_text'] if row['latency_per_text'] else 0.0
+    return {'examples': len(labels), 'thresholds': rows}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command-line interface for training exit heads and measuring the early-exit trade-off."""
+    parser = argparse.ArgumentParser(prog='python -m app.early_exit',
+                                     description="Train DistilBERT exit heads or report their latency/accuracy curve")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    train = commands.add_parser('train', help="Distill exit heads from the full model on a split")
+    train.add_argument('output', help="Path of the heads file to write")
+    train.add_argument('--model', default=None, help="Model directory or hub name (defaults to MODEL_NAME)")
+    train.add_argument('--train', default='Pre_processed/train')
+    train.add_argument('--epochs', type=int, default=3)
+    train.add_argument('--batch-size', type=int, default=32)
+    train.add_argument('--limit', type=int, default=None, help="Use at most this many training examples")
+
+    curve = commands.add_parser('curve', help="Latency vs accuracy per exit threshold on a labelled split")
+    curve.add_argument('heads', help="Trained heads file")
+    curve.add_argument('--split', default='Pre_processed/test')
+    curve.add_argument('--thresholds', type=float, nargs='*', default=DEFAULT_THRESHOLDS)
+    curve.add_argument('--limit', type=int, default=None)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Entry point for ``python -m app.early_exit``."""
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == 'train':
+            from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+            model_name = args.model or config.MODEL_NAME
+            model = AutoModelForSequenceClassification.from_pretrained(model_name)
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            texts, _ = load_eval_split(args.train, limit=args.limit)
+            heads = train_exit_heads(model, tokenizer, texts, epochs=args.epochs, batch_size=args.batch_size)
+            heads.save(args.output)
+            summary = {'output': args.output, 'model': model_name, 'examples': len(texts), 'exit_layers': heads.layers}
+        else:
+            from .model import SentimentAnalyzer
+
+            config.EARLY_EXIT_HEADS_PATH = args.heads
+            # Time the model itself: no cached answers and no tier-0 shortcuts
+            config.PREDICTION_CACHE_ENABLED = False
+            config.PREDICTION_STORE_PATH = None
+            config.TIER0_MODEL_PATH = None
+            texts, labels = load_eval_split(args.split, limit=args.limit)
+            summary = latency_accuracy_curve(SentimentAnalyzer(), texts, labels, args.thresholds)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Early-exit {args.command} failed: {e}")
+        return 1
+
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
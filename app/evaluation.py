@@ -0,0 +1,114 @@
+"""
+Offline evaluation helpers for sentiment models.
+
+Loads the labelled ``Pre_processed`` splits and scores predictions with
+macro-F1, so optimizations can be checked against the fp32 baseline.
+"""
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+from config.logging_config import get_logger
+
+# Initialize logger
+logger = get_logger('evaluation')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Label ids used by the Pre_processed splits (sentiment category codes)
+LABEL_IDS = {'Negative': 0, 'Neutral': 1, 'Positive': 2}
+
+
+def resolve_path(path: str) -> str:
+    """Resolve a path relative to the project root unless it is absolute."""
+    return path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+
+
+def load_eval_split(path: str, limit: Optional[int] = None,
+                    text_column: str = 'text', label_column: str = 'labels') -> Tuple[List[str], List[int]]:
+    """
+    Load texts and labels from a dataset saved with ``save_to_disk``.
+
+    Args:
+        path: Split directory, e.g. ``Pre_processed/test``
+        limit: Optional cap on the number of examples (taken from the start)
+        text_column: Column holding the review text
+        label_column: Column holding the integer sentiment label
+
+    Returns:
+        Tuple of (texts, labels)
+    """
+    from datasets import load_from_disk
+
+    dataset = load_from_disk(resolve_path(path))
+    if limit is not None and limit < len(dataset):
+        dataset = dataset.select(range(limit))
+
+    return list(dataset[text_column]), [int(label) for label in dataset[label_column]]
+
+
+def macro_f1(y_true: Sequence[int], y_pred: Sequence[int],
+             labels: Optional[Sequence[int]] = None) -> float:
+    """
+    Macro-averaged F1 score.
+
+    Args:
+        y_true: Gold label ids
+        y_pred: Predicted label ids
+        labels: Label ids to average over (defaults to those seen in y_true)
+
+    Returns:
+        Unweighted mean of per-class F1 scores
+    """
+    if labels is None:
+        labels = sorted(set(y_true))
+    if not labels:
+        return 0.0
+
+    scores = []
+    for label in labels:
+        tp = sum(1 for t, p in zip(y_true, y_pred) if t == label and p == label)
+        fp = sum(1 for t, p in zip(y_true, y_pred) if t != label and p == label)
+        fn = sum(1 for t, p in zip(y_true, y_pred) if t == label and p != label)
+        denominator = 2 * tp + fp + fn
+        scores.append(2 * tp / denominator if denominator else 0.0)
+
+    return sum(scores) / len(scores)
+
+
+def evaluate_predictions(predict_batch: Callable[[List[str]], Sequence[Tuple[str, float]]],
+                         texts: Sequence[str], labels: Sequence[int],
+                         batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Score a batched predictor on a labelled split.
+
+    Args:
+        predict_batch: Callable mapping texts to (sentiment_label, confidence) tuples
+        texts: Input texts
+        labels: Gold label ids (see LABEL_IDS)
+        batch_size: Texts per call (defaults to config.BATCH_BUCKET_SIZE)
+
+    Returns:
+        Dict with macro_f1, accuracy, examples and mean per-text latency in seconds
+    """
+    batch_size = batch_size or config.BATCH_BUCKET_SIZE
+    predictions = []
+
+    start_time = time.perf_counter()
+    for start in range(0, len(texts), batch_size):
+        batch = list(texts[start:start + batch_size])
+        predictions.extend(LABEL_IDS.get(label, -1) for label, _ in predict_batch(batch))
+    elapsed = time.perf_counter() - start_time
+
+    correct = sum(1 for t, p in zip(labels, predictions) if t == p)
+    return {
+        'macro_f1': macro_f1(labels, predictions, labels=sorted(set(LABEL_IDS.values()))),
+        'accuracy': correct / len(labels) if labels else 0.0,
+        'examples': len(labels),
+        'latency_per_text': elapsed / len(texts) if texts else 0.0,
+    }
@@ -0,0 +1,168 @@
+"""
+Long-lived per-model executors with a CPU thread budget.
+
+Each loaded model gets its own ThreadPoolExecutor with a fixed concurrency
+limit, and every worker thread is pinned to a share of the machine's cores
+for torch intra-op parallelism. Concurrent multi-model comparisons then queue
+per model instead of oversubscribing one shared torch thread pool.
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import torch
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+from config.logging_config import get_logger
+
+# Initialize logger
+logger = get_logger('executors')
+
+_pin_lock = threading.Lock()
+
+
+def _per_thread_counts_supported() -> bool:
+    """Whether torch intra-op thread counts apply per calling thread (OpenMP backend)."""
+    return 'OpenMP' in torch.__config__.parallel_info()
+
+
+def _pin_intra_op_threads(threads: int):
+    """
+    Give the calling worker thread its own intra-op thread count.
+
+    With the OpenMP backend the count is per calling thread, but setting it also
+    updates the process-wide default that fresh threads start from; a throwaway
+    helper thread puts that default back.
+    """
+    with _pin_lock:
+        default = torch.get_num_threads()  # Initializes this thread from the process default
+        torch.set_num_threads(threads)
+        restore = threading.Thread(target=torch.set_num_threads, args=(default,))
+        restore.start()
+        restore.join()
+
+
+def plan_thread_budget(model_count: int, budget: Optional[int] = None,
+                       workers_per_model: Optional[int] = None) -> int:
+    """
+    Intra-op threads for each worker so all models together stay within budget.
+
+    Args:
+        model_count: Number of models sharing the machine
+        budget: Total threads (defaults to config.MODEL_THREAD_BUDGET, then the CPU count)
+        workers_per_model: Concurrent forward passes per model
+
+    Returns:
+        Threads per worker (at least 1)
+    """
+    budget = budget or config.MODEL_THREAD_BUDGET or os.cpu_count() or 1
+    workers_per_model = workers_per_model or config.MODEL_EXECUTOR_WORKERS
+    return max(1, budget // max(1, model_count * workers_per_model))
+
+
+class ModelExecutor:
+    """Bounded executor for one model, with pinned intra-op threads per worker."""
+
+    def __init__(self, model_key: str, max_workers: int, threads: int):
+        self.model_key = model_key
+        self.max_workers = max_workers
+        self.threads = threads
+        self._lock = threading.Lock()
+        self._stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'in_flight': 0,
+            'max_in_flight': 0,
+            'total_wait': 0.0,
+        }
+
+        initializer = _pin_intra_op_threads if _per_thread_counts_supported() else None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix=f"model-{model_key}",
+                                            initializer=initializer,
+                                            initargs=(threads,) if initializer else ())
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue a call on this model's workers."""
+        enqueued_at = time.perf_counter()
+
+        def run():
+            with self._lock:
+                self._stats['total_wait'] += time.perf_counter() - enqueued_at
+            return fn(*args, **kwargs)
+
+        with self._lock:
+            self._stats['submitted'] += 1
+            self._stats['in_flight'] += 1
+            self._stats['max_in_flight'] = max(self._stats['max_in_flight'], self._stats['in_flight'])
+
+        future = self._executor.submit(run)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future):
+        with self._lock:
+            self._stats['in_flight'] -= 1
+            if future.cancelled() or isinstance(future.exception(), CancelledError):
+                self._stats['cancelled'] += 1  # Abandoned before it started or ran (e.g. a settled quorum)
+            else:
+                self._stats['completed' if future.exception() is None else 'failed'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get concurrency, queueing and thread settings for this model."""
+        with self._lock:
+            stats = dict(self._stats)
+        finished = stats['completed'] + stats['failed']
+        return {
+            'workers': self.max_workers,
+            'threads_per_worker': self.threads,
+            'submitted': stats['submitted'],
+            'completed': stats['completed'],
+            'failed': stats['failed'],
+            'cancelled': stats['cancelled'],
+            'in_flight': stats['in_flight'],
+            'max_in_flight': stats['max_in_flight'],
+            'average_queue_wait': stats['total_wait'] / finished if finished else 0.0,
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and release the worker threads."""
+        self._executor.shutdown(wait=wait)
+
+
+class ExecutorPool:
+    """One ModelExecutor per model key, sized from a shared thread budget."""
+
+    def __init__(self, model_keys: Iterable[str], budget: Optional[int] = None,
+                 workers_per_model: Optional[int] = None):
+        model_keys = list(model_keys)
+        workers = workers_per_model or config.MODEL_EXECUTOR_WORKERS
+        threads = plan_thread_budget(len(model_keys), budget, workers)
+
+        self.executors = {key: ModelExecutor(key, workers, threads) for key in model_keys}
+
+        if not _per_thread_counts_supported():
+            logger.warning("torch is not using OpenMP; per-model thread budgets are not enforced")
+        logger.info(f"Model executors ready: {len(model_keys)} models x {workers} workers "
+                    f"x {threads} intra-op threads")
+
+    def submit(self, model_key: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue a call on the executor that owns ``model_key``."""
+        return self.executors[model_key].submit(fn, *args, **kwargs)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-model executor statistics."""
+        return {key: executor.get_stats() for key, executor in self.executors.items()}
+
+    def shutdown(self, wait: bool = True):
+        """Shut every model executor down."""
+        for executor in self.executors.values():
+            executor.shutdown(wait=wait)
@@ -0,0 +1,143 @@
+"""
+Tiered health checks for the sentiment service.
+
+Liveness never touches the model. Readiness is answered from a cache of the
+last inference (a real request or a periodic background probe), so probes
+from orchestrators and load balancers cost nothing. A deep check runs a real
+inference but is rate-limited internally, so callers cannot turn it into load.
+"""
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+from config.logging_config import get_logger
+
+# Initialize logger
+logger = get_logger('health')
+
+
+class HealthMonitor:
+    """Caches inference outcomes and runs background and rate-limited deep probes."""
+
+    def __init__(self, probe_fn: Callable[[], Any], ready_fn: Callable[[], bool],
+                 probe_interval: Optional[float] = None, deep_check_interval: Optional[float] = None,
+                 max_consecutive_failures: Optional[int] = None):
+        """
+        Args:
+            probe_fn: Runs one uncached inference (raises on failure)
+            ready_fn: Whether the model has loaded (probes never trigger a load)
+            probe_interval: Seconds of inference silence before a background probe
+                (defaults to config.HEALTH_PROBE_INTERVAL, 0 disables)
+            deep_check_interval: Minimum seconds between deep checks
+                (defaults to config.HEALTH_DEEP_CHECK_INTERVAL)
+            max_consecutive_failures: Failed inferences in a row before reporting unready
+                (defaults to config.HEALTH_MAX_CONSECUTIVE_FAILURES)
+        """
+        self.probe_fn = probe_fn
+        self.ready_fn = ready_fn
+        self.probe_interval = config.HEALTH_PROBE_INTERVAL if probe_interval is None else probe_interval
+        self.deep_check_interval = (config.HEALTH_DEEP_CHECK_INTERVAL
+                                    if deep_check_interval is None else deep_check_interval)
+        self.max_consecutive_failures = (config.HEALTH_MAX_CONSECUTIVE_FAILURES
+                                         if max_consecutive_failures is None else max_consecutive_failures)
+
+        self._lock = threading.Lock()
+        self._deep_lock = threading.Lock()
+        self._last = None
+        self._last_deep = None
+        self._consecutive_failures = 0
+        self._thread = None
+        self._stop = threading.Event()
+
+    def record(self, latency: float, ok: bool = True, error: Optional[str] = None, source: str = 'request'):
+        """Record the outcome of one inference."""
+        with self._lock:
+            self._last = {'ok': ok, 'latency': latency, 'at': time.time(), 'error': error, 'source': source}
+            self._consecutive_failures = 0 if ok else self._consecutive_failures + 1
+
+    def last_inference(self) -> Optional[Dict[str, Any]]:
+        """Outcome of the most recent inference, with its age in seconds."""
+        with self._lock:
+            if self._last is None:
+                return None
+            last = dict(self._last)
+        last['age'] = time.time() - last['at']
+        return last
+
+    def is_healthy(self) -> bool:
+        """Whether recent inferences succeed (no result yet counts as healthy)."""
+        with self._lock:
+            return self._consecutive_failures < self.max_consecutive_failures
+
+    def _probe(self, source: str) -> Dict[str, Any]:
+        start_time = time.perf_counter()
+        try:
+            self.probe_fn()
+            self.record(time.perf_counter() - start_time, source=source)
+        except Exception as e:
+            self.record(time.perf_counter() - start_time, ok=False, error=str(e), source=source)
+            logger.warning(f"Health {source} probe failed: {e}")
+        return self.last_inference()
+
+    def deep_check(self) -> Dict[str, Any]:
+        """
+        Run a real inference, at most once per deep_check_interval.
+
+        Calls inside the interval, or while another deep check is running,
+        get the previous deep-check result flagged as cached.
+        """
+        with self._lock:
+            last_deep = dict(self._last_deep) if self._last_deep else None
+        fresh = last_deep is not None and time.time() - last_deep['at'] < self.deep_check_interval
+
+        if fresh or not self._deep_lock.acquire(blocking=False):
+            if last_deep is None:
+                return {'ok': self.is_healthy(), 'cached': True, 'pending': True}
+            last_deep['cached'] = True
+            return last_deep
+
+        try:
+            result = self._probe('deep')
+            with self._lock:
+                self._last_deep = dict(result)
+            result['cached'] = False
+            return result
+        finally:
+            self._deep_lock.release()
+
+    def start(self) -> Optional[threading.Thread]:
+        """Start the background prober (no-op when probe_interval is 0)."""
+        if self.probe_interval <= 0:
+            return None
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='health-probe', daemon=True)
+                self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Stop the background prober."""
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.probe_interval):
+            last = self.last_inference()
+            if self.ready_fn() and (last is None or last['age'] >= self.probe_interval):
+                self._probe('background')
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the cached health summary used by the readiness and health endpoints."""
+        with self._lock:
+            failures = self._consecutive_failures
+        return {
+            'healthy': failures < self.max_consecutive_failures,
+            'consecutive_failures': failures,
+            'last_inference': self.last_inference(),
+            'probe_interval': self.probe_interval,
+        }
@@ -0,0 +1,139 @@
+"""
+Sliding-window inference for texts longer than the model's position limit.
+
+Instead of truncating at the model limit, every text is tokenized into
+overlapping windows of at most ``LONG_TEXT_WINDOW`` tokens (``LONG_TEXT_STRIDE``
+tokens shared between neighbours). Windows from every text of a call, and so
+from every request the micro-batcher coalesced into it, are grouped by length
+and run through the model in as few padded forward passes as the token budget
+allows. Each text's class probabilities are the token-weighted mean of its
+windows' probabilities, so cost grows linearly with length.
+"""
+import os
+import sys
+import threading
+from typing import Any, Dict, List, Optional
+
+import torch
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+from config.logging_config import get_logger
+from .batching import length_buckets
+from .direct_inference import DirectClassifier
+
+# Initialize logger
+logger = get_logger('long_text')
+
+
+class LongTextClassifier(DirectClassifier):
+    """Direct classifier that scores long texts window by window instead of truncating them."""
+
+    def __init__(self, pipe: Any, window: Optional[int] = None, stride: Optional[int] = None,
+                 max_tokens: Optional[int] = None):
+        """
+        Args:
+            pipe: Loaded text-classification pipeline
+            window: Tokens per window, special tokens included
+                (defaults to config.LONG_TEXT_WINDOW, capped at the model limit)
+            stride: Tokens shared by consecutive windows (defaults to config.LONG_TEXT_STRIDE)
+            max_tokens: Padded tokens per forward pass (defaults to config.BATCH_BUCKET_MAX_TOKENS)
+        """
+        super().__init__(pipe)
+        window = window or config.LONG_TEXT_WINDOW or self.max_length
+        self.window = min(window, self.max_length)
+        content = self.window - self.tokenizer.num_special_tokens_to_add()
+        stride = config.LONG_TEXT_STRIDE if stride is None else stride
+        self.stride = max(0, min(stride, content // 2))  # Every window must still advance
+        self.max_tokens = max_tokens or config.BATCH_BUCKET_MAX_TOKENS
+        self._lock = threading.Lock()
+        self._stats = {'texts': 0, 'windowed_texts': 0, 'windows': 0, 'forward_passes': 0}
+
+    def windows(self, texts: List[str]) -> Dict[str, Any]:
+        """
+        Tokenize texts into overlapping windows.
+
+        Returns:
+            Tokenizer encodings with one row per window, unpadded, where
+            ``overflow_to_sample_mapping`` gives the text each window came from
+        """
+        return self.tokenizer(list(texts), truncation=True, max_length=self.window, stride=self.stride,
+                              return_overflowing_tokens=True)
+
+    def predict_proba(self, texts: List[str]) -> torch.Tensor:
+        """
+        Class probabilities for a batch of texts of any length.
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            Float tensor of shape (len(texts), num_labels)
+        """
+        model = self.pipeline.model
+        encodings = self.windows(texts)
+        owners = torch.tensor(encodings.pop('overflow_to_sample_mapping'))
+        lengths = [len(ids) for ids in encodings['input_ids']]
+        buckets = length_buckets(lengths, len(lengths), self.max_tokens)
+
+        device = getattr(model, 'device', None)
+        probabilities = torch.empty(len(lengths), len(self.labels))
+        with torch.inference_mode():
+            for bucket in buckets:
+                batch = self.tokenizer.pad({key: [values[i] for i in bucket] for key, values in encodings.items()},
+                                           return_tensors='pt')
+                if device is not None:
+                    batch = batch.to(device)
+                logits = model(**batch).logits.float()
+                scores = torch.sigmoid(logits) if self.multi_label else torch.softmax(logits, dim=-1)
+                probabilities[bucket] = scores.cpu()
+
+        # Token-weighted mean over each text's windows
+        weights = torch.tensor(lengths, dtype=torch.float32)
+        totals = torch.zeros(len(texts), len(self.labels)).index_add_(0, owners, probabilities * weights[:, None])
+        mass = torch.zeros(len(texts)).index_add_(0, owners, weights)
+
+        with self._lock:
+            self._stats['texts'] += len(texts)
+            self._stats['windowed_texts'] += int((torch.bincount(owners, minlength=len(texts)) > 1).sum())
+            self._stats['windows'] += len(lengths)
+            self._stats['forward_passes'] += len(buckets)
+        return totals / mass[:, None]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get window geometry and window/pass counters."""
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            'enabled': True,
+            'window': self.window,
+            'stride': self.stride,
+            'max_tokens': self.max_tokens,
+            **stats,
+            'average_windows_per_text': stats['windows'] / stats['texts'] if stats['texts'] else 0.0,
+        }
+
+
+def long_text_variant() -> Optional[str]:
+    """Cache-key variant for the sliding-window settings, or None when texts are truncated."""
+    if not config.LONG_TEXT_MODE:
+        return None
+    return f"long_text:{config.LONG_TEXT_WINDOW}:{config.LONG_TEXT_STRIDE}"
+
+
+def build_classifier(pipe: Any) -> Optional[DirectClassifier]:
+    """
+    Direct classifier for a pipeline: sliding-window when config.LONG_TEXT_MODE is on.
+
+    Returns:
+        Classifier, or None when the pipeline cannot be bypassed (long texts are then
+        truncated by the pipeline)
+    """
+    if config.LONG_TEXT_MODE:
+        classifier = LongTextClassifier.from_pipeline(pipe)
+        if classifier is None:
+            logger.warning("Long-text mode needs a fast tokenizer and a torch model; long texts will be truncated")
+        return classifier
+    return DirectClassifier.from_pipeline(pipe)
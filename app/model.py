@@ -1,13 +1,31 @@
+import atexit
+import gc
 import os
 import sys
+import threading
+import time
+import torch
 from transformers import pipeline
-from typing import Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.config import config
 from config.logging_config import get_logger
+from .backends import backend_for, create_backend
+from .batching import MicroBatcher
+from .cache import (PredictionCache, get_prediction_store, iter_warmup_texts,
+                    model_fingerprint, text_hash)
+from .direct_inference import DirectClassifier
+from .early_exit import EarlyExitClassifier, ExitHeads, load_exit_heads
+from .evaluation import evaluate_predictions, load_eval_split
+from .executors import plan_thread_budget
+from .health import HealthMonitor
+from .long_text import LongTextClassifier, build_classifier, long_text_variant
+from .quantization import model_size_bytes
+from .tier0 import load_tier0
+from .weights import process_memory
 
 # Initialize logger
 logger = get_logger('model')
@@ -21,23 +39,54 @@ class ModelError(Exception):
 class SentimentAnalyzer:
     """Sentiment analysis model wrapper with error handling and caching."""
     
-    def __init__(self):
+    def __init__(self, pipe: Optional[Any] = None, model_name: Optional[str] = None,
+                 backend: Optional[str] = None, quantization: Optional[str] = None):
+        """
+        Args:
+            pipe: Already-loaded pipeline to serve instead of loading one
+                (e.g. a replica whose weights live in another process's shared memory)
+            model_name: Name pipe was loaded from (defaults to config.MODEL_NAME)
+            backend: Backend name (defaults to the configured backend)
+            quantization: Reduced-precision backend already applied to pipe, if any
+        """
         self.pipeline = None
-        self.model_name = config.MODEL_NAME
-        self._load_model()
+        self.model_name = model_name or config.MODEL_NAME
+        self.backend = create_backend(backend or self._backend_name())
+        self.quantization = None  # Name of the active reduced-precision backend, if any
+        self.quantization_report = {'requested': self.backend.name, 'active': False}
+        self.cache = PredictionCache() if config.PREDICTION_CACHE_ENABLED else None
+        self.store = get_prediction_store()
+        self.tier0 = load_tier0()  # Cheap linear model answering confident texts, if configured
+        self.inference_listener = None  # Called with (latency, ok=, error=) after every forward pass
+        self._direct = None
+        self._exit_threshold = config.EARLY_EXIT_THRESHOLD
+        self.exit_heads = load_exit_heads()  # Intermediate-layer classifiers for early exit, if configured
+        if pipe is None:
+            self._load_model()
+        else:
+            self._adopt_pipeline(pipe, quantization)
+    
+    def _adopt_pipeline(self, pipe: Any, quantization: Optional[str]):
+        """Serve a pipeline loaded elsewhere, re-applying backends that wrap rather than convert weights."""
+        self.pipeline = pipe
+        if self.backend.reduces_precision:
+            # The loading process already converted the weights and ran the accuracy guard
+            self.backend.active = quantization == self.backend.name
+        else:
+            self.backend.apply(pipe)  # TorchScript/compile wrap the shared weights in this process
+            self.backend.release_base()
+        self.quantization = quantization
+        self.quantization_report['active'] = quantization is not None
     
     def _load_model(self):
         """Load the sentiment analysis model with error handling and fallback."""
         try:
-            logger.info(f"Loading sentiment analysis model: {self.model_name}")
+            logger.info(f"Loading sentiment analysis model: {self.model_name} "
+                        f"(backend: {self.backend.name})")
             
             # Try loading the primary model first
             try:
-                self.pipeline = pipeline(
-                    "sentiment-analysis",
-                    model=self.model_name,
-                    top_k=1
-                )
+                self.pipeline = self.backend.load(self.model_name, pipeline_factory=pipeline, top_k=1)
                 logger.info("Primary model loaded successfully")
                 
             except Exception as primary_error:
@@ -46,14 +95,14 @@ class SentimentAnalyzer:
                 
                 # Fallback to a reliable model
                 fallback_model = "distilbert-base-uncased-finetuned-sst-2-english"
-                self.pipeline = pipeline(
-                    "sentiment-analysis",
-                    model=fallback_model,
-                    top_k=1
-                )
+                self.pipeline = self.backend.load(fallback_model, pipeline_factory=pipeline, top_k=1)
                 self.model_name = fallback_model  # Update model name for logging
                 logger.info("Fallback model loaded successfully")
             
+            if self.backend.reduces_precision:
+                self._guard_precision()
+            self.backend.release_base()
+            
             # Test the model with a simple prediction
             test_result = self.pipeline("This is a test.")
             logger.debug(f"Model test successful: {test_result}")
@@ -62,6 +111,145 @@ class SentimentAnalyzer:
             logger.error(f"Failed to load any sentiment analysis model: {e}")
             raise ModelError(f"Could not load sentiment analysis model: {e}")
     
+    def _guard_precision(self):
+        """
+        Keep a reduced-precision backend (INT8, bf16) only if accuracy holds.
+        
+        The backend's model stays active only if its macro-F1 on the evaluation
+        split is within config.QUANTIZATION_MAX_F1_DROP of the fp32 model.
+        Any failure reverts to the fp32 model.
+        """
+        backend = self.backend
+        report = self.quantization_report
+        if not backend.active:
+            report['reason'] = backend.fallback_reason
+            return
+        
+        precision = backend.precision
+        try:
+            optimized_model = self.pipeline.model
+            fp32_model = backend.base_model
+            report.update({
+                'engine': torch.backends.quantized.engine if precision == 'int8' else None,
+                'fp32_size_bytes': model_size_bytes(fp32_model),
+                f'{precision}_size_bytes': model_size_bytes(optimized_model)
+            })
+            
+            if config.QUANTIZATION_ACCURACY_GUARD:
+                texts, labels = load_eval_split(config.QUANTIZATION_EVAL_DATA,
+                                                limit=config.QUANTIZATION_EVAL_SAMPLES)
+                self.pipeline.model = fp32_model
+                baseline = evaluate_predictions(self._run_pipeline, texts, labels)
+                self.pipeline.model = optimized_model
+                optimized = evaluate_predictions(self._run_pipeline, texts, labels)
+                
+                drop = baseline['macro_f1'] - optimized['macro_f1']
+                report.update({
+                    'fp32_macro_f1': baseline['macro_f1'],
+                    f'{precision}_macro_f1': optimized['macro_f1'],
+                    'fp32_latency_per_text': baseline['latency_per_text'],
+                    f'{precision}_latency_per_text': optimized['latency_per_text'],
+                    'eval_examples': baseline['examples']
+                })
+                logger.info(f"{precision} accuracy guard: macro-F1 {baseline['macro_f1']:.4f} -> "
+                            f"{optimized['macro_f1']:.4f} on {baseline['examples']} examples")
+                
+                if drop > config.QUANTIZATION_MAX_F1_DROP:
+                    report['reason'] = (f"macro-F1 drop {drop:.4f} exceeds "
+                                        f"{config.QUANTIZATION_MAX_F1_DROP:.4f}")
+                    logger.warning(f"Refusing {backend.name} backend: {report['reason']}")
+                    backend.revert(self.pipeline)
+                    return
+            
+            self.quantization = backend.name
+            report['active'] = True
+            logger.info(f"{backend.name} backend active ({report['fp32_size_bytes'] / 1e6:.1f}MB -> "
+                        f"{report[f'{precision}_size_bytes'] / 1e6:.1f}MB)")
+            
+        except Exception as e:
+            report['reason'] = str(e)
+            backend.revert(self.pipeline)
+            logger.warning(f"{backend.name} backend unavailable, serving fp32: {e}")
+    
+    def _call_pipeline(self, inputs, **kwargs):
+        """Run the pipeline and record its latency with the active backend."""
+        start_time = time.perf_counter()
+        outputs = self.pipeline(inputs, **kwargs)
+        self.backend.record(time.perf_counter() - start_time,
+                            len(inputs) if isinstance(inputs, list) else 1)
+        return outputs
+    
+    @staticmethod
+    def _backend_name() -> str:
+        """Configured backend; MODEL_QUANTIZATION=dynamic_int8 is kept as an alias."""
+        if config.MODEL_QUANTIZATION == 'dynamic_int8':
+            return 'dynamic_int8'
+        if config.MODEL_QUANTIZATION not in ('none', ''):
+            logger.warning(f"Unknown MODEL_QUANTIZATION '{config.MODEL_QUANTIZATION}', ignoring")
+        return backend_for('default')
+    
+    def _run_pipeline(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """Run the model on a batch without consulting the prediction caches."""
+        return self._infer(list(texts))
+    
+    @property
+    def exit_heads(self) -> Optional[ExitHeads]:
+        """Exit heads used for early exit, or None to run every layer."""
+        return self._exit_heads
+    
+    @exit_heads.setter
+    def exit_heads(self, heads: Optional[ExitHeads]):
+        self._exit_heads = heads
+        self._exit_heads_digest = heads.digest() if heads is not None else None
+        self._direct = None  # Rebuilt for the new heads on the next inference
+    
+    @property
+    def exit_threshold(self) -> float:
+        """Normalized prediction entropy below which a text exits at an intermediate layer (0 = never)."""
+        return self._exit_threshold
+    
+    @exit_threshold.setter
+    def exit_threshold(self, threshold: float):
+        if not 0.0 <= threshold <= 1.0:
+            raise ValueError(f"Exit threshold must be between 0 and 1, got {threshold}")
+        self._exit_threshold = threshold
+        if isinstance(self._direct, EarlyExitClassifier):
+            self._direct.threshold = threshold
+    
+    def _direct_classifier(self) -> Optional[DirectClassifier]:
+        """Direct logits path for the current pipeline, if it can bypass the pipeline."""
+        early_exit = self.exit_heads is not None and not config.LONG_TEXT_MODE
+        if not (config.DIRECT_INFERENCE or config.LONG_TEXT_MODE or early_exit):
+            return None
+        if self._direct is None or self._direct.pipeline is not self.pipeline:
+            self._direct = None
+            if early_exit:
+                self._direct = EarlyExitClassifier.from_pipeline(self.pipeline, self.exit_heads, self._exit_threshold)
+            if self._direct is None:
+                self._direct = build_classifier(self.pipeline)
+        return self._direct
+    
+    def _infer(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """
+        Run one forward pass over a batch of texts.
+        
+        Uses the direct logits path when available, otherwise the pipeline.
+        
+        Returns:
+            List of (sentiment_label, confidence_score) in input order
+        """
+        direct = self._direct_classifier()
+        if direct is None:
+            outputs = self._call_pipeline(texts, batch_size=len(texts))
+            if not outputs or len(outputs) != len(texts):
+                raise ModelError("Model returned an incomplete batch prediction")
+            return [self._parse_result(output) for output in outputs]
+        
+        start_time = time.perf_counter()
+        results = [(self._map_sentiment_label(label), score) for label, score, _ in direct.classify(texts)]
+        self.backend.record(time.perf_counter() - start_time, len(texts))
+        return results
+    
     def predict(self, text: str) -> Tuple[str, float]:
         """
         Predict sentiment for given text.
@@ -79,36 +267,223 @@ class SentimentAnalyzer:
             if not self.pipeline:
                 raise ModelError("Model not loaded")
             
+            cache_keys = self._cache_keys([text])
+            cached = self._lookup_cached(cache_keys)[0]
+            if cached is not None:
+                logger.debug("Prediction served from cache")
+                return cached
+            
+            if self.tier0 is not None:
+                answer = self.tier0.answer([text])[0]
+                if answer is not None:
+                    logger.debug("Prediction served by the tier-0 classifier")
+                    return answer
+            
             logger.debug(f"Running sentiment prediction on text of length {len(text)}")
             
             # Run prediction
-            output = self.pipeline(text)
+            start_time = time.perf_counter()
+            try:
+                if self._direct_classifier() is not None:
+                    sentiment, score = self._infer([text])[0]
+                else:
+                    output = self._call_pipeline(text)
+                    
+                    if not output or len(output) == 0:
+                        raise ModelError("Model returned empty prediction")
+                    
+                    sentiment, score = self._parse_result(output)
+            except Exception as e:
+                self._report_inference(start_time, e)
+                raise
+            self._report_inference(start_time)
             
-            if not output or len(output) == 0:
-                raise ModelError("Model returned empty prediction")
+            logger.debug(f"Prediction completed: {sentiment} (confidence: {score:.3f})")
             
-            # Handle different output formats from different models
-            if isinstance(output[0], list):
-                # Some models return nested lists
-                result = output[0][0] if output[0] else output[0]
-            else:
-                # Standard format
-                result = output[0]
+            self._remember(cache_keys, [(sentiment, score)])
             
-            raw_label = result["label"]
-            score = result["score"]
+            return sentiment, score
             
-            # Map model labels to human-readable labels
-            sentiment = self._map_sentiment_label(raw_label)
+        except Exception as e:
+            logger.error(f"Prediction failed: {e}")
+            raise ModelError(f"Sentiment prediction failed: {e}")
+    
+    def predict_batch(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """
+        Predict sentiment for several texts in a single batched forward pass.
+        
+        Args:
+            texts: Input texts to analyze
             
-            logger.debug(f"Prediction completed: {sentiment} (confidence: {score:.3f})")
+        Returns:
+            List of (sentiment_label, confidence_score) tuples in input order
+            
+        Raises:
+            ModelError: If prediction fails
+        """
+        try:
+            if not self.pipeline:
+                raise ModelError("Model not loaded")
+            
+            if not texts:
+                return []
             
-            return sentiment, float(score)
+            cache_keys = self._cache_keys(texts)
+            results = self._lookup_cached(cache_keys)
+            
+            pending = [i for i, result in enumerate(results) if result is None]
+            if pending and self.tier0 is not None:
+                for i, answer in zip(pending, self.tier0.answer([texts[i] for i in pending])):
+                    results[i] = answer
+                pending = [i for i in pending if results[i] is None]
+            if not pending:
+                return results
+            
+            logger.debug(f"Running batched sentiment prediction on {len(pending)} texts "
+                         f"({len(texts) - len(pending)} served from cache or tier 0)")
+            
+            start_time = time.perf_counter()
+            try:
+                inferred = self._infer([texts[i] for i in pending])
+            except Exception as e:
+                self._report_inference(start_time, e)
+                raise
+            self._report_inference(start_time)
+            
+            for i, result in zip(pending, inferred):
+                results[i] = result
+            
+            self._remember([cache_keys[i] for i in pending], [results[i] for i in pending])
+            
+            return results
             
         except Exception as e:
-            logger.error(f"Prediction failed: {e}")
+            logger.error(f"Batch prediction failed: {e}")
             raise ModelError(f"Sentiment prediction failed: {e}")
     
+    def _report_inference(self, start_time: float, error: Optional[Exception] = None):
+        """Tell the inference listener about a forward pass (cache and tier-0 answers are not reported)."""
+        if self.inference_listener is not None:
+            self.inference_listener(time.perf_counter() - start_time, ok=error is None,
+                                    error=None if error is None else str(error))
+    
+    def _model_revision(self) -> Optional[str]:
+        """Revision (commit hash) of the loaded model weights, if known."""
+        model = getattr(self.pipeline, 'model', None)
+        revision = getattr(getattr(model, 'config', None), '_commit_hash', None)
+        return revision if isinstance(revision, str) else None
+    
+    @property
+    def fingerprint(self) -> str:
+        """Fingerprint of the loaded model, used to key cached predictions."""
+        # Truncated and windowed predictions of long texts differ, so they never share entries;
+        # early-exit answers depend on the heads and the threshold
+        early_exit = None
+        if self._exit_heads is not None and not config.LONG_TEXT_MODE and self._exit_threshold > 0:
+            early_exit = f"early_exit:{self._exit_heads_digest}:{self._exit_threshold}"
+        variant = ';'.join(part for part in (self.quantization, long_text_variant(), early_exit) if part)
+        return model_fingerprint(self.model_name, self._model_revision(), variant or None)
+    
+    def _cache_keys(self, texts: List[str]) -> List[Optional[Tuple[str, str]]]:
+        """(fingerprint, text hash) key per text, or Nones when caching is off."""
+        if self.cache is None and self.store is None:
+            return [None] * len(texts)
+        fingerprint = self.fingerprint
+        return [(fingerprint, text_hash(text)) for text in texts]
+    
+    def _lookup_cached(self, cache_keys: List[Optional[Tuple[str, str]]]) -> List[Optional[Tuple[str, float]]]:
+        """Look keys up in the in-process cache, then in the shared on-disk store."""
+        results = [None] * len(cache_keys)
+        
+        if self.cache is not None:
+            for i, key in enumerate(cache_keys):
+                if key is not None:
+                    results[i] = self.cache.get(key)
+        
+        if self.store is not None:
+            missing = [i for i, key in enumerate(cache_keys) if key is not None and results[i] is None]
+            if missing:
+                found = self.store.get_many(cache_keys[missing[0]][0],
+                                            [cache_keys[i][1] for i in missing])
+                for i in missing:
+                    hit = found.get(cache_keys[i][1])
+                    if hit is not None:
+                        results[i] = hit
+                        if self.cache is not None:
+                            self.cache.set(cache_keys[i], hit)
+        
+        return results
+    
+    def _remember(self, cache_keys: List[Optional[Tuple[str, str]]], results: List[Tuple[str, float]]):
+        """Write freshly computed predictions to both cache tiers."""
+        entries = [(key, result) for key, result in zip(cache_keys, results) if key is not None]
+        if not entries:
+            return
+        
+        if self.cache is not None:
+            for key, result in entries:
+                self.cache.set(key, result)
+        
+        if self.store is not None:
+            self.store.set_many(entries[0][0][0],
+                                [(key[1], label, score) for key, (label, score) in entries])
+    
+    def warm_cache(self, path: str) -> int:
+        """
+        Pre-warm the prediction caches by replaying a JSONL request log.
+        
+        Args:
+            path: JSONL file of request bodies (see cache.iter_warmup_texts)
+            
+        Returns:
+            Number of texts replayed
+        """
+        replayed = 0
+        chunk = []
+        chunk_size = max(config.BATCH_BUCKET_SIZE, config.MODEL_BATCH_SIZE)
+        
+        try:
+            for text in iter_warmup_texts(path):
+                chunk.append(text[:config.MAX_TEXT_LENGTH])
+                if len(chunk) >= chunk_size:
+                    self.predict_batch(chunk)
+                    replayed += len(chunk)
+                    chunk = []
+            if chunk:
+                self.predict_batch(chunk)
+                replayed += len(chunk)
+        except (OSError, ModelError) as e:
+            logger.warning(f"Cache warm-up from {path} stopped after {replayed} texts: {e}")
+        
+        logger.info(f"Cache warm-up replayed {replayed} texts from {path}")
+        return replayed
+    
+    def _parse_result(self, output) -> Tuple[str, float]:
+        """
+        Extract the mapped label and score from one pipeline output.
+        
+        Args:
+            output: Pipeline output for a single text
+            
+        Returns:
+            Tuple of (sentiment_label, confidence_score)
+        """
+        # Handle different output formats from different models
+        if isinstance(output, list):
+            if not output:
+                raise ModelError("Model returned empty prediction")
+            # Some models return nested lists
+            result = output[0][0] if isinstance(output[0], list) and output[0] else output[0]
+        else:
+            # Standard format
+            result = output
+        
+        raw_label = result["label"]
+        score = result["score"]
+        
+        # Map model labels to human-readable labels
+        return self._map_sentiment_label(raw_label), float(score)
+    
     def _map_sentiment_label(self, label: str) -> str:
         """
         Map model output labels to human-readable sentiment labels.
@@ -151,22 +526,223 @@ class SentimentAnalyzer:
 
 # Global model instance
 _sentiment_analyzer = None
+_model_lock = threading.Lock()
+_model_ready = threading.Event()
+_load_status = {'state': 'not_started', 'error': None, 'started_at': None, 'load_time': None}
+_loader_thread = None
+_loader_lock = threading.Lock()
+
+# Global micro-batcher (created on first use when batching is enabled)
+_batcher = None
+_batcher_lock = threading.Lock()
+
+# Global replica pool (started with the model when config.MODEL_REPLICAS > 1)
+_replica_pool = None
 
 
 def get_model() -> SentimentAnalyzer:
-    """Get or create the global sentiment analyzer instance."""
+    """
+    Get or create the global sentiment analyzer instance.
+    
+    Initialization is single-flight: concurrent callers wait for one load
+    instead of each constructing their own analyzer.
+    """
     global _sentiment_analyzer
     
-    if _sentiment_analyzer is None:
-        _sentiment_analyzer = SentimentAnalyzer()
+    if _sentiment_analyzer is not None:
+        return _sentiment_analyzer
+    
+    with _model_lock:
+        if _sentiment_analyzer is None:
+            start_time = time.perf_counter()
+            if _load_status['state'] != 'loading':
+                _load_status.update(state='loading', error=None, started_at=time.time())
+            try:
+                analyzer = SentimentAnalyzer()
+                analyzer.inference_listener = _health_monitor.record
+                
+                if config.PREDICTION_STORE_WARMUP_FILE:
+                    analyzer.warm_cache(config.PREDICTION_STORE_WARMUP_FILE)
+            except Exception as e:
+                _load_status.update(state='failed', error=str(e))
+                raise
+            
+            if config.MODEL_REPLICAS > 1 and config.MODEL_PRELOAD:
+                logger.warning("MODEL_REPLICAS is ignored when preloading for forked workers")
+            elif config.MODEL_REPLICAS > 1:
+                _start_replicas(analyzer)
+            _sentiment_analyzer = analyzer
+            _load_status.update(state='ready', load_time=time.perf_counter() - start_time)
+            _model_ready.set()
     
     return _sentiment_analyzer
 
 
+def _start_replicas(analyzer: SentimentAnalyzer):
+    """Start the replica pool, serving in-process if the replicas cannot start."""
+    global _replica_pool
+    
+    from .replicas import ReplicaPool
+    
+    try:
+        _replica_pool = ReplicaPool(analyzer)
+        atexit.register(_replica_pool.close)
+    except Exception as e:
+        logger.error(f"Inference replicas unavailable, serving in-process: {e}")
+
+
+def get_replica_pool():
+    """Get the replica pool, or None when requests are served in-process."""
+    return _replica_pool
+
+
+def _predict_batch(texts: List[str]) -> List[Tuple[str, float]]:
+    """Batch prediction on a replica when replicas are running, otherwise in-process."""
+    analyzer = get_model()
+    if _replica_pool is not None:
+        return _replica_pool.predict_batch(texts)
+    return analyzer.predict_batch(texts)
+
+
+def preload_model() -> SentimentAnalyzer:
+    """
+    Load the global model in the master process before workers are forked.
+    
+    The master runs torch single-threaded: an OpenMP thread pool started
+    before the fork does not exist in the children, and a worker's first
+    parallel forward pass can wait on it forever. Workers raise their own
+    thread count after the fork (see init_worker_process).
+    
+    Everything allocated so far is moved out of the garbage collector's reach,
+    so collections in the workers do not write to (and un-share) the pages
+    inherited from the master.
+    
+    Returns:
+        The loaded analyzer
+    """
+    torch.set_num_threads(1)
+    analyzer = get_model()
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Preloaded sentiment model; {gc.get_freeze_count()} objects frozen for forked workers")
+    return analyzer
+
+
+def init_worker_process(workers: int):
+    """
+    Set up a worker forked from a preloading master.
+    
+    Threads do not survive a fork, so the health monitor starts here, and each
+    worker takes its share of the torch thread budget (the master preloads
+    with a single thread).
+    
+    Args:
+        workers: Number of worker processes on this host
+    """
+    torch.set_num_threads(plan_thread_budget(workers, workers_per_model=1))
+    _health_monitor.start()
+    logger.info(f"Worker {os.getpid()} ready ({torch.get_num_threads()} torch threads)")
+
+
+def _background_load():
+    try:
+        get_model()
+        logger.info(f"Background model load finished in {_load_status['load_time']:.2f}s")
+    except Exception as e:
+        logger.error(f"Background model load failed: {e}")
+
+
+def start_background_load() -> threading.Thread:
+    """
+    Load the global model in a background thread so the server can bind at once.
+    
+    Returns:
+        The loader thread (the same thread on repeated calls)
+    """
+    global _loader_thread
+    
+    with _loader_lock:
+        if _loader_thread is None:
+            if _sentiment_analyzer is None:
+                _load_status.update(state='loading', started_at=time.time())
+            _loader_thread = threading.Thread(target=_background_load, name='model-loader', daemon=True)
+            _loader_thread.start()
+            logger.info("Loading sentiment model in the background")
+    
+    return _loader_thread
+
+
+def is_model_ready() -> bool:
+    """Whether the global model has finished loading."""
+    return _model_ready.is_set()
+
+
+def wait_for_model(timeout: Optional[float] = None) -> bool:
+    """
+    Wait for a model that is loading in the background.
+    
+    Args:
+        timeout: Seconds to wait at most
+        
+    Returns:
+        False if the model is still loading after the timeout, True otherwise
+        (including when nothing is loading, in which case callers load on demand)
+    """
+    if _model_ready.is_set() or _load_status['state'] != 'loading':
+        return True
+    return _model_ready.wait(timeout) or _load_status['state'] != 'loading'
+
+
+def get_load_status() -> Dict[str, Any]:
+    """Get the global model's load state ('not_started', 'loading', 'ready' or 'failed')."""
+    status = dict(_load_status)
+    status['ready'] = _model_ready.is_set()
+    return status
+
+
+def _health_probe():
+    """Uncached inference used by health probes."""
+    get_model()._run_pipeline(["This is a test."])
+
+
+# Global health monitor (caches the outcome of recent inferences for probes)
+_health_monitor = HealthMonitor(_health_probe, is_model_ready)
+
+
+def get_health_monitor() -> HealthMonitor:
+    """Get the global health monitor."""
+    return _health_monitor
+
+
+def get_batcher() -> Optional[MicroBatcher]:
+    """
+    Get or create the global micro-batcher.
+    
+    Returns:
+        The shared MicroBatcher, or None when config.MODEL_BATCH_SIZE <= 1
+        (request coalescing disabled)
+    """
+    global _batcher
+    
+    if config.MODEL_BATCH_SIZE <= 1:
+        return None
+    
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = MicroBatcher(_predict_batch)
+            logger.info(f"Request coalescing enabled (max batch {_batcher.max_batch_size}, "
+                        f"max wait {_batcher.max_wait * 1000:.1f}ms)")
+    
+    return _batcher
+
+
 def predict(text: str) -> Tuple[str, float]:
     """
     Convenience function for sentiment prediction.
     
+    Concurrent calls are coalesced into batched forward passes when
+    config.MODEL_BATCH_SIZE is greater than 1.
+    
     Args:
         text: Input text to analyze
         
@@ -176,5 +752,47 @@ def predict(text: str) -> Tuple[str, float]:
     Raises:
         ModelError: If prediction fails
     """
-    model = get_model()
-    return model.predict(text)
+    batcher = get_batcher()
+    if batcher is not None:
+        start_time = time.perf_counter()
+        try:
+            return batcher.submit(text)
+        except TimeoutError as e:
+            # A stuck forward pass never reports itself, so the wait counts as a failed inference
+            _health_monitor.record(time.perf_counter() - start_time, ok=False, error=str(e))
+            raise ModelError(f"Sentiment prediction timed out: {e}")
+    
+    analyzer = get_model()
+    return _replica_pool.predict(text) if _replica_pool is not None else analyzer.predict(text)
+
+
+def get_inference_stats() -> Dict[str, Any]:
+    """
+    Get serving statistics for the inference path.
+    
+    Returns:
+        Dict with backend latency/memory and quantization status, request-coalescing queue depth and
+        batch-size histograms, prediction cache / shared store counters, tier-0 coverage, replica load,
+        sliding-window and early-exit counters and this process's shared/private resident memory
+    """
+    batcher = get_batcher()
+    analyzer = _sentiment_analyzer
+    cache = analyzer.cache if analyzer is not None else None
+    store = get_prediction_store()
+    return {
+        'backend': analyzer.backend.get_stats() if analyzer is not None else {'loaded': False},
+        'quantization': analyzer.quantization_report if analyzer is not None else {'active': False},
+        'batching': batcher.get_stats() if batcher is not None else {'enabled': False},
+        'cache': cache.get_stats() if cache is not None else {'enabled': False},
+        'store': store.get_stats() if store is not None else {'enabled': False},
+        'replicas': _replica_pool.get_stats() if _replica_pool is not None else {'enabled': False},
+        'tier0': (analyzer.tier0.get_stats() if analyzer is not None and analyzer.tier0 is not None
+                  else {'enabled': False}),
+        'long_text': (analyzer._direct.get_stats()
+                      if analyzer is not None and isinstance(analyzer._direct, LongTextClassifier)
+                      else {'enabled': False}),
+        'early_exit': (analyzer._direct.get_stats()
+                       if analyzer is not None and isinstance(analyzer._direct, EarlyExitClassifier)
+                       else {'enabled': False}),
+        'memory': process_memory()
+    }
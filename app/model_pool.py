@@ -0,0 +1,269 @@
+"""
+Lazy, memory-budgeted model pool.
+
+Models are loaded on first use (several at once when a request needs more than
+one), each load is single-flight per model, and once the weights of the loaded
+models exceed the configured budget the least-recently-used models are unloaded.
+Models held by a caller (between ``acquire`` and ``release``) are never unloaded.
+
+The budget counts parameter and buffer bytes as reported by the loader, not
+process RSS: tokenizers, activations, allocator slack and worker processes come
+on top, so leave headroom when sizing it against the memory limit.
+"""
+import gc
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+from config.logging_config import get_logger
+
+# Initialize logger
+logger = get_logger('model_pool')
+
+UNLOADED = 'unloaded'
+LOADING = 'loading'
+LOADED = 'loaded'
+UNLOADING = 'unloading'
+FAILED = 'failed'
+
+
+class _PoolEntry:
+    """Load state and accounting for one model key."""
+
+    __slots__ = ('state', 'memory_bytes', 'last_used', 'load_time', 'loads',
+                 'evictions', 'error', 'failed_at', 'loading', 'in_use')
+
+    def __init__(self):
+        self.state = UNLOADED
+        self.memory_bytes = 0
+        self.last_used = None
+        self.load_time = None
+        self.loads = 0
+        self.evictions = 0
+        self.error = None
+        self.failed_at = None
+        self.loading = None  # Event set when an in-progress load or unload finishes
+        self.in_use = 0  # Callers holding the model; never evicted while above 0
+
+
+class ModelPool:
+    """Loads models on demand and unloads least-recently-used ones over budget."""
+
+    def __init__(self, model_keys: Iterable[str], loader: Callable[[str], int],
+                 unloader: Callable[[str], None], memory_budget_mb: Optional[float] = None,
+                 retry_after: Optional[float] = None):
+        """
+        Args:
+            model_keys: Keys of every model the pool may load
+            loader: Loads a model and returns its resident memory in bytes
+            unloader: Drops every reference the owner holds to a model
+            memory_budget_mb: Budget for the weights of loaded models, not their full RSS
+                (defaults to config.MODEL_POOL_MEMORY_MB, 0 = unlimited)
+            retry_after: Seconds before a failed model is retried (defaults to config.MODEL_POOL_RETRY_AFTER)
+        """
+        self._entries = {key: _PoolEntry() for key in model_keys}
+        self._loader = loader
+        self._unloader = unloader
+        budget_mb = config.MODEL_POOL_MEMORY_MB if memory_budget_mb is None else memory_budget_mb
+        self.memory_budget = int(budget_mb * 1024 * 1024)
+        self.retry_after = config.MODEL_POOL_RETRY_AFTER if retry_after is None else retry_after
+        self._lock = threading.Lock()
+        self._load_executor = ThreadPoolExecutor(max_workers=max(1, len(self._entries)),
+                                                 thread_name_prefix='model-loader')
+
+    def acquire(self, keys: Iterable[str]) -> List[str]:
+        """
+        Make models resident, loading missing ones in parallel, and hold them.
+
+        Held models are never evicted, so the budget may be exceeded while
+        requests need more models than fit. Every call must be paired with
+        ``release`` of the returned keys (see ``using``).
+
+        Args:
+            keys: Model keys needed by the caller
+
+        Returns:
+            The requested keys that are loaded and now held, in request order
+        """
+        keys = [key for key in dict.fromkeys(keys) if key in self._entries]
+        held = set()
+
+        while True:
+            missing = [key for key in keys if key not in held and self._entries[key].state != LOADED]
+            if len(missing) == 1:
+                self._load(missing[0])
+            elif missing:
+                list(self._load_executor.map(self._load, missing))
+
+            now = time.time()
+            with self._lock:
+                for key in keys:
+                    entry = self._entries[key]
+                    if key not in held and entry.state == LOADED:
+                        entry.in_use += 1
+                        entry.last_used = now
+                        held.add(key)
+                # A model evicted by another caller between its load and here is loaded again
+                retry = any(key not in held and self._entries[key].state in (UNLOADED, UNLOADING) for key in keys)
+                victims = [] if retry else self._select_evictions()
+            if not retry:
+                break
+
+        self._unload_all(victims)
+        return [key for key in keys if key in held]
+
+    def release(self, keys: Iterable[str]):
+        """Stop holding models returned by ``acquire``, evicting over budget now they are free."""
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                entry = self._entries[key]
+                entry.in_use = max(0, entry.in_use - 1)
+            victims = self._select_evictions()
+        self._unload_all(victims)
+
+    @contextmanager
+    def using(self, keys: Iterable[str]) -> Iterator[List[str]]:
+        """Hold models for the duration of a ``with`` block; yields the keys that loaded."""
+        loaded = self.acquire(keys)
+        try:
+            yield loaded
+        finally:
+            self.release(loaded)
+
+    def is_loaded(self, key: str) -> bool:
+        """Whether a model is currently resident."""
+        entry = self._entries.get(key)
+        return entry is not None and entry.state == LOADED
+
+    def is_available(self, key: str) -> bool:
+        """Whether a model is resident or may still be loaded."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        return entry.state != FAILED or time.time() - entry.failed_at >= self.retry_after
+
+    def _load(self, key: str):
+        """Load one model; concurrent callers for the same key wait for a single load."""
+        entry = self._entries[key]
+        with self._lock:
+            if entry.state == LOADED or not self.is_available(key):
+                return
+            if entry.loading is not None:
+                waiter = entry.loading
+            else:
+                waiter = None
+                entry.loading = threading.Event()
+                entry.state = LOADING
+
+        if waiter is not None:
+            # Another load (or an unload, after which the caller retries) is in progress
+            waiter.wait()
+            return
+
+        start_time = time.perf_counter()
+        try:
+            memory_bytes = self._loader(key)
+            with self._lock:
+                entry.state = LOADED
+                entry.memory_bytes = memory_bytes
+                entry.load_time = time.perf_counter() - start_time
+                entry.loads += 1
+                entry.error = None
+            logger.info(f"Model pool loaded {key} ({memory_bytes / 1e6:.1f}MB in {entry.load_time:.2f}s)")
+        except Exception as e:
+            with self._lock:
+                entry.state = FAILED
+                entry.error = str(e)
+                entry.failed_at = time.time()
+            logger.warning(f"Model pool failed to load {key}: {e}")
+        finally:
+            with self._lock:
+                event, entry.loading = entry.loading, None
+            event.set()
+
+    def unload(self, key: str):
+        """Unload a resident model."""
+        with self._lock:
+            victims = [key] if self._begin_unload(key) else []
+        self._unload_all(victims)
+
+    def _begin_unload(self, key: str) -> bool:
+        """Mark a loaded model as unloading so no caller can take it (lock held)."""
+        entry = self._entries[key]
+        if entry.state != LOADED or entry.in_use:
+            return False
+        entry.state = UNLOADING
+        entry.memory_bytes = 0
+        entry.loading = threading.Event()
+        return True
+
+    def _unload_all(self, keys: List[str]):
+        """Run the unloader for models marked by _begin_unload, outside the pool lock."""
+        for key in keys:
+            entry = self._entries[key]
+            try:
+                self._unloader(key)
+            except Exception as e:
+                logger.warning(f"Model pool failed to unload {key} cleanly: {e}")
+            with self._lock:
+                entry.state = UNLOADED
+                entry.evictions += 1
+                event, entry.loading = entry.loading, None
+            event.set()
+            logger.info(f"Model pool unloaded {key}")
+
+        if keys:
+            gc.collect()
+
+    def _select_evictions(self) -> List[str]:
+        """Mark least-recently-used models not in use for unloading until the budget holds (lock held)."""
+        if self.memory_budget <= 0:
+            return []
+
+        victims = []
+        while self._resident_bytes() > self.memory_budget:
+            candidates = [(entry.last_used or 0, key) for key, entry in self._entries.items()
+                          if entry.state == LOADED and not entry.in_use]
+            if not candidates:
+                break
+            key = min(candidates)[1]
+            self._begin_unload(key)
+            victims.append(key)
+
+        return victims
+
+    def _resident_bytes(self) -> int:
+        return sum(entry.memory_bytes for entry in self._entries.values() if entry.state == LOADED)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-model state, memory and last-used time, plus pool totals."""
+        with self._lock:
+            models = {
+                key: {
+                    'state': entry.state,
+                    'memory_bytes': entry.memory_bytes,
+                    'last_used': entry.last_used,
+                    'load_time': entry.load_time,
+                    'loads': entry.loads,
+                    'evictions': entry.evictions,
+                    'in_use': entry.in_use,
+                    'error': entry.error,
+                }
+                for key, entry in self._entries.items()
+            }
+            resident = self._resident_bytes()
+
+        return {
+            'memory_budget_bytes': self.memory_budget,
+            'resident_bytes': resident,
+            'loaded': sum(1 for m in models.values() if m['state'] == LOADED),
+            'models': models,
+        }
@@ -0,0 +1,264 @@
+"""
+Comparison models hosted in their own processes.
+
+With process isolation on, every comparison model loads in a dedicated
+process pinned to its own CPU set, so models no longer contend for one GIL
+and one torch thread pool, and a model that runs out of memory takes down only
+its own process. The parent keeps a ModelProcess handle that behaves like the
+model's pipeline (callable, with ``tokenizer`` and ``model.config``) and
+forwards each call over a pipe. A model process that dies fails its in-flight
+call and is started again on the next one.
+"""
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional
+
+import torch
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+from config.logging_config import get_logger
+from .backends import create_backend
+from .model import ModelError
+
+# Initialize logger
+logger = get_logger('model_processes')
+
+
+def available_cpus() -> List[int]:
+    """CPUs this process may run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def parse_cpu_list(value: str) -> List[int]:
+    """Parse a Linux cpulist such as ``0-3,8``."""
+    cpus = set()
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-', 1)
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def plan_cpu_sets(model_keys: Iterable[str], spec: Optional[str] = None,
+                  cpus: Optional[List[int]] = None) -> Dict[str, List[int]]:
+    """
+    Assign each model a CPU set.
+
+    Args:
+        model_keys: Models to place
+        spec: Explicit sets, e.g. "primary=0-1;finbert=6,7" (defaults to config.MODEL_PROCESS_CPUS)
+        cpus: CPUs to share out among models without an explicit set (defaults to the usable CPUs)
+
+    Returns:
+        Model key to sorted CPU list. The remaining CPUs are split into contiguous,
+        equal, disjoint shares; with fewer CPUs than models, models share CPUs round-robin.
+    """
+    model_keys = list(model_keys)
+    spec = config.MODEL_PROCESS_CPUS if spec is None else spec
+    cpus = sorted(cpus if cpus is not None else available_cpus())
+
+    cpu_sets = {}
+    for entry in spec.split(';'):
+        key, _, value = entry.partition('=')
+        if key.strip() in model_keys and value.strip():
+            cpu_sets[key.strip()] = parse_cpu_list(value)
+
+    remaining_keys = [key for key in model_keys if key not in cpu_sets]
+    claimed = {cpu for cpu_set in cpu_sets.values() for cpu in cpu_set}
+    free = [cpu for cpu in cpus if cpu not in claimed] or cpus
+    share = len(free) // len(remaining_keys) if remaining_keys else 0
+    for index, key in enumerate(remaining_keys):
+        if share:
+            cpu_sets[key] = free[index * share:(index + 1) * share]
+        else:
+            cpu_sets[key] = [free[index % len(free)]]
+    return cpu_sets
+
+
+def _model_process_main(model_key: str, model_name: str, backend_name: str, cpus: List[int],
+                        direct_inference: bool, connection: Any):
+    """Model process: pin to the CPU set, load the model and answer batches until told to stop."""
+    from transformers import pipeline
+
+    from .advanced_model import run_pipeline
+    from .long_text import build_classifier
+
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+    torch.set_num_threads(max(1, len(cpus)))
+
+    try:
+        backend = create_backend(backend_name)
+        pipe = backend.load(model_name, pipeline_factory=pipeline, return_all_scores=True,
+                            device=0 if torch.cuda.is_available() else -1)
+        backend.release_base()
+        direct = build_classifier(pipe) if direct_inference else None
+    except Exception as e:
+        connection.send(('failed', f"{type(e).__name__}: {e}"))
+        return
+
+    connection.send(('ready', backend.get_stats()))
+    while True:
+        try:
+            texts = connection.recv()
+        except EOFError:
+            break
+        if texts is None:
+            break
+        try:
+            connection.send(('ok', run_pipeline(pipe, direct, texts)))
+        except Exception as e:
+            connection.send(('error', str(e)))
+
+
+class ModelProcess:
+    """Pipeline-like handle to one model loaded in its own pinned process."""
+
+    def __init__(self, model_key: str, model_name: str, backend_name: str, cpus: List[int],
+                 start_timeout: Optional[float] = None):
+        """
+        Args:
+            model_key: Comparison model key
+            model_name: Hub id or local directory of the model
+            backend_name: Inference backend the process loads the model through
+            cpus: CPU set the process is pinned to (also its torch thread count)
+            start_timeout: Seconds to wait for a load (defaults to config.MODEL_PROCESS_START_TIMEOUT)
+
+        Raises:
+            ModelError: If the model does not load in its process
+        """
+        from transformers import AutoConfig, AutoTokenizer
+
+        self.model_key = model_key
+        self.model_name = model_name
+        self.backend_name = backend_name
+        self.cpus = list(cpus)
+        self.start_timeout = config.MODEL_PROCESS_START_TIMEOUT if start_timeout is None else start_timeout
+
+        # Parent-side tokenizer and config, for length bucketing and cache fingerprints
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = SimpleNamespace(config=AutoConfig.from_pretrained(model_name))
+
+        self._context = multiprocessing.get_context('spawn')
+        self._lock = threading.Lock()
+        self.process = None
+        self._connection = None
+        self.backend_stats = None
+        self.calls = 0
+        self.failures = 0
+        self.restarts = 0
+        self._start()
+
+    def _start(self):
+        """Start the process and wait for its model to load."""
+        parent, child = self._context.Pipe()
+        self.process = self._context.Process(
+            target=_model_process_main, name=f'model-{self.model_key}', daemon=True,
+            args=(self.model_key, self.model_name, self.backend_name, self.cpus,
+                  config.DIRECT_INFERENCE or config.LONG_TEXT_MODE, child))
+        self.process.start()
+        child.close()
+        self._connection = parent
+
+        status, value = self._receive(self.start_timeout)
+        if status != 'ready':
+            self._stop()
+            raise ModelError(f"Model process {self.model_key} failed to load: {value}")
+        self.backend_stats = value
+        logger.info(f"Model {self.model_key} serving from process {self.process.pid} "
+                    f"on CPUs {self.cpus}")
+
+    def _receive(self, timeout: float):
+        """Wait for the next message, noticing if the process dies first."""
+        deadline = time.monotonic() + timeout
+        while not self._connection.poll(0.1):
+            if not self.process.is_alive():
+                return 'exited', f"exit code {self.process.exitcode}"
+            if time.monotonic() >= deadline:
+                return 'timeout', f"no answer within {timeout}s"
+        try:
+            return self._connection.recv()
+        except (EOFError, OSError):
+            return 'exited', f"exit code {self.process.exitcode}"
+
+    def _stop(self, timeout: float = 5.0):
+        """Stop the process, terminating it if it does not exit."""
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            try:
+                self._connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(timeout)
+        self._connection.close()
+
+    def run(self, texts: List[str], timeout: Optional[float] = None) -> List[Any]:
+        """
+        Run one batch in the model process.
+
+        Returns:
+            Per-text lists of {'label', 'score'} over all classes
+
+        Raises:
+            ModelError: If the process fails the batch, dies or times out
+        """
+        with self._lock:
+            if not self.process.is_alive():
+                logger.warning(f"Model process {self.model_key} is not running; restarting")
+                self.restarts += 1
+                self._stop()
+                self._start()
+
+            self.calls += 1
+            self._connection.send(list(texts))
+            status, value = self._receive(timeout or config.REQUEST_TIMEOUT)
+            if status == 'ok':
+                return value
+
+            self.failures += 1
+            if status == 'timeout':
+                # The late answer would be read by the next call; start over instead
+                self.process.terminate()
+                self.process.join()
+            raise ModelError(f"Model {self.model_key} failed in its process: {value}")
+
+    def __call__(self, inputs: Any, **kwargs) -> Any:
+        """Pipeline-style call: a single text gives its scores, a list gives one entry per text."""
+        if isinstance(inputs, str):
+            return self.run([inputs])[0]
+        return self.run(inputs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get process, CPU placement and call counters."""
+        return {
+            'pid': self.process.pid if self.process is not None else None,
+            'alive': self.process is not None and self.process.is_alive(),
+            'cpus': self.cpus,
+            'calls': self.calls,
+            'failures': self.failures,
+            'restarts': self.restarts,
+        }
+
+    def close(self):
+        """Stop the model process."""
+        with self._lock:
+            self._stop()
+        logger.info(f"Model process {self.model_key} stopped")
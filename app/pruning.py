@@ -0,0 +1,304 @@
+"""
+Structured pruning of the fine-tuned DistilBERT checkpoint.
+
+Scores every attention head, FFN neuron and transformer layer with the
+first-order Taylor estimate |sum(w * dL/dw)| over a labelled split (loss
+against the model's own predictions, so any label scheme works), then removes
+the least important layers and the least important FFN neurons of every
+layer, optionally distils the pruned model from the original for a short
+while, and saves a regular checkpoint that config.MODEL_NAME can point to.
+
+Heads are scored and reported and count towards their layer's score, but are
+not cut one by one. transformers 4.x can record removed heads in
+config.pruned_heads and re-apply them on load, but 5.x dropped prune_heads, so
+a head-pruned checkpoint would only load on 4.x; layer and FFN cuts load on both.
+
+    python -m app.pruning prune models/yelp-pruned --drop-layers 2 --ffn-keep 0.5 --fine-tune-epochs 1
+    python -m app.pruning report models/yelp-pruned
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Optional, Sequence
+
+import torch
+import torch.nn.functional as F
+from transformers.pytorch_utils import prune_linear_layer
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+from config.logging_config import get_logger
+from .evaluation import evaluate_predictions, load_eval_split, resolve_path
+
+# Initialize logger
+logger = get_logger('pruning')
+
+ORIGINAL_MODEL = 'Yelp_Model'
+
+
+def _model_path(model_name: str) -> str:
+    """Local model directories resolve against the project root; anything else is a hub name."""
+    path = resolve_path(model_name)
+    return path if os.path.isdir(path) else model_name
+
+
+def _batches(tokenizer: Any, texts: Sequence[str], batch_size: int, max_length: int):
+    for start in range(0, len(texts), batch_size):
+        yield tokenizer(list(texts[start:start + batch_size]), padding=True, truncation=True,
+                        max_length=max_length, return_tensors='pt')
+
+
+def importance_scores(model: Any, tokenizer: Any, texts: Sequence[str], batch_size: int = 16,
+                      max_length: int = 512) -> Dict[str, torch.Tensor]:
+    """
+    Taylor importance of every head, FFN neuron and layer of a DistilBERT classifier.
+
+    Args:
+        model: DistilBertForSequenceClassification
+        tokenizer: Its tokenizer
+        texts: Scoring texts (e.g. Pre_processed/val)
+        batch_size: Texts per backward pass
+        max_length: Truncation length
+
+    Returns:
+        Dict with 'heads' (n_layers x n_heads), 'ffn' (n_layers x hidden_dim) and 'layers' (n_layers)
+    """
+    layers = model.distilbert.transformer.layer
+    n_heads = model.config.n_heads
+    head_size = model.config.dim // n_heads
+    scores = {
+        'heads': torch.zeros(len(layers), n_heads),
+        'ffn': torch.zeros(len(layers), model.config.hidden_dim),
+        'layers': torch.zeros(len(layers)),
+    }
+
+    model.eval()
+    for encodings in _batches(tokenizer, texts, batch_size, max_length):
+        model.zero_grad()
+        logits = model(**encodings).logits
+        F.cross_entropy(logits, logits.argmax(dim=-1)).backward()
+
+        with torch.no_grad():
+            for i, layer in enumerate(layers):
+                attention, ffn = layer.attention, layer.ffn
+                # Per-output-row contributions of q/k/v, per-input-column contribution of out_lin
+                rows = sum((lin.weight * lin.weight.grad).sum(dim=1) + lin.bias * lin.bias.grad
+                           for lin in (attention.q_lin, attention.k_lin, attention.v_lin))
+                columns = (attention.out_lin.weight * attention.out_lin.weight.grad).sum(dim=0)
+                scores['heads'][i] += (rows + columns).view(n_heads, head_size).sum(dim=1).abs()
+
+                neurons = ((ffn.lin1.weight * ffn.lin1.weight.grad).sum(dim=1) + ffn.lin1.bias * ffn.lin1.bias.grad +
+                           (ffn.lin2.weight * ffn.lin2.weight.grad).sum(dim=0))
+                scores['ffn'][i] += neurons.abs()
+
+                scores['layers'][i] += sum((p * p.grad).sum() for p in layer.parameters()
+                                           if p.grad is not None).abs()
+
+    model.zero_grad()
+    return scores
+
+
+def prune_model(model: Any, scores: Dict[str, torch.Tensor], drop_layers: int = 0,
+                ffn_keep: float = 1.0) -> Dict[str, Any]:
+    """
+    Remove the least important layers and FFN neurons in place.
+
+    Every remaining layer keeps the same number of FFN neurons (its own most
+    important ones) so the result is described by an ordinary DistilBERT config.
+    Attention heads are left in place (see the module docstring).
+
+    Args:
+        model: DistilBertForSequenceClassification
+        scores: Output of importance_scores()
+        drop_layers: Number of whole layers to remove (at least one layer always stays)
+        ffn_keep: Fraction of FFN neurons kept in every layer
+
+    Returns:
+        Dict describing what was removed
+    """
+    layers = model.distilbert.transformer.layer
+    drop_layers = max(0, min(drop_layers, len(layers) - 1))
+    dropped = sorted(scores['layers'].argsort()[:drop_layers].tolist())
+    keep_neurons = max(1, round(model.config.hidden_dim * ffn_keep))
+
+    kept = []
+    for i, layer in enumerate(layers):
+        if i in dropped:
+            continue
+        if keep_neurons < layer.ffn.lin1.out_features:
+            index = scores['ffn'][i].argsort(descending=True)[:keep_neurons].sort().values
+            layer.ffn.lin1 = prune_linear_layer(layer.ffn.lin1, index, dim=0)
+            layer.ffn.lin2 = prune_linear_layer(layer.ffn.lin2, index, dim=1)
+        kept.append(layer)
+
+    model.distilbert.transformer.layer = torch.nn.ModuleList(kept)
+    model.config.n_layers = len(kept)
+    model.config.hidden_dim = keep_neurons
+    return {'dropped_layers': dropped, 'layers': len(kept), 'ffn_neurons_per_layer': keep_neurons}
+
+
+def distill(student: Any, teacher: Any, tokenizer: Any, texts: Sequence[str], epochs: int = 1,
+            batch_size: int = 16, lr: float = 2e-5, max_length: int = 512) -> float:
+    """
+    Briefly fine-tune a pruned model to match the original model's class distributions.
+
+    Returns:
+        Mean distillation loss of the last epoch
+    """
+    teacher.eval()
+    optimizer = torch.optim.AdamW(student.parameters(), lr=lr)
+    loss_total, batches = 0.0, 0
+
+    student.train()
+    for epoch in range(epochs):
+        loss_total, batches = 0.0, 0
+        for encodings in _batches(tokenizer, texts, batch_size, max_length):
+            with torch.no_grad():
+                targets = torch.softmax(teacher(**encodings).logits, dim=-1)
+            loss = F.kl_div(torch.log_softmax(student(**encodings).logits, dim=-1), targets, reduction='batchmean')
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            loss_total += loss.item()
+            batches += 1
+        logger.info(f"Pruned model distillation epoch {epoch + 1}/{epochs}: loss {loss_total / max(batches, 1):.4f}")
+
+    student.eval()
+    return loss_total / max(batches, 1)
+
+
+def prune_checkpoint(model_name: str, output: str, score_texts: Sequence[str], drop_layers: int = 0,
+                     ffn_keep: float = 1.0, fine_tune_texts: Optional[Sequence[str]] = None,
+                     fine_tune_epochs: int = 1) -> Dict[str, Any]:
+    """
+    Score, prune, optionally distil and save a checkpoint.
+
+    Args:
+        model_name: Original model directory or hub name
+        output: Directory for the pruned model and tokenizer
+        score_texts: Texts used for importance scoring
+        drop_layers: Whole layers to remove
+        ffn_keep: Fraction of FFN neurons kept per layer
+        fine_tune_texts: Texts for distillation from the original (None = no fine-tuning)
+        fine_tune_epochs: Distillation epochs
+
+    Returns:
+        Pruning summary, also written to ``pruning.json`` in the output directory
+    """
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    model_name = _model_path(model_name)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    if not hasattr(model, 'distilbert'):
+        raise ValueError(f"{model_name} is not a DistilBERT classifier")
+
+    start_time = time.perf_counter()
+    scores = importance_scores(model, tokenizer, score_texts)
+    summary = {
+        'model': model_name,
+        'output': output,
+        'score_examples': len(score_texts),
+        'layer_importance': scores['layers'].tolist(),
+        'head_importance': scores['heads'].tolist(),
+        **prune_model(model, scores, drop_layers, ffn_keep),
+    }
+
+    if fine_tune_texts:
+        teacher = AutoModelForSequenceClassification.from_pretrained(model_name)
+        summary['distillation_loss'] = distill(model, teacher, tokenizer, fine_tune_texts, epochs=fine_tune_epochs)
+        summary['fine_tune_examples'] = len(fine_tune_texts)
+    summary['pruning_time'] = time.perf_counter() - start_time
+
+    model.save_pretrained(output)
+    tokenizer.save_pretrained(output)
+    with open(os.path.join(output, 'pruning.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    logger.info(f"Pruned model saved to {output}: {summary['layers']} layers, "
+                f"{summary['ffn_neurons_per_layer']} FFN neurons per layer")
+    return summary
+
+
+def benchmark_model(model_name: str, texts: Sequence[str], labels: Sequence[int],
+                    batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """Parameter count, CPU latency and macro-F1 of a model served by SentimentAnalyzer."""
+    from .model import SentimentAnalyzer
+
+    analyzer = SentimentAnalyzer(model_name=_model_path(model_name))
+    parameters = sum(p.numel() for p in analyzer.pipeline.model.parameters())
+    return {'model': model_name, 'parameters': parameters,
+            **evaluate_predictions(analyzer._run_pipeline, texts, labels, batch_size)}
+
+
+def comparison_report(original: str, pruned: str, texts: Sequence[str], labels: Sequence[int],
+                      batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Compare a pruned model against its original on a labelled split.
+
+    Returns:
+        Dict with both benchmarks and the pruned/original parameter, latency and macro-F1 ratios
+    """
+    before = benchmark_model(original, texts, labels, batch_size)
+    after = benchmark_model(pruned, texts, labels, batch_size)
+    return {
+        'examples': len(labels),
+        'original': before,
+        'pruned': after,
+        'parameter_ratio': after['parameters'] / before['parameters'],
+        'speedup': before['latency_per_text'] / after['latency_per_text'] if after['latency_per_text'] else 0.0,
+        'macro_f1_change': after['macro_f1'] - before['macro_f1'],
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command-line interface for pruning the checkpoint and reporting the result."""
+    parser = argparse.ArgumentParser(prog='python -m app.pruning',
+                                     description="Prune DistilBERT layers and FFN neurons, or compare a pruned model")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    prune = commands.add_parser('prune', help="Score on a split, prune and save a new model directory")
+    prune.add_argument('output', help="Directory of the pruned model")
+    prune.add_argument('--model', default=ORIGINAL_MODEL)
+    prune.add_argument('--val', default='Pre_processed/val', help="Split used for importance scoring")
+    prune.add_argument('--drop-layers', type=int, default=2)
+    prune.add_argument('--ffn-keep', type=float, default=0.5, help="Fraction of FFN neurons kept per layer")
+    prune.add_argument('--fine-tune-epochs', type=int, default=0, help="Distillation epochs (0 = none)")
+    prune.add_argument('--train', default='Pre_processed/train', help="Split used for distillation")
+    prune.add_argument('--limit', type=int, default=None, help="Use at most this many examples per split")
+
+    report = commands.add_parser('report', help="Parameters, CPU latency and F1 against the original")
+    report.add_argument('pruned', help="Pruned model directory")
+    report.add_argument('--original', default=ORIGINAL_MODEL)
+    report.add_argument('--split', default='Pre_processed/test')
+    report.add_argument('--limit', type=int, default=None)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Entry point for ``python -m app.pruning``."""
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == 'prune':
+            score_texts, _ = load_eval_split(args.val, limit=args.limit)
+            fine_tune_texts = load_eval_split(args.train, limit=args.limit)[0] if args.fine_tune_epochs else None
+            summary = prune_checkpoint(args.model, args.output, score_texts, args.drop_layers, args.ffn_keep,
+                                       fine_tune_texts, args.fine_tune_epochs)
+        else:
+            # Exit heads belong to the original model and would skew the comparison
+            config.EARLY_EXIT_HEADS_PATH = None
+            texts, labels = load_eval_split(args.split, limit=args.limit)
+            summary = comparison_report(args.original, args.pruned, texts, labels)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Pruning {args.command} failed: {e}")
+        return 1
+
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Dynamic INT8 quantization for CPU inference.
+
+Linear layers are quantized to int8 weights with activations quantized on the
+fly, which roughly halves CPU latency and shrinks Linear weights about 4x for
+DistilBERT-sized models.
+"""
+import os
+import platform
+import sys
+from typing import Optional
+
+import torch
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+from config.logging_config import get_logger
+
+# Initialize logger
+logger = get_logger('quantization')
+
+
+def select_quantized_engine(preferred: Optional[str] = None) -> Optional[str]:
+    """
+    Pick and activate the quantized kernel backend that suits the host CPU.
+
+    ARM hosts use qnnpack; x86 hosts prefer the x86 engine (fbgemm + onednn
+    dispatch) and fall back to fbgemm on older PyTorch builds.
+
+    Args:
+        preferred: Engine to use if supported (defaults to config.QUANTIZATION_ENGINE)
+
+    Returns:
+        Name of the activated engine, or None if no quantized engine is available
+    """
+    supported = [engine for engine in torch.backends.quantized.supported_engines if engine != 'none']
+    preferred = preferred or config.QUANTIZATION_ENGINE
+
+    machine = platform.machine().lower()
+    if machine.startswith(('arm', 'aarch64')):
+        candidates = ['qnnpack']
+    else:
+        candidates = ['x86', 'fbgemm', 'onednn', 'qnnpack']
+    if preferred:
+        candidates.insert(0, preferred)
+
+    for engine in candidates:
+        if engine in supported:
+            torch.backends.quantized.engine = engine
+            logger.info(f"Using quantized engine '{engine}' on {machine or 'unknown'} CPU")
+            return engine
+
+    logger.warning(f"No suitable quantized engine available (supported: {supported})")
+    return None
+
+
+def quantize_dynamic_int8(model: torch.nn.Module) -> torch.nn.Module:
+    """
+    Return a copy of a model with its Linear layers dynamically quantized to int8.
+
+    Args:
+        model: fp32 model in eval mode
+
+    Returns:
+        Quantized model (the input model is left untouched)
+    """
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _tensor_bytes(value) -> int:
+    """Bytes held by a tensor or a (nested) tuple of tensors such as packed int8 params."""
+    if isinstance(value, torch.Tensor):
+        return value.numel() * value.element_size()
+    if isinstance(value, (tuple, list)):
+        return sum(_tensor_bytes(item) for item in value)
+    return 0
+
+
+def model_size_bytes(model: torch.nn.Module) -> int:
+    """Size of a model's weights, counting packed int8 Linear weights at one byte each."""
+    return sum(_tensor_bytes(value) for value in model.state_dict().values())
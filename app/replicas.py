@@ -0,0 +1,342 @@
+"""
+Multi-process inference replicas sharing one copy of the model weights.
+
+The serving process loads the model once and moves its parameters into shared
+memory. Replica processes (spawned through ``torch.multiprocessing``) receive
+the module by handle rather than by copy and each run their own
+SentimentAnalyzer, so tokenization and the Python side of inference no longer
+serialize on one GIL while the weights stay resident only once. Requests go to
+the replica with the fewest in-flight batches; a replica that dies has its
+pending requests failed and is restarted.
+
+Backends that convert weights (bf16, INT8) are applied once before sharing;
+INT8 packed weights are not plain tensors and get copied into each replica.
+TorchScript and torch.compile wrap the shared module again in every replica.
+"""
+import itertools
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import torch
+import torch.multiprocessing
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+from config.logging_config import get_logger
+from .executors import plan_thread_budget
+from .model import ModelError, SentimentAnalyzer
+from .quantization import model_size_bytes
+
+# Initialize logger
+logger = get_logger('replicas')
+
+
+def _replica_main(index: int, model: torch.nn.Module, tokenizer: Any, model_name: str, backend: str,
+                  quantization: Optional[str], threads: int, requests: Any, results: Any):
+    """Replica process: wrap the shared module in a SentimentAnalyzer and serve batches."""
+    from transformers import pipeline
+
+    torch.set_num_threads(threads)
+    pipe = pipeline("sentiment-analysis", model=model, tokenizer=tokenizer, top_k=1)
+    analyzer = SentimentAnalyzer(pipe=pipe, model_name=model_name, backend=backend, quantization=quantization)
+    analyzer.inference_listener = lambda latency, ok=True, error=None: results.put(('inference', latency, ok, error))
+    shared = all(tensor.is_shared() for tensor in model.state_dict().values())
+    results.put(('ready', index, os.getpid(), shared))
+
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+        request_id, texts = item
+        try:
+            results.put(('result', request_id, True, analyzer.predict_batch(texts)))
+        except Exception as e:
+            results.put(('result', request_id, False, str(e)))
+
+
+@contextmanager
+def _shareable(model: torch.nn.Module):
+    """Hide a patched ``forward`` (TorchScript/compile) so the module pickles as plain weights."""
+    forward = model.__dict__.pop('forward', None)
+    try:
+        yield model
+    finally:
+        if forward is not None:
+            model.forward = forward
+
+
+class _Replica:
+    """Process handle, request queue and load counters for one replica."""
+
+    __slots__ = ('index', 'process', 'requests', 'ready', 'pid', 'shared_weights',
+                 'in_flight', 'dispatched', 'completed', 'failed', 'restarts')
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.requests = None
+        self.ready = threading.Event()
+        self.pid = None
+        self.shared_weights = None
+        self.in_flight = 0
+        self.dispatched = 0
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+
+
+class ReplicaPool:
+    """Least-loaded dispatch over replica processes that share the analyzer's weights."""
+
+    def __init__(self, analyzer: SentimentAnalyzer, replicas: Optional[int] = None,
+                 threads: Optional[int] = None, start_timeout: Optional[float] = None):
+        """
+        Args:
+            analyzer: Loaded analyzer whose weights the replicas share
+            replicas: Number of replica processes (defaults to config.MODEL_REPLICAS)
+            threads: Torch intra-op threads per replica (defaults to an even split of the thread budget)
+            start_timeout: Seconds to wait for every replica to load
+                (defaults to config.MODEL_REPLICA_START_TIMEOUT)
+
+        Raises:
+            ModelError: If a replica does not become ready in time
+        """
+        self.analyzer = analyzer
+        self.size = max(1, replicas or config.MODEL_REPLICAS)
+        self.threads = threads or plan_thread_budget(self.size, workers_per_model=1)
+        start_timeout = config.MODEL_REPLICA_START_TIMEOUT if start_timeout is None else start_timeout
+
+        self.model = analyzer.pipeline.model
+        self.model.share_memory()
+        self.shared_bytes = model_size_bytes(self.model)
+
+        self._context = torch.multiprocessing.get_context('spawn')
+        self._results = self._context.Queue()
+        self._lock = threading.Lock()
+        self._restarted = threading.Condition(self._lock)  # Notified whenever a replica is restarted
+        self._pending = {}  # request id -> (future, replica)
+        self._ids = itertools.count()
+        self._closed = False
+
+        self._replicas = [_Replica(index) for index in range(self.size)]
+        self._collector = threading.Thread(target=self._collect, name='replica-results', daemon=True)
+        self._collector.start()
+        for replica in self._replicas:
+            self._start(replica)
+
+        deadline = time.monotonic() + start_timeout
+        for replica in self._replicas:
+            if not replica.ready.wait(max(0.0, deadline - time.monotonic())):
+                self.close()
+                raise ModelError(f"Inference replica {replica.index} did not start within {start_timeout}s")
+
+        logger.info(f"{self.size} inference replicas ready ({self.threads} threads each, "
+                    f"{self.shared_bytes / 1e6:.1f}MB of shared weights)")
+
+    def _start(self, replica: _Replica):
+        """Spawn (or respawn) one replica process."""
+        replica.ready.clear()
+        replica.requests = self._context.Queue()
+        analyzer = self.analyzer
+        with _shareable(self.model) as model:
+            replica.process = self._context.Process(
+                target=_replica_main, name=f'inference-replica-{replica.index}', daemon=True,
+                args=(replica.index, model, analyzer.pipeline.tokenizer, analyzer.model_name,
+                      analyzer.backend.name, analyzer.quantization, self.threads,
+                      replica.requests, self._results))
+            replica.process.start()
+
+    def _collect(self):
+        """Route replica messages to waiting futures and restart replicas that died."""
+        last_check = time.monotonic()
+        while not self._closed:
+            try:
+                message = self._results.get(timeout=0.5)
+            except queue.Empty:
+                message = None
+            except (EOFError, OSError):
+                return
+
+            if time.monotonic() - last_check >= 0.5:
+                self._check_replicas()
+                last_check = time.monotonic()
+            if message is None:
+                continue
+
+            if message[0] == 'ready':
+                _, index, pid, shared = message
+                replica = self._replicas[index]
+                replica.pid = pid
+                replica.shared_weights = shared
+                replica.ready.set()
+                if not shared:
+                    logger.warning(f"Replica {index} holds a private copy of the weights")
+                continue
+
+            if message[0] == 'inference':
+                # Forward passes in the replicas count towards this process's inference health
+                _, latency, ok, error = message
+                if self.analyzer.inference_listener is not None:
+                    self.analyzer.inference_listener(latency, ok=ok, error=error)
+                continue
+
+            _, request_id, ok, value = message
+            with self._lock:
+                future, replica = self._pending.pop(request_id, (None, None))
+                if replica is not None:
+                    replica.in_flight -= 1
+                    if ok:
+                        replica.completed += 1
+                    else:
+                        replica.failed += 1
+            if future is not None:
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(ModelError(f"Sentiment prediction failed: {value}"))
+
+    def _check_replicas(self):
+        """Fail the requests of dead replicas and start replacements."""
+        for replica in self._replicas:
+            if self._closed or replica.process is None or replica.process.is_alive():
+                continue
+
+            was_ready = replica.ready.is_set()
+            replica.ready.clear()
+            with self._lock:
+                lost = [(request_id, future) for request_id, (future, owner) in self._pending.items()
+                        if owner is replica]
+                for request_id, _ in lost:
+                    del self._pending[request_id]
+                replica.failed += len(lost)
+                replica.in_flight = 0
+                replica.restarts += 1
+                self._restarted.notify_all()
+            for _, future in lost:
+                future.set_exception(ModelError(f"Inference replica {replica.index} exited"))
+
+            if not was_ready:
+                # Died while loading: restarting would only loop; the start timeout reports it
+                logger.error(f"Inference replica {replica.index} failed to start "
+                             f"(exit code {replica.process.exitcode})")
+                replica.process = None
+                continue
+            logger.warning(f"Inference replica {replica.index} exited with code {replica.process.exitcode}; "
+                           f"restarting")
+            self._start(replica)
+
+    def submit(self, texts: List[str]) -> Future:
+        """
+        Queue a batch on the least-loaded ready replica.
+
+        Returns:
+            Future resolving to a list of (sentiment_label, confidence_score)
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise ModelError("Inference replicas are shut down")
+            candidates = [replica for replica in self._replicas
+                          if replica.ready.is_set() and replica.process.is_alive()]
+            if not candidates:
+                raise ModelError("No inference replica is available")
+
+            replica = min(candidates, key=lambda r: (r.in_flight, r.dispatched))
+            request_id = next(self._ids)
+            self._pending[request_id] = (future, replica)
+            replica.in_flight += 1
+            replica.dispatched += 1
+        replica.requests.put((request_id, list(texts)))
+        return future
+
+    def predict_batch(self, texts: List[str], timeout: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Predict a batch on one replica, waiting at most timeout (defaults to config.REQUEST_TIMEOUT)."""
+        if not texts:
+            return []
+        future = self.submit(texts)
+        try:
+            return future.result(timeout or config.REQUEST_TIMEOUT)
+        except TimeoutError as e:
+            self._abandon(future)
+            raise ModelError(f"Sentiment prediction timed out: {e}")
+
+    def _abandon(self, future: Future):
+        """Forget a request nobody waits for, so it neither leaks nor keeps weighting its replica."""
+        with self._lock:
+            for request_id, (pending, replica) in self._pending.items():
+                if pending is future:
+                    del self._pending[request_id]
+                    replica.in_flight -= 1
+                    replica.failed += 1
+                    break
+        future.cancel()
+
+    def wait_for_restart(self, index: int, restarts: int = 1, timeout: Optional[float] = None) -> bool:
+        """
+        Block until a replica has been restarted ``restarts`` times in total and is ready again.
+
+        Returns:
+            Whether that happened within the timeout
+        """
+        replica = self._replicas[index]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._restarted:
+            if not self._restarted.wait_for(lambda: replica.restarts >= restarts, timeout):
+                return False
+        return replica.ready.wait(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """Predict one text on the least-loaded replica."""
+        return self.predict_batch([text])[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-replica load, liveness and memory-sharing status."""
+        with self._lock:
+            replicas = [{
+                'index': replica.index,
+                'pid': replica.pid,
+                'alive': replica.process is not None and replica.process.is_alive(),
+                'ready': replica.ready.is_set(),
+                'shared_weights': replica.shared_weights,
+                'in_flight': replica.in_flight,
+                'dispatched': replica.dispatched,
+                'completed': replica.completed,
+                'failed': replica.failed,
+                'restarts': replica.restarts,
+            } for replica in self._replicas]
+        return {
+            'enabled': True,
+            'replicas': self.size,
+            'threads_per_replica': self.threads,
+            'shared_weights_bytes': self.shared_bytes,
+            'workers': replicas,
+        }
+
+    def close(self, timeout: float = 5.0):
+        """Stop every replica process."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+
+        for future, _ in pending:
+            future.set_exception(ModelError("Inference replicas are shut down"))
+        for replica in self._replicas:
+            if replica.requests is not None:
+                replica.requests.put(None)
+        for replica in self._replicas:
+            if replica.process is not None:
+                replica.process.join(timeout)
+                if replica.process.is_alive():
+                    replica.process.terminate()
+        logger.info("Inference replicas stopped")
@@ -0,0 +1,121 @@
+"""
+Content-aware routing of comparison requests to domain models.
+
+Instead of fanning every text out to all comparison models, the router scores
+a text against a few cheap lexical signals per domain (finance vocabulary and
+tickers, social-media markers, restaurant-review vocabulary) and picks the
+model whose domain fits best, adding the runner-up when the call is close and
+the general-purpose models when nothing matches. Each model declares its
+domain in AdvancedSentimentAnalyzer.model_configs.
+"""
+import logging
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional
+
+logger = logging.getLogger('sentiment_analyzer.routing')
+
+# Cheap lexical signals per domain; each match adds one to the domain's score
+DOMAIN_SIGNALS = {
+    'finance': [
+        re.compile(r'\$[A-Z]{1,5}\b'),  # Cashtags
+        re.compile(r'[$€£]\s?\d|\d\s?%|\b\d+(\.\d+)?\s?(bn|billion|million|mn)\b', re.IGNORECASE),
+        re.compile(r'\b(stocks?|shares?|earnings|revenue|profits?|losses|dividends?|investors?|market|'
+                   r'quarter(ly)?|fiscal|guidance|eps|ipo|nasdaq|nyse|bonds?|yields?|inflation|'
+                   r'interest rates?|valuation|portfolio|analysts?|forecast|outlook|sales)\b', re.IGNORECASE),
+    ],
+    'social': [
+        re.compile(r'(^|\s)@\w+'),  # Mentions
+        re.compile(r'(^|\s)#\w+'),  # Hashtags
+        re.compile(r'https?://\S+|\bRT\b'),
+        re.compile(r'[\U0001F300-\U0001FAFF☀-➿]'),  # Emoji
+        re.compile(r'\b(lol|lmao|omg|smh|tbh|imo|idk|ngl|fr|af)\b', re.IGNORECASE),
+        re.compile(r'(\w)\1{3,}'),  # Elongated words ("sooooo")
+    ],
+    'review': [
+        re.compile(r'\b(food|restaurant|service|staff|waiter|waitress|server|menu|dish(es)?|meal|dinner|'
+                   r'lunch|brunch|breakfast|ordered|order|delicious|tasty|bland|portions?|appetizers?|'
+                   r'dessert|drinks?|bar|cocktails?|reservation|table|chef|kitchen|pizza|burger|sushi|'
+                   r'coffee|ambiance|atmosphere|decor|price[ds]?|stars?|visit(ed)?|location|parking)\b',
+                   re.IGNORECASE),
+    ],
+}
+
+
+@dataclass
+class RoutingDecision:
+    """Models chosen for one text and why"""
+    models: List[str]
+    domain: str  # Winning domain, or 'general' when no domain signal matched
+    scores: Dict[str, float] = field(default_factory=dict)  # Signal matches per domain
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'models': self.models, 'domain': self.domain, 'scores': self.scores}
+
+
+class ModelRouter:
+    """Picks the one or two comparison models whose domain fits a text"""
+
+    def __init__(self, model_domains: Mapping[str, str], signals: Optional[Dict[str, List[Any]]] = None,
+                 close_ratio: float = 2.0):
+        """
+        Args:
+            model_domains: Model key -> domain ('review', 'finance', 'social' or 'general')
+            signals: Compiled patterns per domain (defaults to DOMAIN_SIGNALS)
+            close_ratio: The runner-up domain's model is added unless the winner
+                scores at least this many times higher
+        """
+        self.model_domains = dict(model_domains)
+        self.signals = signals or DOMAIN_SIGNALS
+        self.close_ratio = close_ratio
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'models_routed': 0, 'domains': {}}
+
+    def score(self, text: str) -> Dict[str, float]:
+        """Number of signal matches per domain"""
+        return {domain: float(sum(len(pattern.findall(text)) for pattern in patterns))
+                for domain, patterns in self.signals.items()}
+
+    def route(self, text: str, models: List[str]) -> RoutingDecision:
+        """
+        Choose the models to run for a text.
+
+        Args:
+            text: Input text
+            models: Candidate model keys (e.g. those requested and available)
+
+        Returns:
+            RoutingDecision naming one or two of ``models`` (never none while there are candidates)
+        """
+        scores = self.score(text)
+        by_domain = {}
+        for model in models:
+            by_domain.setdefault(self.model_domains.get(model, 'general'), []).append(model)
+
+        ranked = sorted((domain for domain in scores if scores[domain] > 0 and domain in by_domain),
+                        key=lambda domain: scores[domain], reverse=True)
+        if ranked:
+            domain = ranked[0]
+            chosen = by_domain[domain][:1]
+            if len(ranked) > 1 and scores[domain] < self.close_ratio * scores[ranked[1]]:
+                chosen += by_domain[ranked[1]][:1]
+        else:
+            # Nothing domain-specific: the reviews model plus a general-purpose one, or the first two candidates
+            domain = 'general'
+            chosen = (by_domain.get('review', [])[:1] + by_domain.get('general', [])[:1]) or list(models[:2])
+
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['models_routed'] += len(chosen)
+            self._stats['domains'][domain] = self._stats['domains'].get(domain, 0) + 1
+
+        return RoutingDecision(models=chosen, domain=domain, scores=scores)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get routed request counts per domain and the average models run per request"""
+        with self._lock:
+            stats = {'requests': self._stats['requests'], 'models_routed': self._stats['models_routed'],
+                     'domains': dict(self._stats['domains'])}
+        stats['average_models_routed'] = stats['models_routed'] / stats['requests'] if stats['requests'] else 0.0
+        return stats
@@ -0,0 +1,392 @@
+"""
+Tier-0 sentiment classifier: hashed n-gram features and a linear model.
+
+Most Yelp traffic is plainly positive or plainly negative. A multinomial
+logistic regression over hashed word uni/bigrams, cleaned with the training
+notebooks' preprocessing, answers those texts in microseconds.
+SentimentAnalyzer returns its answer directly when the temperature-calibrated
+confidence clears TIER0_THRESHOLD; every other text falls through to the
+transformer.
+
+    python -m app.tier0 train models/tier0.npz
+    python -m app.tier0 report models/tier0.npz --with-transformer
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+from config.logging_config import get_logger
+from .evaluation import LABEL_IDS, load_eval_split, macro_f1
+
+# Initialize logger
+logger = get_logger('tier0')
+
+# Class index -> sentiment, in the label-id order of the Pre_processed splits
+LABELS = sorted(LABEL_IDS, key=LABEL_IDS.get)
+
+DEFAULT_THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.98, 0.99]
+
+
+def featurize(texts: Sequence[str], dim: int, ngrams: int = 2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Hashed bag of word n-grams for a batch of texts, in sparse coordinate form.
+
+    Counts are log-scaled (1 + log count) and every row is L2-normalised.
+    crc32 keeps the hashing identical across processes and Python versions.
+
+    Args:
+        texts: Raw input texts
+        dim: Number of hash buckets
+        ngrams: Longest n-gram (1 = unigrams only)
+
+    Returns:
+        Tuple of (rows, columns, values) for every non-zero feature
+    """
+    # Imported here so serving images without utils/ still start when tier 0 is not configured
+    from utils.text_preprocessing import advanced_text_preprocessing
+
+    rows, columns, values = [], [], []
+    for row, text in enumerate(texts):
+        tokens = advanced_text_preprocessing(text if isinstance(text, str) else '').split()
+        counts = {}
+        for n in range(1, ngrams + 1):
+            for start in range(len(tokens) - n + 1):
+                column = zlib.crc32(' '.join(tokens[start:start + n]).encode('utf-8')) % dim
+                counts[column] = counts.get(column, 0) + 1
+        if not counts:
+            continue
+        weights = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+        rows.append(np.full(len(counts), row, dtype=np.int64))
+        columns.append(np.fromiter(counts.keys(), dtype=np.int64, count=len(counts)))
+        values.append(weights / np.linalg.norm(weights))
+
+    if not rows:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0, np.float32)
+    return np.concatenate(rows), np.concatenate(columns), np.concatenate(values)
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
+
+
+class Tier0Classifier:
+    """Multinomial logistic regression over hashed n-grams, with temperature calibration."""
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, temperature: float = 1.0, ngrams: int = 2):
+        """
+        Args:
+            weights: (hash buckets, classes) weight matrix
+            bias: Per-class bias
+            temperature: Logit divisor fitted on held-out data (1.0 = uncalibrated)
+            ngrams: Longest n-gram the weights were trained on
+        """
+        self.weights = weights.astype(np.float32)
+        self.bias = bias.astype(np.float32)
+        self.temperature = float(temperature)
+        self.ngrams = int(ngrams)
+
+    @property
+    def dim(self) -> int:
+        return self.weights.shape[0]
+
+    def _logits(self, rows: np.ndarray, columns: np.ndarray, values: np.ndarray, count: int) -> np.ndarray:
+        """Sparse features times weights, one bincount per class."""
+        logits = np.empty((count, len(self.bias)), dtype=np.float32)
+        for label in range(len(self.bias)):
+            logits[:, label] = np.bincount(rows, weights=values * self.weights[columns, label], minlength=count)
+        return logits + self.bias
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """Calibrated class probabilities, shape (len(texts), len(LABELS))."""
+        logits = self._logits(*featurize(texts, self.dim, self.ngrams), len(texts))
+        return _softmax(logits / self.temperature)
+
+    def classify(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """(sentiment_label, calibrated confidence) per text."""
+        probabilities = self.predict_proba(texts)
+        return [(LABELS[index], float(probabilities[row, index]))
+                for row, index in enumerate(probabilities.argmax(axis=1))]
+
+    @classmethod
+    def train(cls, texts: Sequence[str], labels: Sequence[int], dim: int = 2 ** 18, ngrams: int = 2,
+              epochs: int = 5, learning_rate: float = 0.5, l2: float = 1e-6, batch_size: int = 32,
+              seed: int = 0) -> 'Tier0Classifier':
+        """
+        Fit the linear model with mini-batch SGD on the softmax cross-entropy.
+
+        Args:
+            texts: Training texts
+            labels: Label ids (see evaluation.LABEL_IDS)
+            dim: Number of hash buckets
+            ngrams: Longest n-gram
+            epochs: Passes over the data (the step size decays as 1/sqrt(epoch))
+            learning_rate: Initial step size
+            l2: L2 penalty on the weights
+            batch_size: Texts per update
+            seed: Shuffling seed
+
+        Returns:
+            Trained, uncalibrated classifier
+        """
+        labels = np.asarray(labels, dtype=np.int64)
+        classifier = cls(np.zeros((dim, len(LABELS)), np.float32), np.zeros(len(LABELS), np.float32),
+                         ngrams=ngrams)
+        rows, columns, values = featurize(texts, dim, ngrams)
+        offsets = np.searchsorted(rows, np.arange(len(texts) + 1))
+        rng = np.random.default_rng(seed)
+
+        for epoch in range(epochs):
+            step = learning_rate / np.sqrt(epoch + 1)
+            order = rng.permutation(len(texts))
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                spans = [np.arange(offsets[i], offsets[i + 1]) for i in batch]
+                picked = np.concatenate(spans) if spans else np.zeros(0, np.int64)
+                batch_rows = np.repeat(np.arange(len(batch)), [len(span) for span in spans])
+                batch_columns, batch_values = columns[picked], values[picked]
+
+                probabilities = _softmax(classifier._logits(batch_rows, batch_columns, batch_values, len(batch)))
+                probabilities[np.arange(len(batch)), labels[batch]] -= 1.0  # d(loss)/d(logits)
+                probabilities /= len(batch)
+
+                touched = np.unique(batch_columns)
+                for label in range(len(LABELS)):
+                    gradient = np.bincount(batch_columns, weights=batch_values * probabilities[batch_rows, label],
+                                           minlength=dim)
+                    classifier.weights[touched, label] -= step * (gradient[touched] +
+                                                                  l2 * classifier.weights[touched, label])
+                classifier.bias -= step * probabilities.sum(axis=0)
+
+            logger.info(f"Tier-0 epoch {epoch + 1}/{epochs} done")
+
+        return classifier
+
+    def calibrate(self, texts: Sequence[str], labels: Sequence[int]) -> float:
+        """
+        Fit the softmax temperature that minimises log-loss on held-out data.
+
+        Returns:
+            The fitted temperature (also stored on the classifier)
+        """
+        labels = np.asarray(labels, dtype=np.int64)
+        logits = self._logits(*featurize(texts, self.dim, self.ngrams), len(texts))
+
+        def log_loss(temperature):
+            probabilities = _softmax(logits / temperature)
+            return -np.mean(np.log(probabilities[np.arange(len(labels)), labels] + 1e-12))
+
+        self.temperature = float(min(np.geomspace(0.05, 20.0, 121), key=log_loss))
+        return self.temperature
+
+    def save(self, path: str):
+        """Write the classifier to an .npz file."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(path, weights=self.weights, bias=self.bias, temperature=self.temperature,
+                            ngrams=self.ngrams, labels=np.array(LABELS))
+
+    @classmethod
+    def load(cls, path: str) -> 'Tier0Classifier':
+        """Read a classifier written by save()."""
+        with np.load(path) as data:
+            if list(data['labels']) != LABELS:
+                raise ValueError(f"{path} was trained for labels {list(data['labels'])}, expected {LABELS}")
+            return cls(data['weights'], data['bias'], float(data['temperature']), int(data['ngrams']))
+
+
+class Tier0FastPath:
+    """Answers confident texts with the tier-0 classifier and counts how many it handled."""
+
+    def __init__(self, classifier: Tier0Classifier, threshold: Optional[float] = None):
+        """
+        Args:
+            classifier: Trained (ideally calibrated) tier-0 classifier
+            threshold: Minimum calibrated confidence to answer (defaults to config.TIER0_THRESHOLD)
+        """
+        self.classifier = classifier
+        self.threshold = config.TIER0_THRESHOLD if threshold is None else threshold
+        self._lock = threading.Lock()
+        self._stats = {'texts': 0, 'answered': 0, 'total_time': 0.0}
+
+    def answer(self, texts: Sequence[str]) -> List[Optional[Tuple[str, float]]]:
+        """
+        Tier-0 answers for texts it is confident about.
+
+        Returns:
+            (sentiment_label, confidence) per text, or None where the text should
+            fall through to the transformer
+        """
+        start_time = time.perf_counter()
+        answers = [(sentiment, confidence) if confidence >= self.threshold else None
+                   for sentiment, confidence in self.classifier.classify(texts)]
+
+        with self._lock:
+            self._stats['texts'] += len(texts)
+            self._stats['answered'] += sum(1 for answer in answers if answer is not None)
+            self._stats['total_time'] += time.perf_counter() - start_time
+        return answers
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the threshold and the share of texts answered at tier 0."""
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            'enabled': True,
+            'threshold': self.threshold,
+            'texts': stats['texts'],
+            'answered': stats['answered'],
+            'fell_through': stats['texts'] - stats['answered'],
+            'coverage': stats['answered'] / stats['texts'] if stats['texts'] else 0.0,
+            'average_time_per_text': stats['total_time'] / stats['texts'] if stats['texts'] else 0.0,
+        }
+
+
+def load_tier0(path: Optional[str] = None) -> Optional[Tier0FastPath]:
+    """
+    Load the tier-0 fast path configured by config.TIER0_MODEL_PATH.
+
+    Returns:
+        Tier0FastPath, or None when tier 0 is not configured or its file is unusable
+    """
+    path = path or config.TIER0_MODEL_PATH
+    if not path:
+        return None
+    try:
+        import utils.text_preprocessing  # noqa: F401  Needed by featurize(); fail here rather than per request
+        fast_path = Tier0FastPath(Tier0Classifier.load(path))
+    except (ImportError, OSError, KeyError, ValueError) as e:
+        logger.warning(f"Tier-0 classifier {path} unavailable, every text goes to the transformer: {e}")
+        return None
+    logger.info(f"Tier-0 classifier loaded from {path} (threshold {fast_path.threshold})")
+    return fast_path
+
+
+def coverage_report(classifier: Tier0Classifier, texts: Sequence[str], labels: Sequence[int],
+                    thresholds: Sequence[float] = DEFAULT_THRESHOLDS,
+                    fallback: Optional[Sequence[int]] = None) -> Dict[str, Any]:
+    """
+    Coverage/accuracy trade-off of the tier-0 threshold on a labelled split.
+
+    Args:
+        classifier: Tier-0 classifier
+        texts: Input texts
+        labels: Gold label ids
+        thresholds: Confidence thresholds to evaluate
+        fallback: Transformer label ids for every text; adds end-to-end accuracy and macro-F1
+            (tier 0 where confident, transformer elsewhere) to each row
+
+    Returns:
+        Dict with the tier-0-only baseline, the transformer baseline (if given) and one row per threshold
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    probabilities = classifier.predict_proba(texts)
+    predicted = probabilities.argmax(axis=1)
+    confidence = probabilities.max(axis=1)
+    class_ids = sorted(LABEL_IDS.values())
+
+    report = {
+        'examples': len(labels),
+        'temperature': classifier.temperature,
+        'tier0_accuracy': float(np.mean(predicted == labels)) if len(labels) else 0.0,
+        'thresholds': [],
+    }
+    if fallback is not None:
+        fallback = np.asarray(fallback, dtype=np.int64)
+        report['transformer_accuracy'] = float(np.mean(fallback == labels)) if len(labels) else 0.0
+        report['transformer_macro_f1'] = macro_f1(labels.tolist(), fallback.tolist(), labels=class_ids)
+
+    for threshold in thresholds:
+        covered = confidence >= threshold
+        row = {
+            'threshold': threshold,
+            'coverage': float(np.mean(covered)) if len(labels) else 0.0,
+            'tier0_accuracy_on_covered': float(np.mean(predicted[covered] == labels[covered])) if covered.any() else None,
+        }
+        if fallback is not None:
+            combined = np.where(covered, predicted, fallback)
+            row['combined_accuracy'] = float(np.mean(combined == labels)) if len(labels) else 0.0
+            row['combined_macro_f1'] = macro_f1(labels.tolist(), combined.tolist(), labels=class_ids)
+        report['thresholds'].append(row)
+
+    return report
+
+
+def transformer_label_ids(texts: Sequence[str],
+                          predict_batch: Optional[Callable[[List[str]], Sequence[Tuple[str, float]]]] = None,
+                          batch_size: Optional[int] = None) -> List[int]:
+    """Label ids the serving transformer assigns to texts, bypassing tier 0."""
+    if predict_batch is None:
+        from .model import get_model
+        predict_batch = get_model()._run_pipeline
+    batch_size = batch_size or config.BATCH_BUCKET_SIZE
+
+    label_ids = []
+    for start in range(0, len(texts), batch_size):
+        label_ids.extend(LABEL_IDS.get(label, -1) for label, _ in predict_batch(list(texts[start:start + batch_size])))
+    return label_ids
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command-line interface for training and evaluating the tier-0 classifier."""
+    parser = argparse.ArgumentParser(prog='python -m app.tier0',
+                                     description="Train or evaluate the tier-0 hashed n-gram classifier")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    train = commands.add_parser('train', help="Train on a split and calibrate on another")
+    train.add_argument('output', help="Path of the .npz file to write")
+    train.add_argument('--train', default='Pre_processed/train')
+    train.add_argument('--val', default='Pre_processed/val', help="Split used for temperature calibration")
+    train.add_argument('--dim', type=int, default=2 ** 18)
+    train.add_argument('--ngrams', type=int, default=2)
+    train.add_argument('--epochs', type=int, default=5)
+    train.add_argument('--limit', type=int, default=None, help="Use at most this many training examples")
+
+    report = commands.add_parser('report', help="Coverage/accuracy trade-off on a labelled split")
+    report.add_argument('model', help="Trained .npz file")
+    report.add_argument('--split', default='Pre_processed/test')
+    report.add_argument('--thresholds', type=float, nargs='*', default=DEFAULT_THRESHOLDS)
+    report.add_argument('--with-transformer', action='store_true',
+                        help="Also score the split with the transformer for end-to-end accuracy")
+    report.add_argument('--limit', type=int, default=None)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Entry point for ``python -m app.tier0``."""
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == 'train':
+            texts, labels = load_eval_split(args.train, limit=args.limit)
+            classifier = Tier0Classifier.train(texts, labels, dim=args.dim, ngrams=args.ngrams, epochs=args.epochs)
+            val_texts, val_labels = load_eval_split(args.val)
+            classifier.calibrate(val_texts, val_labels)
+            classifier.save(args.output)
+            summary = {'output': args.output, 'examples': len(texts), 'temperature': classifier.temperature,
+                       'val': coverage_report(classifier, val_texts, val_labels, thresholds=[config.TIER0_THRESHOLD])}
+        else:
+            classifier = Tier0Classifier.load(args.model)
+            texts, labels = load_eval_split(args.split, limit=args.limit)
+            fallback = transformer_label_ids(texts) if args.with_transformer else None
+            summary = coverage_report(classifier, texts, labels, args.thresholds, fallback=fallback)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Tier-0 {args.command} failed: {e}")
+        return 1
+
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
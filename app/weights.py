@@ -0,0 +1,150 @@
+"""
+Memory-mapped safetensors loading.
+
+``from_pretrained`` reads the weights onto each process's heap. Here the
+safetensors files are mapped copy-on-write instead and the model parameters
+are tensors over the mapping, so the weights live in the page cache: processes
+that load the same file (or are forked from one that did) share those pages,
+and no process pays for a private copy until it writes to a tensor.
+"""
+import contextlib
+import glob
+import json
+import mmap
+import os
+import struct
+import sys
+from typing import Any, Dict, Optional, Tuple
+
+import torch
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.logging_config import get_logger
+
+# Initialize logger
+logger = get_logger('weights')
+
+SAFETENSORS_DTYPES = {
+    'F64': torch.float64, 'F32': torch.float32, 'F16': torch.float16, 'BF16': torch.bfloat16,
+    'I64': torch.int64, 'I32': torch.int32, 'I16': torch.int16, 'I8': torch.int8,
+    'U8': torch.uint8, 'BOOL': torch.bool,
+}
+
+# Files needed to build the model and tokenizer without the pickled weights
+MODEL_FILE_PATTERNS = ['*.json', '*.safetensors', '*.txt', '*.model']
+
+
+def _no_init_weights():
+    """Skip random weight initialization (it is overwritten by the mapped tensors)."""
+    try:
+        from transformers.modeling_utils import no_init_weights  # transformers 4.x
+    except ImportError:
+        try:
+            from transformers.initialization import no_init_weights  # transformers 5.x
+        except ImportError:
+            return contextlib.nullcontext()
+    return no_init_weights()
+
+
+def map_safetensors(path: str) -> Dict[str, torch.Tensor]:
+    """
+    Map a safetensors file and return tensors that view the mapping.
+
+    Args:
+        path: ``.safetensors`` file
+
+    Returns:
+        Tensor name to tensor, with no data copied
+    """
+    with open(path, 'rb') as handle:
+        # ACCESS_COPY is MAP_PRIVATE: pages stay shared until a process writes to them
+        mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    header_size = struct.unpack('<Q', mapping[:8])[0]
+    header = json.loads(mapping[8:8 + header_size])
+    data_start = 8 + header_size
+
+    tensors = {}
+    for name, info in header.items():
+        if name == '__metadata__':
+            continue
+        dtype = SAFETENSORS_DTYPES[info['dtype']]
+        start, end = info['data_offsets']
+        count = (end - start) // dtype.itemsize
+        if count == 0:
+            tensors[name] = torch.empty(info['shape'], dtype=dtype)
+            continue
+        tensors[name] = torch.frombuffer(mapping, dtype=dtype, count=count,
+                                         offset=data_start + start).view(info['shape'])
+    return tensors
+
+
+def resolve_model_dir(model_name: str) -> str:
+    """Local directory of a model (a path, or its Hugging Face cache snapshot)."""
+    if os.path.isdir(model_name):
+        return model_name
+    from huggingface_hub import snapshot_download
+    return snapshot_download(model_name, allow_patterns=MODEL_FILE_PATTERNS)
+
+
+def load_mapped_model(model_name: str) -> Optional[Tuple[torch.nn.Module, Any]]:
+    """
+    Build a sequence-classification model whose parameters are memory-mapped safetensors.
+
+    Args:
+        model_name: Hub id or local directory
+
+    Returns:
+        Tuple of (model, tokenizer), or None when the model has no safetensors
+        weights or they do not match the architecture (callers load normally)
+    """
+    from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+
+    try:
+        model_dir = resolve_model_dir(model_name)
+        files = sorted(glob.glob(os.path.join(model_dir, '*.safetensors')))
+        if not files:
+            logger.info(f"No safetensors weights for {model_name}; loading onto the heap")
+            return None
+
+        state_dict = {}
+        for path in files:
+            state_dict.update(map_safetensors(path))
+
+        model_config = AutoConfig.from_pretrained(model_dir)
+        with _no_init_weights():
+            model = AutoModelForSequenceClassification.from_config(model_config)
+        # assign=True adopts the mapped tensors instead of copying into fresh ones
+        model.load_state_dict(state_dict, strict=True, assign=True)
+        model.eval()
+
+        tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    except Exception as e:
+        logger.warning(f"Memory-mapped loading unavailable for {model_name}, loading onto the heap: {e}")
+        return None
+
+    logger.info(f"Memory-mapped {len(state_dict)} tensors from {len(files)} safetensors files for {model_name}")
+    return model, tokenizer
+
+
+def process_memory() -> Dict[str, int]:
+    """
+    Resident memory of this process split into shared and private bytes.
+
+    Returns:
+        rss, pss, shared and private byte counts (empty where /proc is unavailable)
+    """
+    fields = {'Rss': 'rss', 'Pss': 'pss', 'Shared_Clean': 'shared', 'Shared_Dirty': 'shared',
+              'Private_Clean': 'private', 'Private_Dirty': 'private'}
+    memory = {}
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as handle:
+            for line in handle:
+                key, _, value = line.partition(':')
+                if key in fields:
+                    memory[fields[key]] = memory.get(fields[key], 0) + int(value.split()[0]) * 1024
+    except OSError:
+        return {}
+    return memory
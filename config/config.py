@@ -20,7 +20,34 @@ class Config:
     # Model settings
     MODEL_NAME: str = os.getenv('MODEL_NAME', 'fitsblb/YelpReviewsAnalyzer')
     MODEL_CACHE_DIR: Optional[str] = os.getenv('MODEL_CACHE_DIR', None)
-    MAX_TEXT_LENGTH: int = int(os.getenv('MAX_TEXT_LENGTH', 1000))
+    LONG_TEXT_MODE: bool = os.getenv('LONG_TEXT_MODE', 'False').lower() == 'true'  # Sliding windows instead of truncation
+    MAX_TEXT_LENGTH: int = int(os.getenv('MAX_TEXT_LENGTH', 10000 if LONG_TEXT_MODE else 1000))
+    MODEL_BACKGROUND_LOAD: bool = os.getenv('MODEL_BACKGROUND_LOAD', 'False').lower() == 'true'  # Load at startup, off-thread
+    MODEL_READY_TIMEOUT: float = float(os.getenv('MODEL_READY_TIMEOUT', 5))  # seconds a request waits before a 503
+    MODEL_MMAP_WEIGHTS: bool = os.getenv('MODEL_MMAP_WEIGHTS', 'False').lower() == 'true'  # Memory-map safetensors weights
+    MODEL_PRELOAD: bool = os.getenv('MODEL_PRELOAD', 'False').lower() == 'true'  # Load in the master before forking workers
+    
+    # Health check settings
+    HEALTH_PROBE_INTERVAL: float = float(os.getenv('HEALTH_PROBE_INTERVAL', 60))  # Idle seconds before a background probe, 0 = off
+    HEALTH_DEEP_CHECK_INTERVAL: float = float(os.getenv('HEALTH_DEEP_CHECK_INTERVAL', 30))  # Min seconds between deep checks
+    HEALTH_MAX_CONSECUTIVE_FAILURES: int = int(os.getenv('HEALTH_MAX_CONSECUTIVE_FAILURES', 3))
+    
+    # Inference backend settings ('eager', 'dynamic_int8', 'torchscript', 'compile' or 'bf16')
+    MODEL_BACKEND: str = os.getenv('MODEL_BACKEND', 'eager')
+    MODEL_BACKENDS: str = os.getenv('MODEL_BACKENDS', '')  # Per model key, e.g. "default=dynamic_int8,finbert=bf16"
+    DIRECT_INFERENCE: bool = os.getenv('DIRECT_INFERENCE', 'True').lower() == 'true'  # Bypass the pipeline wrapper
+    LONG_TEXT_WINDOW: int = int(os.getenv('LONG_TEXT_WINDOW', 0))  # Tokens per sliding window, 0 = model limit
+    LONG_TEXT_STRIDE: int = int(os.getenv('LONG_TEXT_STRIDE', 128))  # Tokens shared by consecutive windows
+    EARLY_EXIT_HEADS_PATH: Optional[str] = os.getenv('EARLY_EXIT_HEADS_PATH', None)  # From `python -m app.early_exit train`
+    EARLY_EXIT_THRESHOLD: float = float(os.getenv('EARLY_EXIT_THRESHOLD', 0.25))  # Normalized entropy to exit below, 0 = all layers
+    
+    # Quantization settings (the accuracy guard applies to every reduced-precision backend)
+    MODEL_QUANTIZATION: str = os.getenv('MODEL_QUANTIZATION', 'none')  # 'dynamic_int8' = MODEL_BACKEND alias
+    QUANTIZATION_ENGINE: Optional[str] = os.getenv('QUANTIZATION_ENGINE', None)  # Auto-detected when unset
+    QUANTIZATION_ACCURACY_GUARD: bool = os.getenv('QUANTIZATION_ACCURACY_GUARD', 'True').lower() == 'true'
+    QUANTIZATION_MAX_F1_DROP: float = float(os.getenv('QUANTIZATION_MAX_F1_DROP', 0.01))
+    QUANTIZATION_EVAL_DATA: str = os.getenv('QUANTIZATION_EVAL_DATA', 'Pre_processed/test')
+    QUANTIZATION_EVAL_SAMPLES: int = int(os.getenv('QUANTIZATION_EVAL_SAMPLES', 500))
     
     # API settings
     API_RATE_LIMIT: str = os.getenv('API_RATE_LIMIT', '100 per hour')
@@ -33,12 +60,49 @@ class Config:
     LOG_FILE: Optional[str] = os.getenv('LOG_FILE', None)
     
     # Performance settings
-    MODEL_BATCH_SIZE: int = int(os.getenv('MODEL_BATCH_SIZE', 1))
+    MODEL_BATCH_SIZE: int = int(os.getenv('MODEL_BATCH_SIZE', 1))  # > 1 enables request coalescing
+    MODEL_BATCH_MAX_WAIT_MS: float = float(os.getenv('MODEL_BATCH_MAX_WAIT_MS', 10))
+    BATCH_BUCKET_SIZE: int = int(os.getenv('BATCH_BUCKET_SIZE', 16))
+    BATCH_BUCKET_MAX_TOKENS: int = int(os.getenv('BATCH_BUCKET_MAX_TOKENS', 8192))
     REQUEST_TIMEOUT: int = int(os.getenv('REQUEST_TIMEOUT', 30))
-    
+    MODEL_THREAD_BUDGET: int = int(os.getenv('MODEL_THREAD_BUDGET', 0))  # Threads split across models, 0 = CPU count
+    MODEL_EXECUTOR_WORKERS: int = int(os.getenv('MODEL_EXECUTOR_WORKERS', 1))  # Concurrent forward passes per model
+    MODEL_POOL_MEMORY_MB: float = float(os.getenv('MODEL_POOL_MEMORY_MB', 0))  # Weights of comparison models kept loaded (not full RSS), 0 = no limit
+    MODEL_POOL_PRELOAD: str = os.getenv('MODEL_POOL_PRELOAD', '')  # Comma-separated model keys loaded at startup
+    MODEL_POOL_RETRY_AFTER: float = float(os.getenv('MODEL_POOL_RETRY_AFTER', 60))  # seconds before retrying a failed load
+    MODEL_REPLICAS: int = int(os.getenv('MODEL_REPLICAS', 0))  # > 1 serves from processes sharing one copy of the weights
+    MODEL_REPLICA_START_TIMEOUT: float = float(os.getenv('MODEL_REPLICA_START_TIMEOUT', 120))  # seconds
+    MODEL_PROCESS_ISOLATION: bool = os.getenv('MODEL_PROCESS_ISOLATION', 'False').lower() == 'true'  # One process per comparison model
+    MODEL_PROCESS_CPUS: str = os.getenv('MODEL_PROCESS_CPUS', '')  # e.g. "primary=0-1;finbert=6,7", others split the rest
+    MODEL_PROCESS_START_TIMEOUT: float = float(os.getenv('MODEL_PROCESS_START_TIMEOUT', 300))  # seconds
+    COMPARE_MODE: str = os.getenv('COMPARE_MODE', 'full')  # 'full', 'cascade' (cheapest first) or 'quorum' (fast majority) or 'routed' (domain models only)
+    COMPARE_CASCADE_CONFIDENCE: float = float(os.getenv('COMPARE_CASCADE_CONFIDENCE', 0.9))  # Mean top-class probability to stop at
+    COMPARE_CASCADE_MARGIN: float = float(os.getenv('COMPARE_CASCADE_MARGIN', 0))  # Mean top-vs-runner-up margin to stop at, 0 = off
+    COMPARE_DEADLINE: float = float(os.getenv('COMPARE_DEADLINE', 30))  # seconds a quorum comparison waits, 0 = no deadline
+    COMPARE_ROUTE_CLOSE_RATIO: float = float(os.getenv('COMPARE_ROUTE_CLOSE_RATIO', 2.0))  # Routed mode also runs the runner-up domain's model unless the winner scores this many times higher
+    ASGI_INFERENCE_WORKERS: int = int(os.getenv('ASGI_INFERENCE_WORKERS', 4))  # Threads running inference for app.asgi
+    ASGI_MAX_PENDING: int = int(os.getenv('ASGI_MAX_PENDING', 1000))  # Queued inference calls before app.asgi answers 503
+
+    # Tier-0 classifier settings (hashed n-gram linear model in front of the transformer)
+    TIER0_MODEL_PATH: Optional[str] = os.getenv('TIER0_MODEL_PATH', None)  # .npz from `python -m app.tier0 train`
+    TIER0_THRESHOLD: float = float(os.getenv('TIER0_THRESHOLD', 0.9))  # Calibrated confidence needed to answer at tier 0
+
+    # Prediction cache settings
+    PREDICTION_CACHE_ENABLED: bool = os.getenv('PREDICTION_CACHE_ENABLED', 'True').lower() == 'true'
+    PREDICTION_CACHE_MAX_ENTRIES: int = int(os.getenv('PREDICTION_CACHE_MAX_ENTRIES', 10000))
+    PREDICTION_CACHE_TTL: float = float(os.getenv('PREDICTION_CACHE_TTL', 3600))  # seconds, 0 = never expire
+    PREDICTION_CACHE_MAX_MB: float = float(os.getenv('PREDICTION_CACHE_MAX_MB', 32))
+    PREDICTION_STORE_PATH: Optional[str] = os.getenv('PREDICTION_STORE_PATH', None)  # SQLite file shared by workers
+    PREDICTION_STORE_TTL: float = float(os.getenv('PREDICTION_STORE_TTL', 7 * 24 * 3600))  # seconds, 0 = never expire
+    PREDICTION_STORE_PRUNE_EVERY: int = int(os.getenv('PREDICTION_STORE_PRUNE_EVERY', 1000))  # Rows written between expiry sweeps
+    PREDICTION_STORE_WARMUP_FILE: Optional[str] = os.getenv('PREDICTION_STORE_WARMUP_FILE', None)  # JSONL request log
+
     # Security settings
     CORS_ORIGINS: str = os.getenv('CORS_ORIGINS', '*')
-    MAX_CONTENT_LENGTH: int = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024))  # 16KB
+    MAX_CONTENT_LENGTH: int = int(os.getenv('MAX_CONTENT_LENGTH', (64 if LONG_TEXT_MODE else 16) * 1024))  # 16KB, 64KB for long texts
+    STREAM_MAX_CONTENT_LENGTH: int = int(os.getenv('STREAM_MAX_CONTENT_LENGTH', 0))  # NDJSON uploads, 0 = unlimited
+    STREAM_MAX_LINE_BYTES: int = int(os.getenv('STREAM_MAX_LINE_BYTES', 64 * 1024))
+    STREAM_CHUNK_SIZE: int = int(os.getenv('STREAM_CHUNK_SIZE', 64))  # Texts per forward-pass chunk
 
 
 @dataclass
@@ -54,6 +118,7 @@ class ProductionConfig(Config):
     DEBUG: bool = False
     SECRET_KEY: str = os.getenv('SECRET_KEY', None)
     LOG_LEVEL: str = 'WARNING'
+    MODEL_BACKGROUND_LOAD: bool = os.getenv('MODEL_BACKGROUND_LOAD', 'True').lower() == 'true'
     CORS_ORIGINS: str = os.getenv('CORS_ORIGINS', 'https://yourdomain.com')
     
     def __post_init__(self):
@@ -0,0 +1,29 @@
+"""
+Gunicorn configuration for the production image.
+
+The master imports the app once with the model memory-mapped from its
+safetensors files, freezes the garbage collector and then forks the workers,
+so every worker serves from the same physical copy of the weights. The
+master runs torch single-threaded; workers size their own thread pools in
+post_fork.
+"""
+import os
+
+# Read by config.config when the app is imported in the master
+os.environ.setdefault('MODEL_PRELOAD', 'true')
+os.environ.setdefault('MODEL_MMAP_WEIGHTS', 'true')
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+preload_app = True
+accesslog = '-'
+
+
+def post_fork(server, worker):
+    """Start per-process threads and split the torch thread budget across workers."""
+    from app.model import init_worker_process
+
+    init_worker_process(server.cfg.workers)
@@ -11,7 +11,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import application components
 from app.app import app
-from config import TestingConfig
+from config.config import TestingConfig
 
 
 @pytest.fixture
@@ -25,6 +25,23 @@ def client():
             yield client
 
 
+@pytest.fixture
+def fresh_model_state(monkeypatch):
+    """Reset the global model and health monitor so each test starts from 'not_started'."""
+    import threading
+    import app.model as model_module
+    from app.health import HealthMonitor
+    
+    monkeypatch.setattr(model_module, '_sentiment_analyzer', None)
+    monkeypatch.setattr(model_module, '_model_ready', threading.Event())
+    monkeypatch.setattr(model_module, '_loader_thread', None)
+    monkeypatch.setattr(model_module, '_replica_pool', None)
+    monkeypatch.setattr(model_module, '_load_status',
+                        {'state': 'not_started', 'error': None, 'started_at': None, 'load_time': None})
+    monkeypatch.setattr(model_module, '_health_monitor',
+                        HealthMonitor(model_module._health_probe, model_module.is_model_ready, probe_interval=0))
+
+
 @pytest.fixture
 def mock_model():
     """Mock the sentiment analysis model for testing."""
@@ -67,6 +84,59 @@ def sample_texts():
     }
 
 
+TINY_VOCAB = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]",
+              "the", "food", "was", "great", "terrible", "okay", "service",
+              "love", "hate", "it", "this", "place", "bad", "good", "slow"]
+
+
+@pytest.fixture
+def tiny_model_dir(tmp_path):
+    """Save a randomly initialised two-layer DistilBERT classifier (no downloads)."""
+    import torch
+    from transformers import (DistilBertConfig, DistilBertForSequenceClassification,
+                              DistilBertTokenizerFast)
+    
+    vocab_file = tmp_path / "vocab.txt"
+    vocab_file.write_text("\n".join(TINY_VOCAB), encoding="utf-8")
+    tokenizer = DistilBertTokenizerFast(vocab_file=str(vocab_file))
+    
+    torch.manual_seed(0)
+    model_config = DistilBertConfig(
+        vocab_size=len(TINY_VOCAB), dim=32, n_layers=2, n_heads=2, hidden_dim=64,
+        max_position_embeddings=64, num_labels=3,
+        id2label={0: "LABEL_0", 1: "LABEL_1", 2: "LABEL_2"},
+        label2id={"LABEL_0": 0, "LABEL_1": 1, "LABEL_2": 2}
+    )
+    model = DistilBertForSequenceClassification(model_config).eval()
+    
+    model_dir = tmp_path / "tiny_model"
+    model.save_pretrained(str(model_dir))
+    tokenizer.save_pretrained(str(model_dir))
+    return str(model_dir)
+
+
+@pytest.fixture
+def tiny_pipeline(tiny_model_dir):
+    """Sentiment pipeline around the tiny DistilBERT classifier."""
+    from transformers import pipeline
+    return pipeline("sentiment-analysis", model=tiny_model_dir, top_k=1)
+
+
+@pytest.fixture
+def tiny_eval_split(tmp_path):
+    """Labelled split saved in the Pre_processed on-disk format."""
+    from datasets import Dataset
+    
+    texts = ["the food was great", "terrible service", "it was okay",
+             "love this place", "hate it", "the food was bad",
+             "good service", "slow service", "this place was okay"] * 3
+    labels = [2, 0, 1, 2, 0, 0, 2, 0, 1] * 3
+    
+    split_dir = tmp_path / "eval_split"
+    Dataset.from_dict({"text": texts, "labels": labels}).save_to_disk(str(split_dir))
+    return str(split_dir)
+
+
 @pytest.fixture
 def api_headers():
     """Standard headers for API requests."""
@@ -0,0 +1,265 @@
+"""
+Unit tests for the advanced (multi-model) analyzer.
+Models are replaced with lightweight fakes so no weights are downloaded.
+"""
+import pytest
+import sys
+import os
+import threading
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.advanced_model import AdvancedSentimentAnalyzer, ModelResult
+
+
+class FakeTokenizer:
+    """Whitespace tokenizer exposing the fast-tokenizer call signature."""
+
+    def __call__(self, texts, truncation=True):
+        return {'input_ids': [text.split() for text in texts]}
+
+
+class FakePipeline:
+    """Stand-in for a return_all_scores sentiment pipeline."""
+
+    def __init__(self, fail_on=None):
+        self.tokenizer = FakeTokenizer()
+        self.fail_on = fail_on
+        self.calls = []
+
+    def _scores(self, text):
+        if text == self.fail_on:
+            raise ValueError("bad input")
+        positive = 0.9 if 'good' in text else 0.1
+        return [{'label': 'POSITIVE', 'score': positive},
+                {'label': 'NEGATIVE', 'score': 1 - positive}]
+
+    def __call__(self, inputs, **kwargs):
+        self.calls.append(inputs)
+        if isinstance(inputs, list):
+            return [self._scores(text) for text in inputs]
+        return [self._scores(inputs)]
+
+
+@pytest.fixture
+def analyzer():
+    """Analyzer with every model replaced by a fake and loaded."""
+    with patch('app.advanced_model.pipeline', return_value=FakePipeline()):
+        instance = AdvancedSentimentAnalyzer()
+        instance.load_models()
+    return instance
+
+
+class TestBatchPredict:
+    """Test cases for length-bucketed batch prediction."""
+
+    def test_results_keep_original_order(self, analyzer):
+        """Results line up with the input texts."""
+        texts = ["good " * 30, "bad", "good", "bad " * 10]
+        results = analyzer.batch_predict(texts, 'distilbert')
+
+        assert [r.sentiment for r in results] == ['Positive', 'Negative', 'Positive', 'Negative']
+
+    def test_one_forward_pass_per_bucket(self, analyzer):
+        """Texts are sent to the model as length-sorted batches, not one by one."""
+        model = FakePipeline()
+        analyzer.models['distilbert'] = model
+
+        analyzer.batch_predict(["good day", "bad", "good good good"], 'distilbert')
+
+        assert model.calls == [["bad", "good day", "good good good"]]
+
+    def test_bad_item_maps_to_error_only(self, analyzer):
+        """A failing text becomes an Error result without sinking its bucket."""
+        analyzer.models['distilbert'] = FakePipeline(fail_on="broken")
+
+        results = analyzer.batch_predict(["good", "broken", "bad"], 'distilbert')
+
+        assert [r.sentiment for r in results] == ['Positive', 'Error', 'Negative']
+
+    def test_unknown_model(self, analyzer):
+        """Requesting an unavailable model raises ValueError."""
+        with pytest.raises(ValueError):
+            analyzer.batch_predict(["good"], 'missing')
+
+
+class TestComparison:
+    """Test cases for multi-model comparison."""
+
+    def test_results_carry_probabilities(self, analyzer):
+        """Each model result reports its full mapped class distribution."""
+        result = analyzer.predict_with_comparison("good", models=['distilbert'])
+
+        assert result.results[0].probabilities == pytest.approx({'Positive': 0.9, 'Negative': 0.1})
+
+    def test_consensus_uses_full_distributions(self, analyzer):
+        """Two lukewarm Positive votes lose to one confident Negative."""
+        def result(name, positive):
+            sentiment = 'Positive' if positive > 0.5 else 'Negative'
+            return ModelResult(name, sentiment, max(positive, 1 - positive), 0.0, datetime.now(),
+                               probabilities={'Positive': positive, 'Negative': 1 - positive})
+
+        results = {'primary': result('a', 0.55), 'distilbert': result('b', 0.55), 'finbert': result('c', 0.05)}
+        with patch.object(analyzer, 'predict_single_model', side_effect=lambda text, key, use_cache: results[key]):
+            comparison = analyzer.predict_with_comparison("mixed", models=list(results))
+
+        assert comparison.consensus_sentiment == 'Negative'
+
+    def test_models_run_on_persistent_executors(self, analyzer):
+        """Comparisons reuse one bounded executor per model across requests."""
+        executors = dict(analyzer.executors.executors)
+
+        analyzer.predict_with_comparison("good", models=['distilbert'])
+        analyzer.predict_with_comparison("bad", models=['distilbert'])
+
+        assert analyzer.executors.executors == executors
+        stats = analyzer.get_executor_stats()['distilbert']
+        assert stats['completed'] == 2
+        assert stats['workers'] == 1
+
+    def test_cached_results_keep_full_distributions(self, analyzer):
+        """A comparison served from cache reaches the same soft-vote consensus as a fresh one."""
+        class FixedPipeline:
+            def __init__(self, scores):
+                self.scores = scores
+
+            def __call__(self, inputs, **kwargs):
+                return [[{'label': label, 'score': score} for label, score in self.scores.items()]]
+
+        analyzer.models['cardiffnlp'] = FixedPipeline({'LABEL_2': 0.50, 'LABEL_1': 0.30, 'LABEL_0': 0.20})
+        analyzer.models['finbert'] = FixedPipeline({'negative': 0.45, 'neutral': 0.44, 'positive': 0.11})
+
+        fresh = analyzer.predict_with_comparison("mixed", models=['cardiffnlp', 'finbert'])
+        cached = analyzer.predict_with_comparison("mixed", models=['cardiffnlp', 'finbert'])
+
+        assert analyzer.get_model_performance()['finbert']['cache_hits'] == 1
+        assert fresh.consensus_sentiment == cached.consensus_sentiment == 'Neutral'
+        assert ({r.model_name: r.probabilities for r in cached.results} ==
+                {r.model_name: r.probabilities for r in fresh.results})
+
+    def test_cascade_stops_once_confident(self, analyzer):
+        """A confident first model ends the cascade; the rest are reported as skipped."""
+        comparison = analyzer.predict_with_comparison("good", models=['cardiffnlp', 'distilbert'], mode='cascade')
+
+        assert comparison.models_run == ['distilbert']
+        assert comparison.skipped_models == ['cardiffnlp']
+        assert comparison.consensus_sentiment == 'Positive'
+        assert analyzer.get_compare_stats()['cascade']['average_models_run'] == 1
+
+    def test_cascade_runs_cheapest_first_until_confident(self, analyzer):
+        """Uncertain models hand over to the next cheapest one until the mean clears the threshold."""
+        positives = {'primary': 0.6, 'distilbert': 0.6, 'finbert': 0.99, 'cardiffnlp': 0.99}
+
+        def predict(text, key, use_cache):
+            return ModelResult(key, 'Positive', positives[key], 0.0, datetime.now(),
+                               probabilities={'Positive': positives[key], 'Negative': 1 - positives[key]})
+
+        with patch.object(analyzer, 'predict_single_model', side_effect=predict), \
+                patch('app.advanced_model.config.COMPARE_CASCADE_CONFIDENCE', 0.7):
+            comparison = analyzer.predict_with_comparison("fine", mode='cascade')
+
+        assert comparison.models_run == ['primary', 'distilbert', 'finbert']
+        assert comparison.skipped_models == ['cardiffnlp']
+
+    def _stalling_predict(self, stalled, release):
+        def predict(text, key, use_cache, abandoned=None):
+            if key in stalled:
+                release.wait(10)
+            return ModelResult(key, 'Positive', 0.95, 0.0, datetime.now(),
+                               probabilities={'Positive': 0.95, 'Negative': 0.05})
+        return predict
+
+    def test_quorum_returns_without_the_straggler(self, analyzer):
+        """Three agreeing models settle a four-model vote; the stalled one is skipped."""
+        release = threading.Event()
+        with patch.object(analyzer, 'predict_single_model', side_effect=self._stalling_predict({'finbert'}, release)):
+            start = time.perf_counter()
+            comparison = analyzer.predict_with_comparison("great", mode='quorum')
+            elapsed = time.perf_counter() - start
+            release.set()
+
+        assert elapsed < 5
+        assert sorted(comparison.models_run) == ['cardiffnlp', 'distilbert', 'primary']
+        assert comparison.skipped_models == ['finbert']
+        assert comparison.consensus_sentiment == 'Positive'
+
+    def test_quorum_straggler_skips_its_forward_pass(self, analyzer):
+        """A straggler still loading when the vote settles never runs the model."""
+        analyzer.pool.unload('finbert')
+        loading, release = threading.Event(), threading.Event()
+        load_model = analyzer.pool._loader
+
+        def slow_load(key):
+            if key == 'finbert':
+                loading.set()
+                release.wait(10)
+            return load_model(key)
+
+        analyzer.pool._loader = slow_load
+        straggler = FakePipeline()
+        def settled(results, outstanding):
+            return loading.wait(5) and len(results) == 3
+
+        with patch('app.advanced_model.pipeline', return_value=straggler), \
+                patch.object(analyzer, '_consensus_is_settled', side_effect=settled):
+            comparison = analyzer.predict_with_comparison("good", mode='quorum')
+            release.set()
+            analyzer.executors.executors['finbert'].submit(lambda: None).result(10)
+
+        assert comparison.skipped_models == ['finbert']
+        assert "good" not in straggler.calls  # Only the load-time smoke test ran
+        assert analyzer.executors.get_stats()['finbert']['cancelled'] == 1
+
+    def test_quorum_deadline_answers_with_results_so_far(self, analyzer):
+        """An unsettled vote returns at the deadline with whatever has finished."""
+        release = threading.Event()
+        stalled = {'cardiffnlp', 'finbert'}
+        with patch.object(analyzer, 'predict_single_model', side_effect=self._stalling_predict(stalled, release)), \
+                patch('app.advanced_model.config.COMPARE_DEADLINE', 0.3):
+            start = time.perf_counter()
+            comparison = analyzer.predict_with_comparison("great", mode='quorum')
+            elapsed = time.perf_counter() - start
+            release.set()
+
+        assert 0.3 <= elapsed < 5
+        assert sorted(comparison.models_run) == ['distilbert', 'primary']
+        assert sorted(comparison.skipped_models) == ['cardiffnlp', 'finbert']
+
+    def test_routed_runs_only_the_domain_model(self, analyzer):
+        """Finance text goes to FinBERT alone and the decision is reported."""
+        comparison = analyzer.predict_with_comparison(
+            "$AAPL shares rose 5% after quarterly earnings beat analysts' forecast", mode='routed')
+
+        assert comparison.models_run == ['finbert']
+        assert sorted(comparison.skipped_models) == ['cardiffnlp', 'distilbert', 'primary']
+        assert comparison.routing['domain'] == 'finance'
+        assert analyzer.get_routing_stats()['domains'] == {'finance': 1}
+
+    def test_routed_close_calls_and_plain_text(self, analyzer):
+        """A close call adds the runner-up domain's model; plain text gets the review and general models."""
+        mixed = analyzer.predict_with_comparison("@chef the pizza was good lol #foodie", mode='routed')
+        plain = analyzer.predict_with_comparison("good", mode='routed')
+
+        assert sorted(mixed.models_run) == ['cardiffnlp', 'primary']
+        assert plain.routing['domain'] == 'general'
+        assert sorted(plain.models_run) == ['distilbert', 'primary']
+
+
+class TestModelPool:
+    """Test cases for lazy model loading in the analyzer."""
+
+    def test_construction_loads_nothing(self):
+        """Models are only loaded when first used."""
+        with patch('app.advanced_model.pipeline', return_value=FakePipeline()) as factory:
+            instance = AdvancedSentimentAnalyzer()
+            assert factory.call_count == 0
+
+            instance.predict_single_model("good", 'finbert')
+
+        assert factory.call_count == 1
+        assert instance.get_pool_stats()['models']['finbert']['state'] == 'loaded'
+        assert instance.get_pool_stats()['models']['primary']['state'] == 'unloaded'
@@ -0,0 +1,137 @@
+"""
+Unit tests for the ASGI (asyncio) variant of the API.
+Inference is patched out, so no weights are downloaded.
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip('starlette')
+pytest.importorskip('httpx')
+
+import httpx
+from flask import Flask
+from starlette.testclient import TestClient
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.advanced_api import advanced_bp
+from app.advanced_model import ModelResult
+from app.asgi import InferenceQueue, app as asgi_app
+from app.app import app as flask_app
+
+
+class FakeAnalyzer:
+    """Labels texts containing 'good' as Positive."""
+
+    model_configs = {'distilbert': {}}
+
+    def batch_predict(self, texts, model_key=None):
+        return [ModelResult('fake', 'Positive' if 'good' in text else 'Negative', 0.9, 0.001, datetime.now())
+                for text in texts]
+
+
+@pytest.fixture
+def asgi_client():
+    with TestClient(asgi_app) as client:
+        yield client
+
+
+def _without_timing(body):
+    """Drop fields that legitimately differ between two runs."""
+    if isinstance(body, dict):
+        return {key: _without_timing(value) for key, value in body.items()
+                if key not in ('processing_time', 'total_processing_time', 'timestamp')}
+    if isinstance(body, list):
+        return [_without_timing(item) for item in body]
+    return body
+
+
+class TestContracts:
+    """The ASGI routes answer exactly like the Flask routes."""
+
+    @pytest.mark.parametrize('kwargs', [
+        {'json': {'text': 'This is a great product!'}},
+        {'json': {'text': 'hi'}},
+        {'json': {}},
+        {'content': 'text=hello', 'headers': {'Content-Type': 'text/plain'}},
+        {'content': '{not json', 'headers': {'Content-Type': 'application/json'}},
+        {'content': '[1, 2]', 'headers': {'Content-Type': 'application/json'}},
+    ])
+    def test_analyze_matches_flask(self, asgi_client, kwargs):
+        with patch('app.app.predict', return_value=('Positive', 0.95)), \
+                patch('app.asgi.predict', return_value=('Positive', 0.95)):
+            flask_response = flask_app.test_client().post(
+                '/api/analyze', data=kwargs.get('content', json.dumps(kwargs.get('json'))),
+                content_type=kwargs.get('headers', {}).get('Content-Type', 'application/json'))
+            asgi_response = asgi_client.post('/api/analyze', **kwargs)
+
+        assert asgi_response.status_code == flask_response.status_code
+        assert _without_timing(asgi_response.json()) == _without_timing(flask_response.get_json())
+
+    def test_stream_matches_flask(self, asgi_client, monkeypatch):
+        """NDJSON records, including oversized and invalid lines, are answered identically."""
+        from config.config import config
+        monkeypatch.setattr(config, 'STREAM_MAX_LINE_BYTES', 64)
+        body = '\n'.join([json.dumps({'text': 'good food', 'id': 'a'}), '', 'not json',
+                          json.dumps('x' * 100), json.dumps(5), json.dumps('bad service')]) + '\n'
+
+        flask = Flask(__name__)
+        flask.register_blueprint(advanced_bp)
+        with patch('app.advanced_api.get_advanced_analyzer', return_value=FakeAnalyzer()), \
+                patch('app.asgi.get_advanced_analyzer', return_value=FakeAnalyzer()):
+            expected = flask.test_client().post('/api/v2/batch/stream?chunk_size=2', data=body,
+                                                content_type='application/x-ndjson').get_data(as_text=True)
+            actual = asgi_client.post('/api/v2/batch/stream?chunk_size=2', content=body,
+                                      headers={'Content-Type': 'application/x-ndjson'}).text
+
+        assert ([_without_timing(json.loads(line)) for line in actual.splitlines()] ==
+                [_without_timing(json.loads(line)) for line in expected.splitlines()])
+
+    def test_web_interface_served_by_flask(self, asgi_client):
+        response = asgi_client.get('/')
+        assert response.status_code == 200
+        assert 'AI Sentiment Analyzer' in response.text
+
+
+class TestInferenceQueue:
+    """Test cases for the bounded inference hand-off."""
+
+    def test_waiting_requests_do_not_block_the_loop(self):
+        """Requests parked on a busy model cost no threads; probes still answer at once."""
+        release = threading.Event()
+
+        def slow_predict(text):
+            release.wait(10)
+            return 'Positive', 0.9
+
+        async def scenario():
+            transport = httpx.ASGITransport(app=asgi_app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+                queue = InferenceQueue(workers=1, max_pending=10)
+                with patch('app.asgi.inference', queue), patch('app.asgi.predict', slow_predict):
+                    waiting = [asyncio.create_task(client.post('/api/analyze', json={'text': f'review {i}'}))
+                               for i in range(30)]
+                    await asyncio.sleep(0.2)
+
+                    start = time.perf_counter()
+                    live = await client.get('/api/live')
+                    assert live.status_code == 200 and time.perf_counter() - start < 1.0
+                    assert queue.get_stats()['pending'] == 10
+
+                    release.set()
+                    responses = await asyncio.gather(*waiting)
+                queue.shutdown()
+            return [response.status_code for response in responses], queue.get_stats()
+
+        statuses, stats = asyncio.run(scenario())
+        assert statuses.count(200) == 10 and statuses.count(503) == 20
+        assert stats['rejected'] == 20 and stats['completed'] == 10
@@ -0,0 +1,97 @@
+"""
+Unit tests for the pluggable inference backends.
+Uses a tiny randomly initialised DistilBERT so no weights are downloaded.
+"""
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.backends import BACKENDS, InferenceBackend, backend_for, create_backend
+from app.model import SentimentAnalyzer
+from app.quantization import select_quantized_engine
+from config.config import config
+
+TEXTS = ["the food was great", "terrible service and slow", "okay"]
+
+
+def _scores(pipe):
+    return [output[0]['score'] for output in pipe(TEXTS)]
+
+
+class TestBackendSelection:
+    """Test cases for choosing a backend from configuration."""
+
+    def test_unknown_backend_falls_back_to_eager(self):
+        """Unknown names produce the eager backend."""
+        assert type(create_backend('tensorrt')) is InferenceBackend
+        assert type(create_backend(None)) is InferenceBackend
+
+    def test_backend_for_model_key(self):
+        """Per-key entries override the node-wide default."""
+        with patch.multiple(config, MODEL_BACKEND='eager', MODEL_BACKENDS='finbert=bf16, default=torchscript'):
+            assert backend_for('finbert') == 'bf16'
+            assert backend_for('default') == 'torchscript'
+            assert backend_for('distilbert') == 'eager'
+
+
+class TestBackends:
+    """Test cases for loading and running each backend."""
+
+    @pytest.mark.parametrize('name', ['eager', 'dynamic_int8', 'torchscript', 'bf16'])
+    def test_backend_matches_eager(self, name, tiny_model_dir):
+        """Every backend serves predictions close to eager fp32."""
+        from transformers import pipeline
+        if name == 'dynamic_int8' and select_quantized_engine() is None:
+            pytest.skip("No quantized engine in this PyTorch build")
+
+        expected = _scores(pipeline("sentiment-analysis", model=tiny_model_dir, top_k=1))
+        backend = create_backend(name)
+        pipe = backend.load(tiny_model_dir, pipeline_factory=pipeline, top_k=1)
+
+        assert backend.active, backend.fallback_reason
+        assert _scores(pipe) == pytest.approx(expected, abs=0.05)
+
+        stats = backend.get_stats()
+        assert stats['backend'] == name
+        assert stats['load_time'] > 0
+        assert stats['weights_bytes'] > 0
+
+    def test_failed_backend_falls_back_to_eager(self, tiny_pipeline):
+        """A backend that cannot prepare the model leaves the fp32 model serving."""
+        backend = create_backend('dynamic_int8')
+        fp32_model = tiny_pipeline.model
+        with patch.object(type(backend), 'optimize', side_effect=RuntimeError("unsupported")):
+            backend.apply(tiny_pipeline)
+
+        assert backend.active is False
+        assert backend.fallback_reason == "unsupported"
+        assert tiny_pipeline.model is fp32_model
+
+    def test_latency_recorded(self):
+        """Recorded calls feed the latency statistics."""
+        backend = create_backend('eager')
+        backend.record(0.2, texts=4)
+        backend.record(0.1)
+
+        stats = backend.get_stats()
+        assert stats['calls'] == 2
+        assert stats['texts'] == 5
+        assert stats['average_latency'] == pytest.approx(0.15)
+
+    @patch('app.model.pipeline')
+    def test_analyzer_records_backend_latency(self, mock_pipeline):
+        """SentimentAnalyzer predictions are timed by its backend."""
+        mock_pipe = MagicMock(return_value=[{'label': 'LABEL_2', 'score': 0.9}])
+        mock_pipeline.return_value = mock_pipe
+
+        with patch.multiple(config, PREDICTION_CACHE_ENABLED=False):
+            analyzer = SentimentAnalyzer()
+        analyzer.store = None
+        analyzer.predict("Great food")
+
+        assert analyzer.backend.name in BACKENDS
+        assert analyzer.backend.get_stats()['calls'] == 1
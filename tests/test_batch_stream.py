@@ -0,0 +1,99 @@
+"""
+Unit tests for the streaming NDJSON batch endpoint.
+The advanced analyzer is replaced with a fake so no weights are downloaded.
+"""
+import json
+import sys
+import os
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from flask import Flask
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.advanced_api import advanced_bp
+from app.advanced_model import ModelResult
+
+
+class FakeAnalyzer:
+    """Records chunk sizes and labels texts containing 'good' as Positive."""
+
+    model_configs = {'distilbert': {}}
+
+    def __init__(self):
+        self.chunks = []
+
+    def batch_predict(self, texts, model_key=None):
+        self.chunks.append(len(texts))
+        return [ModelResult('fake', 'Positive' if 'good' in text else 'Negative', 0.9, 0.001, datetime.now())
+                for text in texts]
+
+
+@pytest.fixture
+def stream_client():
+    """Client for an app with only the advanced blueprint and the default 16KB body cap."""
+    app = Flask(__name__)
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024
+    app.register_blueprint(advanced_bp)
+    analyzer = FakeAnalyzer()
+    with patch('app.advanced_api.get_advanced_analyzer', return_value=analyzer):
+        with app.test_client() as client:
+            yield client, analyzer
+
+
+def post_lines(client, lines, query=''):
+    body = '\n'.join(lines) + '\n'
+    response = client.post(f'/api/v2/batch/stream{query}', data=body,
+                           content_type='application/x-ndjson')
+    return response, [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+class TestBatchStream:
+    """Test cases for /api/v2/batch/stream."""
+
+    def test_results_streamed_in_chunks(self, stream_client):
+        """Texts are inferred in bounded chunks and streamed back in order."""
+        client, analyzer = stream_client
+        lines = [json.dumps({'text': f'good review {i}' if i % 2 else f'bad review {i}', 'id': i})
+                 for i in range(25)]
+
+        response, records = post_lines(client, lines, '?chunk_size=10')
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        assert analyzer.chunks == [10, 10, 5]
+        assert [r['index'] for r in records[:-1]] == list(range(25))
+        assert records[1]['sentiment'] == 'Positive' and records[1]['id'] == 1
+        assert records[-1]['summary']['processed'] == 25
+
+    def test_bodies_beyond_app_limit_accepted(self, stream_client):
+        """Uploads far larger than MAX_CONTENT_LENGTH stream through."""
+        client, analyzer = stream_client
+        lines = [json.dumps(f'a good review number {i} ' + 'x' * 50) for i in range(2000)]
+
+        response, records = post_lines(client, lines)
+
+        assert response.status_code == 200
+        assert records[-1]['summary']['processed'] == 2000
+        assert max(analyzer.chunks) <= 64
+
+    def test_bad_lines_reported_individually(self, stream_client):
+        """Malformed lines become error records without stopping the stream."""
+        client, _ = stream_client
+
+        response, records = post_lines(client, ['"good"', '{not json', '{"text": 5, "id": "x"}', '', '"bad"'])
+
+        assert [r.get('error') is not None for r in records[:-1]] == [False, True, True, False]
+        assert records[2]['id'] == 'x'
+        assert records[-1]['summary'] == {**records[-1]['summary'], 'processed': 2, 'rejected': 2}
+
+    def test_unknown_model_rejected(self, stream_client):
+        """An unknown model key fails fast with 400."""
+        client, _ = stream_client
+
+        response = client.post('/api/v2/batch/stream?model=missing', data='"good"\n')
+
+        assert response.status_code == 400
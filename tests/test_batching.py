@@ -0,0 +1,166 @@
+"""
+Unit tests for the request-coalescing micro-batcher.
+"""
+import pytest
+import sys
+import os
+import threading
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.batching import MicroBatcher, _bucket_label, length_buckets
+
+
+def _echo_predict(texts):
+    """Fake batched model: label is the text, score its length."""
+    return [(text, float(len(text))) for text in texts]
+
+
+class TestMicroBatcher:
+    """Test cases for the MicroBatcher class."""
+
+    def test_single_request(self):
+        """A lone request is dispatched once the wait window expires."""
+        batcher = MicroBatcher(_echo_predict, max_batch_size=8, max_wait_ms=5)
+
+        assert batcher.submit("hello", timeout=2) == ("hello", 5.0)
+        batcher.shutdown()
+
+    def test_concurrent_requests_are_coalesced(self):
+        """Concurrent callers share forward passes and get their own results."""
+        batch_sizes = []
+
+        def predict_fn(texts):
+            batch_sizes.append(len(texts))
+            return _echo_predict(texts)
+
+        batcher = MicroBatcher(predict_fn, max_batch_size=4, max_wait_ms=200)
+        results = {}
+
+        def worker(i):
+            results[i] = batcher.submit(f"text-{i}", timeout=5)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        batcher.shutdown()
+
+        assert results == {i: (f"text-{i}", float(len(f"text-{i}"))) for i in range(8)}
+        assert max(batch_sizes) <= 4
+        assert len(batch_sizes) < 8
+
+    def test_batch_error_propagates_to_callers(self):
+        """A failing forward pass raises in every caller of that batch."""
+        def predict_fn(texts):
+            raise ValueError("boom")
+
+        batcher = MicroBatcher(predict_fn, max_batch_size=2, max_wait_ms=1)
+
+        with pytest.raises(ValueError):
+            batcher.submit("text", timeout=2)
+        assert batcher.get_stats()['batch_errors'] == 1
+        batcher.shutdown()
+
+    def test_bad_text_fails_only_its_own_caller(self):
+        """A batch that fails is retried per text, so callers sharing it still get results."""
+        batch_sizes = []
+
+        def predict_fn(texts):
+            batch_sizes.append(len(texts))
+            if "bad" in texts:
+                raise ValueError("bad text")
+            return _echo_predict(texts)
+
+        batcher = MicroBatcher(predict_fn, max_batch_size=4, max_wait_ms=200)
+        results = {}
+
+        def worker(text):
+            try:
+                results[text] = batcher.submit(text, timeout=5)
+            except ValueError as e:
+                results[text] = e
+
+        threads = [threading.Thread(target=worker, args=(text,)) for text in ("one", "bad", "three", "four")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        batcher.shutdown()
+
+        assert batch_sizes[0] == 4
+        assert isinstance(results.pop("bad"), ValueError)
+        assert results == {text: (text, float(len(text))) for text in ("one", "three", "four")}
+        assert batcher.get_stats()['batch_errors'] == 1
+
+    def test_timeout(self):
+        """Callers give up when no result arrives in time."""
+        release = threading.Event()
+
+        def predict_fn(texts):
+            release.wait(2)
+            return _echo_predict(texts)
+
+        batcher = MicroBatcher(predict_fn, max_batch_size=1, max_wait_ms=0)
+
+        with pytest.raises(TimeoutError):
+            batcher.submit("slow", timeout=0.05)
+        release.set()
+        batcher.shutdown()
+
+    def test_stats(self):
+        """Stats report queue depth and batch-size histograms."""
+        batcher = MicroBatcher(_echo_predict, max_batch_size=2, max_wait_ms=1)
+        batcher.submit("a", timeout=2)
+        batcher.submit("b", timeout=2)
+
+        stats = batcher.get_stats()
+        assert stats['enabled'] is True
+        assert stats['total_requests'] == 2
+        assert stats['queue_depth'] == 0
+        assert sum(stats['batch_size_histogram'].values()) == stats['total_batches']
+        assert sum(stats['queue_depth_histogram'].values()) == 2
+        batcher.shutdown()
+
+    @pytest.mark.parametrize("value,label", [
+        (0, "0"),
+        (1, "1"),
+        (2, "2-3"),
+        (3, "2-3"),
+        (5, "4-7"),
+        (16, "16-31"),
+    ])
+    def test_bucket_label(self, value, label):
+        """Queue depths fall into power-of-two buckets."""
+        assert _bucket_label(value) == label
+
+
+class TestLengthBuckets:
+    """Test cases for length-sorted bucketing."""
+
+    def test_buckets_are_sorted_and_bounded(self):
+        """Buckets group similar lengths and respect the size cap."""
+        lengths = [50, 3, 48, 5, 4, 49]
+        buckets = length_buckets(lengths, max_batch_size=3)
+
+        assert buckets == [[1, 4, 3], [2, 5, 0]]
+
+    def test_token_budget_splits_long_items(self):
+        """Padded token budget closes a bucket before it grows too large."""
+        lengths = [10, 10, 100, 100]
+        buckets = length_buckets(lengths, max_batch_size=8, max_tokens=150)
+
+        assert buckets == [[0, 1], [2], [3]]
+
+    def test_every_index_appears_once(self):
+        """Bucketing is a partition of the input indices."""
+        lengths = [7, 1, 9, 3, 3, 8, 2]
+        buckets = length_buckets(lengths, max_batch_size=2, max_tokens=20)
+
+        assert sorted(i for bucket in buckets for i in bucket) == list(range(len(lengths)))
+
+    def test_empty_input(self):
+        """No items means no buckets."""
+        assert length_buckets([], max_batch_size=4) == []
@@ -0,0 +1,131 @@
+"""
+Unit tests for lease-based multi-worker bulk scoring.
+Runs against the tiny local DistilBERT classifier, so no weights are downloaded.
+"""
+import json
+import sys
+import os
+import time
+
+import pyarrow.parquet as pq
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.bulk_coordinator import LeaseDirectory, merge_job, plan_job, run_local, run_worker
+from config.config import config
+
+TEXTS = ["the food was great", "terrible service", "it was okay", "love this place",
+         "hate it", "the food was great", "good service", "slow service", "bad"]
+
+
+@pytest.fixture
+def tiny_scorer(monkeypatch, tiny_model_dir):
+    """Point the default model at the tiny classifier and keep the shared store out of the run."""
+    monkeypatch.setattr(config, 'MODEL_NAME', tiny_model_dir)
+    monkeypatch.setattr(config, 'MODEL_QUANTIZATION', None)
+    monkeypatch.setattr(config, 'PREDICTION_STORE_PATH', None)
+    return tiny_model_dir
+
+
+@pytest.fixture
+def reviews_dir(tmp_path):
+    """Review split saved in the Pre_processed on-disk format."""
+    from datasets import Dataset
+
+    path = tmp_path / "reviews"
+    Dataset.from_dict({"text": TEXTS, "labels": list(range(len(TEXTS)))}).save_to_disk(str(path))
+    return str(path)
+
+
+class TestLeaseDirectory:
+    """Test cases for shard leases."""
+
+    def test_claim_is_exclusive_until_expiry(self, tmp_path):
+        """A live lease blocks other workers; an expired one is taken over once."""
+        leases = LeaseDirectory(str(tmp_path), lease_seconds=0.2)
+        first = leases.claim(0, 'worker-a')
+
+        assert first is not None and leases.holds(first)
+        assert leases.claim(0, 'worker-b') is None
+
+        time.sleep(0.3)
+        second = leases.claim(0, 'worker-b')
+        assert second is not None and second.generation == first.generation + 1
+        assert leases.claim(0, 'worker-c') is None
+        assert not leases.holds(first)
+        assert not leases.renew(first)
+        assert leases.renew(second)
+
+    def test_done_shards_cannot_be_claimed(self, tmp_path):
+        """Completion markers stop further claims and carry the shard statistics."""
+        leases = LeaseDirectory(str(tmp_path))
+        lease = leases.claim(3, 'worker-a')
+        leases.mark_done(3, {'partition': 3, 'rows': 10})
+        leases.release(lease)
+
+        assert leases.claim(3, 'worker-b') is None
+        assert leases.done_records() == {3: {'partition': 3, 'rows': 10}}
+
+
+class TestCoordinator:
+    """Test cases for planning, workers and merging."""
+
+    def test_worker_takes_over_expired_leases_and_merge(self, tiny_scorer, reviews_dir, tmp_path):
+        """Shards leased by a crashed worker are re-assigned once their leases expire."""
+        job_dir = str(tmp_path / "job")
+        manifest = plan_job(reviews_dir, job_dir, keep_columns=['labels'], shard_rows=4)
+        assert manifest['shards'] == 3
+
+        crashed = LeaseDirectory(job_dir, lease_seconds=0.3)
+        assert crashed.claim(0, 'crashed') is not None
+        assert crashed.claim(1, 'crashed') is not None
+
+        result = run_worker(job_dir, worker_id='survivor', poll_interval=0.05,
+                            dedup_path=str(tmp_path / "d.sqlite"))
+        assert sorted(result['shards']) == [0, 1, 2]
+        assert result['rows'] == len(TEXTS) and result['failed'] == []
+
+        summary = merge_job(job_dir)
+        assert summary['complete'] and summary['rows'] == len(TEXTS)
+        assert summary['workers'] == {'survivor': {'shards': 3, 'rows': len(TEXTS)}}
+        assert summary['fingerprints'] == [manifest['fingerprint']]
+
+        merged = pq.read_table(summary['output'])
+        assert merged.column('row').to_pylist() == list(range(len(TEXTS)))
+        assert merged.column('labels').to_pylist() == list(range(len(TEXTS)))
+
+    def test_worker_refuses_a_different_model(self, tiny_scorer, reviews_dir, tmp_path):
+        """Workers whose model fingerprint differs from the plan do not score."""
+        job_dir = str(tmp_path / "job")
+        plan_job(reviews_dir, job_dir, shard_rows=4)
+
+        manifest_path = os.path.join(job_dir, '_manifest.json')
+        with open(manifest_path, encoding='utf-8') as handle:
+            manifest = json.load(handle)
+        manifest['fingerprint'] = 'another-model'
+        with open(manifest_path, 'w', encoding='utf-8') as handle:
+            json.dump(manifest, handle)
+
+        with pytest.raises(ValueError, match='fingerprint'):
+            run_worker(job_dir, worker_id='mismatched', dedup_path=str(tmp_path / "d.sqlite"))
+        assert LeaseDirectory(job_dir).done_records() == {}
+
+    def test_merge_requires_every_shard(self, tiny_scorer, reviews_dir, tmp_path):
+        """Merging an unfinished job is refused."""
+        job_dir = str(tmp_path / "job")
+        plan_job(reviews_dir, job_dir, shard_rows=4)
+
+        with pytest.raises(ValueError, match='not done'):
+            merge_job(job_dir)
+
+    def test_local_workers(self, tiny_scorer, reviews_dir, tmp_path):
+        """Several local worker processes share the shards of one job."""
+        summary = run_local(reviews_dir, str(tmp_path / "job"), workers=2, shard_rows=3,
+                            poll_interval=0.05)
+
+        assert summary['complete'] and summary['partitions'] == 3
+        assert summary['rows'] == len(TEXTS)
+        assert set(summary['workers']) <= {'local-0', 'local-1'}
+        assert sum(worker['shards'] for worker in summary['workers'].values()) == 3
@@ -0,0 +1,141 @@
+"""
+Unit tests for the offline bulk scorer.
+Runs against the tiny local DistilBERT classifier, so no weights are downloaded.
+"""
+import json
+import sys
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import bulk_score
+from app.bulk_score import open_dataset, plan_partitions, resolve_input_files, run_bulk_score
+from config.config import config
+
+TEXTS = ["the food was great", "terrible service", "the food was great", None,
+         "love this place", "terrible  service", "hate it", "", "good service", "the food was great"]
+
+
+@pytest.fixture
+def tiny_scorer(monkeypatch, tiny_model_dir):
+    """Point the default model at the tiny classifier and keep the shared store out of the run."""
+    monkeypatch.setattr(config, 'MODEL_NAME', tiny_model_dir)
+    monkeypatch.setattr(config, 'MODEL_QUANTIZATION', None)
+    monkeypatch.setattr(config, 'PREDICTION_STORE_PATH', None)
+    return tiny_model_dir
+
+
+@pytest.fixture
+def reviews_dir(tmp_path):
+    """Review split saved in the Pre_processed on-disk format."""
+    from datasets import Dataset
+
+    path = tmp_path / "reviews"
+    Dataset.from_dict({"text": TEXTS, "labels": list(range(len(TEXTS)))}).save_to_disk(str(path))
+    return str(path)
+
+
+def read_output(output_dir):
+    parts = sorted(name for name in os.listdir(output_dir) if name.startswith('part-'))
+    return pa.concat_tables([pq.read_table(os.path.join(output_dir, name)) for name in parts]).sort_by('row')
+
+
+class TestInput:
+    """Test cases for input discovery and partitioning."""
+
+    def test_save_to_disk_directory_is_memory_mapped(self, reviews_dir):
+        """The Arrow stream files of a save_to_disk split are found and read."""
+        files = resolve_input_files(reviews_dir)
+        assert all(path.endswith('.arrow') for path in files)
+
+        table = open_dataset(files, ['text'])
+        assert table.column_names == ['text']
+        assert table.column('text').to_pylist() == TEXTS
+
+    def test_parquet_input(self, tmp_path):
+        """Parquet files are read with only the requested columns."""
+        path = str(tmp_path / "reviews.parquet")
+        pq.write_table(pa.table({'text': ['a', 'b'], 'extra': [1, 2]}), path)
+
+        assert open_dataset(resolve_input_files(path), ['text']).column_names == ['text']
+
+    def test_plan_partitions(self):
+        """Rows are split into fixed-size partitions with a short tail."""
+        assert plan_partitions(7, 3) == [(0, 0, 3), (1, 3, 6), (2, 6, 7)]
+        assert plan_partitions(0, 3) == []
+
+
+class TestBulkScore:
+    """Test cases for scoring, deduplication and resume."""
+
+    def test_scores_every_row_once_per_distinct_text(self, tiny_scorer, reviews_dir, tmp_path):
+        """Every row gets a score, but duplicate texts reach the model once."""
+        output_dir = str(tmp_path / "scores")
+        summary = run_bulk_score(reviews_dir, output_dir, keep_columns=['labels'], partition_rows=4)
+
+        assert summary['complete'] and summary['partitions'] == 3
+        assert summary['rows'] == len(TEXTS)
+        assert summary['empty'] == 2
+        assert summary['scored'] == 5  # "terrible  service" normalizes onto "terrible service"
+        assert summary['duplicates'] == 3
+
+        output = read_output(output_dir)
+        assert output.column('row').to_pylist() == list(range(len(TEXTS)))
+        assert output.column('labels').to_pylist() == list(range(len(TEXTS)))
+        sentiments = output.column('sentiment').to_pylist()
+        assert sentiments[3] is None and sentiments[7] is None
+        assert sentiments[0] == sentiments[2] == sentiments[9]
+        assert all(label in {'Negative', 'Neutral', 'Positive'}
+                   for label in sentiments if label is not None)
+
+    def test_resume_scores_only_unfinished_partitions(self, tiny_scorer, reviews_dir, tmp_path, monkeypatch):
+        """A rerun after a kill skips partitions recorded in the checkpoint."""
+        output_dir = str(tmp_path / "scores")
+        first = run_bulk_score(reviews_dir, output_dir, partition_rows=4)
+        expected = read_output(output_dir)
+
+        # Simulate a job killed before partition 1 finished
+        os.remove(os.path.join(output_dir, 'part-00001.parquet'))
+        scored = []
+        original = bulk_score.score_partition
+        monkeypatch.setattr(bulk_score, 'score_partition',
+                            lambda task: scored.append(task['partition']) or original(task))
+
+        second = run_bulk_score(reviews_dir, output_dir, partition_rows=4)
+
+        assert scored == [1]
+        assert second['resumed_partitions'] == 2
+        assert second['rows'] == first['rows']
+        assert read_output(output_dir).equals(expected)
+
+    def test_changed_settings_refuse_to_resume(self, tiny_scorer, reviews_dir, tmp_path):
+        """Resuming with a different partitioning needs --overwrite."""
+        output_dir = str(tmp_path / "scores")
+        run_bulk_score(reviews_dir, output_dir, partition_rows=4)
+
+        with pytest.raises(ValueError, match='partition_rows'):
+            run_bulk_score(reviews_dir, output_dir, partition_rows=5)
+
+        summary = run_bulk_score(reviews_dir, output_dir, partition_rows=5, overwrite=True)
+        assert summary['partitions'] == 2 and summary['resumed_partitions'] == 0
+
+    def test_arrow_output_with_worker_processes(self, tiny_scorer, reviews_dir, tmp_path):
+        """Worker processes each load the model and write Arrow partitions."""
+        output_dir = str(tmp_path / "scores")
+        summary = run_bulk_score(reviews_dir, output_dir, workers=2, partition_rows=5, output_format='arrow')
+
+        assert summary['complete'] and summary['rows'] == len(TEXTS)
+        assert len(summary['fingerprints']) == 1
+
+        with open(os.path.join(output_dir, '_checkpoint.jsonl'), encoding='utf-8') as handle:
+            records = [json.loads(line) for line in handle]
+        assert sorted(record['partition'] for record in records) == [0, 1]
+        assert all(record['pid'] != os.getpid() for record in records)
+
+        table = open_dataset(resolve_input_files(os.path.join(output_dir, 'part-00000.arrow')))
+        assert table.column('row').to_pylist() == [0, 1, 2, 3, 4]
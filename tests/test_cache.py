@@ -0,0 +1,190 @@
+"""
+Unit tests for the prediction cache.
+"""
+import sys
+import os
+import sqlite3
+import time
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.cache import (PersistentPredictionStore, PredictionCache, iter_warmup_texts,
+                       model_fingerprint, normalize_text, text_hash)
+
+
+class TestCacheKeys:
+    """Test cases for text normalization and key construction."""
+
+    def test_normalize_collapses_whitespace(self):
+        """Runs of whitespace collapse to single spaces."""
+        assert normalize_text("  Great \t food\n\nhere ") == "Great food here"
+
+    def test_normalize_applies_nfc(self):
+        """Decomposed characters compose to their NFC form."""
+        assert normalize_text("café") == "café"
+
+    def test_equivalent_texts_share_hash(self):
+        """Texts that normalize identically map to the same hash."""
+        assert text_hash("Great  food") == text_hash("Great food ")
+
+    def test_model_revision_and_variant_change_fingerprint(self):
+        """A different model, revision or variant never reuses an entry."""
+        fingerprint = model_fingerprint("model", "abc")
+        assert fingerprint != model_fingerprint("other", "abc")
+        assert fingerprint != model_fingerprint("model", "def")
+        assert fingerprint != model_fingerprint("model", "abc", "dynamic_int8")
+
+
+class TestPredictionCache:
+    """Test cases for the PredictionCache class."""
+
+    def test_hit_and_miss_counters(self):
+        """Lookups are counted as hits or misses."""
+        cache = PredictionCache(max_entries=10, ttl=0, max_bytes=1 << 20)
+        assert cache.get("k") is None
+        cache.set("k", ("Positive", 0.9))
+        assert cache.get("k") == ("Positive", 0.9)
+
+        stats = cache.get_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['entries'] == 1
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted first."""
+        cache = PredictionCache(max_entries=2, ttl=0, max_bytes=1 << 20)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get_stats()['evictions'] == 1
+
+    def test_ttl_expiry(self):
+        """Entries older than the TTL are treated as misses."""
+        cache = PredictionCache(max_entries=10, ttl=0.01, max_bytes=1 << 20)
+        cache.set("k", 1)
+        time.sleep(0.02)
+
+        assert cache.get("k") is None
+        assert cache.get_stats()['expirations'] == 1
+
+    def test_memory_ceiling(self):
+        """Entries are evicted to stay under the memory ceiling."""
+        cache = PredictionCache(max_entries=1000, ttl=0, max_bytes=2000)
+        for i in range(100):
+            cache.set(f"key-{i}", ("Positive", 0.5))
+
+        stats = cache.get_stats()
+        assert stats['memory_bytes'] <= 2000
+        assert stats['evictions'] > 0
+        assert len(cache) < 100
+
+
+class TestPersistentPredictionStore:
+    """Test cases for the on-disk shared prediction store."""
+
+    def test_round_trip(self, tmp_path):
+        """Stored predictions are returned for the same fingerprint only."""
+        store = PersistentPredictionStore(str(tmp_path / "predictions.sqlite"), ttl=0)
+        fingerprint = model_fingerprint("model", "abc")
+        store.set_many(fingerprint, [(text_hash("Great food"), "Positive", 0.9)])
+
+        assert store.get_many(fingerprint, [text_hash("Great  food")]) == {
+            text_hash("Great food"): ("Positive", 0.9)
+        }
+        assert store.get_many(model_fingerprint("model", "def"), [text_hash("Great food")]) == {}
+
+    def test_shared_between_instances(self, tmp_path):
+        """A second connection (as in another worker process) sees the same rows."""
+        path = str(tmp_path / "predictions.sqlite")
+        writer = PersistentPredictionStore(path, ttl=0)
+        reader = PersistentPredictionStore(path, ttl=0)
+        writer.set_many("fp", [("h1", "Negative", 0.7), ("h2", "Positive", 0.8)])
+
+        assert reader.get_many("fp", ["h1", "h2", "h3"]) == {
+            "h1": ("Negative", 0.7),
+            "h2": ("Positive", 0.8),
+        }
+        assert reader.get_stats()['misses'] == 1
+        assert reader.count() == 2
+
+    def test_class_distributions_round_trip(self, tmp_path):
+        """Distributions stored with a prediction come back on request."""
+        store = PersistentPredictionStore(str(tmp_path / "predictions.sqlite"), ttl=0)
+        distribution = {'Positive': 0.5, 'Neutral': 0.3, 'Negative': 0.2}
+        store.set_many("fp", [("h1", "Positive", 0.5, distribution), ("h2", "Negative", 0.7)])
+
+        assert store.get_many("fp", ["h1", "h2"], probabilities=True) == {
+            "h1": ("Positive", 0.5, distribution),
+            "h2": ("Negative", 0.7, None),
+        }
+        assert store.get_many("fp", ["h1"]) == {"h1": ("Positive", 0.5)}
+
+    def test_existing_store_gains_distribution_column(self, tmp_path):
+        """Databases created before distributions were stored are upgraded in place."""
+        path = str(tmp_path / "predictions.sqlite")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE predictions (fingerprint TEXT NOT NULL, text_hash TEXT NOT NULL,"
+                     " sentiment TEXT NOT NULL, confidence REAL NOT NULL, created_at REAL NOT NULL,"
+                     " PRIMARY KEY (fingerprint, text_hash)) WITHOUT ROWID")
+        conn.execute("INSERT INTO predictions VALUES ('fp', 'h1', 'Negative', 0.7, ?)", (time.time(),))
+        conn.commit()
+        conn.close()
+
+        store = PersistentPredictionStore(path, ttl=0)
+        store.set_many("fp", [("h2", "Positive", 0.9, {'Positive': 0.9, 'Negative': 0.1})])
+
+        assert store.get_many("fp", ["h1", "h2"], probabilities=True) == {
+            "h1": ("Negative", 0.7, None),
+            "h2": ("Positive", 0.9, {'Positive': 0.9, 'Negative': 0.1}),
+        }
+
+    def test_ttl_expiry(self, tmp_path):
+        """Rows older than the TTL are ignored."""
+        store = PersistentPredictionStore(str(tmp_path / "predictions.sqlite"), ttl=0.01)
+        store.set_many("fp", [("h1", "Negative", 0.7)])
+        time.sleep(0.02)
+
+        assert store.get_many("fp", ["h1"]) == {}
+
+    def test_expired_rows_are_pruned(self, tmp_path):
+        """Expired rows are deleted on open and after every prune_every writes."""
+        path = str(tmp_path / "predictions.sqlite")
+        store = PersistentPredictionStore(path, ttl=0.01, prune_every=2)
+        store.set_many("fp", [("h1", "Negative", 0.7)])
+        time.sleep(0.02)
+
+        store.set_many("fp", [("h2", "Positive", 0.8)])
+        assert store.count() == 1
+        assert store.get_stats()['pruned'] == 1
+
+        time.sleep(0.02)
+        assert PersistentPredictionStore(path, ttl=0.01).count() == 0
+
+
+def test_iter_warmup_texts(tmp_path):
+    """Warm-up replay accepts analyze bodies, batch bodies and bare strings."""
+    log = tmp_path / "requests.jsonl"
+    log.write_text('{"text": "one"}\n'
+                   'not json\n'
+                   '{"texts": ["two", "three"]}\n'
+                   '"four"\n'
+                   '{"text": "  "}\n', encoding='utf-8')
+
+    assert list(iter_warmup_texts(str(log))) == ["one", "two", "three", "four"]
+
+
+def test_iter_warmup_texts_logs_skipped_records(tmp_path):
+    """Records in another format are counted and reported rather than dropped silently."""
+    log = tmp_path / "requests.jsonl"
+    log.write_text('{"request_id": "r1", "title": "x"}\n[1, 2]\n{"text": "kept"}\n', encoding='utf-8')
+
+    with patch('app.cache.logger') as logger:
+        assert list(iter_warmup_texts(str(log))) == ["kept"]
+    logger.warning.assert_called_once()
+    assert "Skipped 2 warm-up records" in logger.warning.call_args[0][0]
@@ -0,0 +1,63 @@
+"""
+Unit tests for the direct logits inference path.
+Uses a tiny randomly initialised DistilBERT so no weights are downloaded.
+"""
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.direct_inference import DirectClassifier
+from app.model import SentimentAnalyzer
+from config.config import config
+
+TEXTS = ["the food was great", "terrible service", "okay", "love this place it was good"]
+
+
+class TestDirectClassifier:
+    """Test cases for DirectClassifier."""
+
+    def test_matches_pipeline(self, tiny_pipeline):
+        """Labels and scores agree with the transformers pipeline."""
+        direct = DirectClassifier.from_pipeline(tiny_pipeline)
+        expected = [output[0] for output in tiny_pipeline(TEXTS)]
+
+        results = direct.classify(TEXTS)
+
+        assert [label for label, _, _ in results] == [e['label'] for e in expected]
+        assert [score for _, score, _ in results] == pytest.approx([e['score'] for e in expected], abs=1e-5)
+
+    def test_full_probability_vector(self, tiny_pipeline):
+        """Every text gets a distribution over all labels summing to one."""
+        direct = DirectClassifier.from_pipeline(tiny_pipeline)
+
+        for label, score, probabilities in direct.classify(TEXTS):
+            assert set(probabilities) == {'LABEL_0', 'LABEL_1', 'LABEL_2'}
+            assert sum(probabilities.values()) == pytest.approx(1.0)
+            assert probabilities[label] == pytest.approx(score)
+
+    def test_long_text_truncated(self, tiny_pipeline):
+        """Texts beyond the position limit are truncated instead of failing."""
+        direct = DirectClassifier.from_pipeline(tiny_pipeline)
+
+        assert len(direct.classify(["good " * 500])) == 1
+
+    def test_mock_pipeline_not_bypassed(self):
+        """Test doubles keep using the pipeline call path."""
+        assert DirectClassifier.from_pipeline(MagicMock()) is None
+
+    def test_analyzer_uses_direct_path(self, tiny_model_dir):
+        """SentimentAnalyzer predictions go through the direct path when possible."""
+        with patch.multiple(config, MODEL_NAME=tiny_model_dir, PREDICTION_CACHE_ENABLED=False):
+            analyzer = SentimentAnalyzer()
+        analyzer.store = None
+
+        with patch.object(DirectClassifier, 'classify', wraps=analyzer._direct_classifier().classify) as classify:
+            sentiment, score = analyzer.predict("the food was great")
+
+        classify.assert_called_once()
+        assert sentiment in ('Negative', 'Neutral', 'Positive')
+        assert 0.0 <= score <= 1.0
@@ -0,0 +1,125 @@
+"""
+Unit tests for early-exit inference.
+Exit heads are distilled from the tiny local two-layer DistilBERT.
+"""
+import pytest
+import sys
+import torch
+import os
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.direct_inference import DirectClassifier
+from app.early_exit import EarlyExitClassifier, ExitHeads, latency_accuracy_curve, train_exit_heads
+from app.evaluation import load_eval_split
+from app.model import SentimentAnalyzer
+from config.config import config
+
+TEXTS = ["the food was great", "terrible service", "it was okay and the place was good", "hate it",
+         "love this place", "slow service the food was bad"]
+
+
+@pytest.fixture
+def heads_path(tiny_pipeline, tmp_path):
+    heads = train_exit_heads(tiny_pipeline.model, tiny_pipeline.tokenizer, TEXTS * 4, epochs=2, batch_size=8)
+    path = str(tmp_path / 'exit_heads.pt')
+    heads.save(path)
+    return path
+
+
+@pytest.fixture
+def analyzer(tiny_model_dir, heads_path):
+    with patch.multiple(config, MODEL_NAME=tiny_model_dir, PREDICTION_CACHE_ENABLED=False,
+                        EARLY_EXIT_HEADS_PATH=heads_path, EARLY_EXIT_THRESHOLD=0.0):
+        analyzer = SentimentAnalyzer()
+    analyzer.store = None
+    return analyzer
+
+
+class TestEarlyExitClassifier:
+    """Test cases for the early-exit forward pass."""
+
+    def test_threshold_zero_matches_the_full_model(self, tiny_pipeline, heads_path):
+        """With no exits the layer-by-layer pass (padding included) equals the regular forward."""
+        classifier = EarlyExitClassifier.from_pipeline(tiny_pipeline, ExitHeads.load(heads_path), threshold=0.0)
+
+        expected = DirectClassifier(tiny_pipeline).predict_proba(TEXTS)
+        assert torch.allclose(classifier.predict_proba(TEXTS), expected, atol=1e-6)
+        assert classifier.get_stats()['exits'] == {2: len(TEXTS)}
+
+    @pytest.mark.parametrize('attn_implementation', ['eager', 'sdpa'])
+    def test_padding_mask_matches_each_attention_implementation(self, tiny_model_dir, heads_path,
+                                                                attn_implementation):
+        """Padded texts match the regular forward whichever attention the body was loaded with."""
+        from transformers import AutoModelForSequenceClassification, pipeline
+
+        model = AutoModelForSequenceClassification.from_pretrained(tiny_model_dir,
+                                                                   attn_implementation=attn_implementation)
+        pipe = pipeline("sentiment-analysis", model=model, tokenizer=tiny_model_dir, top_k=1)
+        classifier = EarlyExitClassifier.from_pipeline(pipe, ExitHeads.load(heads_path), threshold=0.0)
+
+        expected = DirectClassifier(pipe).predict_proba(TEXTS)
+        assert torch.allclose(classifier.predict_proba(TEXTS), expected, atol=1e-6)
+
+    def test_confident_texts_exit_at_their_head(self, tiny_pipeline, heads_path):
+        heads = ExitHeads.load(heads_path)
+        classifier = EarlyExitClassifier.from_pipeline(tiny_pipeline, heads, threshold=1.0)
+
+        probabilities = classifier.predict_proba(TEXTS)
+
+        stats = classifier.get_stats()
+        assert stats['exits'] == {1: len(TEXTS)}
+        assert stats['layers_saved'] == 0.5
+        assert probabilities.sum(dim=-1).tolist() == pytest.approx([1.0] * len(TEXTS))
+
+    def test_mismatched_heads_are_rejected(self, tiny_pipeline):
+        assert EarlyExitClassifier.from_pipeline(tiny_pipeline, ExitHeads([1], dim=16, num_labels=3)) is None
+
+
+class TestSentimentAnalyzerEarlyExit:
+    """Test cases for early exit behind SentimentAnalyzer."""
+
+    def test_threshold_is_exposed(self, analyzer):
+        analyzer.predict_batch(TEXTS[:2])
+        analyzer.exit_threshold = 1.0
+        analyzer.predict_batch(TEXTS[2:])
+
+        stats = analyzer._direct.get_stats()
+        assert stats['threshold'] == 1.0
+        assert stats['exits'] == {1: len(TEXTS) - 2, 2: 2}
+        with pytest.raises(ValueError):
+            analyzer.exit_threshold = 1.5
+
+    def test_threshold_and_heads_key_the_cache(self, tiny_model_dir, heads_path):
+        """Answers cached under one early-exit setting are not served under another."""
+        with patch.multiple(config, MODEL_NAME=tiny_model_dir, PREDICTION_CACHE_ENABLED=True,
+                            EARLY_EXIT_HEADS_PATH=heads_path, EARLY_EXIT_THRESHOLD=1.0):
+            analyzer = SentimentAnalyzer()
+        analyzer.store = None
+        analyzer.predict(TEXTS[0])
+        early = analyzer.fingerprint
+
+        analyzer.exit_threshold = 0.0
+        with patch.object(analyzer, '_infer', wraps=analyzer._infer) as infer:
+            analyzer.predict(TEXTS[0])
+        infer.assert_called_once()
+
+        full = analyzer.fingerprint
+        analyzer.exit_heads = None
+        assert analyzer.fingerprint == full  # Threshold 0 already ran every layer
+        analyzer.exit_heads = ExitHeads.load(heads_path)
+        analyzer.exit_threshold = 1.0
+        assert analyzer.fingerprint == early
+        assert early != full
+
+    def test_latency_accuracy_curve(self, analyzer, tiny_eval_split):
+        texts, labels = load_eval_split(tiny_eval_split)
+        curve = latency_accuracy_curve(analyzer, texts, labels, thresholds=[1.0], batch_size=8)
+
+        full, early = curve['thresholds']
+        assert full['threshold'] == 0.0 and full['average_layers'] == 2
+        assert early['threshold'] == 1.0 and early['average_layers'] == 1
+        assert full['speedup'] == 1.0
+        assert analyzer.exit_threshold == 0.0
@@ -0,0 +1,66 @@
+"""
+Unit tests for the per-model executors and thread budget.
+"""
+import threading
+import time
+import sys
+import os
+
+import torch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.executors import ExecutorPool, plan_thread_budget, _per_thread_counts_supported
+
+
+class TestThreadBudget:
+    """Test cases for splitting cores across models."""
+
+    def test_budget_split_across_models(self):
+        """Each worker gets an equal share of the budget."""
+        assert plan_thread_budget(4, budget=16, workers_per_model=1) == 4
+        assert plan_thread_budget(4, budget=16, workers_per_model=2) == 2
+
+    def test_at_least_one_thread(self):
+        """Oversubscribed budgets still give every worker a thread."""
+        assert plan_thread_budget(8, budget=4, workers_per_model=1) == 1
+
+
+class TestExecutorPool:
+    """Test cases for ExecutorPool."""
+
+    def test_workers_pinned_to_their_share(self):
+        """Worker threads run with their own intra-op thread count."""
+        pool = ExecutorPool(['a', 'b'], budget=4, workers_per_model=1)
+        default = torch.get_num_threads()
+        try:
+            observed = pool.submit('a', torch.get_num_threads).result()
+            if _per_thread_counts_supported():
+                assert observed == 2
+            assert torch.get_num_threads() == default
+        finally:
+            pool.shutdown()
+
+    def test_concurrency_limited_per_model(self):
+        """A model never runs more calls at once than it has workers."""
+        pool = ExecutorPool(['a'], budget=2, workers_per_model=1)
+        lock = threading.Lock()
+        running = {'now': 0, 'peak': 0}
+
+        def work():
+            with lock:
+                running['now'] += 1
+                running['peak'] = max(running['peak'], running['now'])
+            time.sleep(0.01)
+            with lock:
+                running['now'] -= 1
+
+        try:
+            for future in [pool.submit('a', work) for _ in range(5)]:
+                future.result()
+
+            assert running['peak'] == 1
+            assert pool.get_stats()['a']['completed'] == 5
+        finally:
+            pool.shutdown()
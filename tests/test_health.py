@@ -0,0 +1,155 @@
+"""
+Unit tests for the tiered health subsystem.
+"""
+import json
+import pytest
+import time
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.model as model_module
+from app.health import HealthMonitor
+
+
+class CountingProbe:
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+
+    def __call__(self):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("model broken")
+
+
+class TestHealthMonitor:
+    """Test cases for HealthMonitor."""
+
+    def test_consecutive_failures_mark_unhealthy(self):
+        """A few failures in a row flip health; one success restores it."""
+        monitor = HealthMonitor(CountingProbe(), lambda: True, probe_interval=0, max_consecutive_failures=2)
+
+        monitor.record(0.01, ok=False, error="boom")
+        assert monitor.is_healthy()
+        monitor.record(0.01, ok=False, error="boom")
+        assert not monitor.is_healthy()
+        monitor.record(0.02)
+        assert monitor.is_healthy()
+        assert monitor.last_inference()['latency'] == 0.02
+
+    def test_deep_check_rate_limited(self):
+        """Deep checks inside the interval reuse the previous result."""
+        probe = CountingProbe()
+        monitor = HealthMonitor(probe, lambda: True, probe_interval=0, deep_check_interval=60)
+
+        first = monitor.deep_check()
+        second = monitor.deep_check()
+
+        assert probe.calls == 1
+        assert first['ok'] and not first['cached']
+        assert second['cached']
+
+    def test_failed_deep_check_reported(self):
+        """A failing deep check records the error."""
+        monitor = HealthMonitor(CountingProbe(fail=True), lambda: True, probe_interval=0)
+
+        result = monitor.deep_check()
+
+        assert result['ok'] is False
+        assert result['error'] == "model broken"
+
+    def test_background_probe_only_when_idle_and_ready(self):
+        """The background prober runs inference only on a loaded, idle model."""
+        probe = CountingProbe()
+        ready = {'value': False}
+        monitor = HealthMonitor(probe, lambda: ready['value'], probe_interval=0.02)
+        monitor.start()
+        try:
+            time.sleep(0.1)
+            assert probe.calls == 0
+
+            ready['value'] = True
+            time.sleep(0.1)
+            assert probe.calls >= 1
+            assert monitor.last_inference()['source'] == 'background'
+        finally:
+            monitor.stop()
+
+
+class TestHealthEndpoints:
+    """Test cases for the health endpoints."""
+
+    def test_health_served_from_cache(self, client, fresh_model_state):
+        """Repeated health checks on a loaded model run no inference."""
+        analyzer = MagicMock()
+        analyzer.predict.return_value = ("Positive", 0.9)
+        with patch.object(model_module, 'SentimentAnalyzer', return_value=analyzer):
+            model_module.get_model()
+
+            for _ in range(3):
+                response = client.get('/api/health')
+                data = json.loads(response.data)
+                assert response.status_code == 200
+                assert data['status'] == 'healthy'
+                assert 'version' in data
+
+        analyzer.predict.assert_not_called()
+        analyzer._run_pipeline.assert_not_called()
+
+    def test_readiness_reports_last_inference(self, client, fresh_model_state):
+        """Readiness carries the outcome and latency of the last real request."""
+        analyzer = MagicMock()
+
+        def predict(text):
+            analyzer.inference_listener(0.01, ok=True, error=None)
+            return ("Positive", 0.9)
+
+        analyzer.predict.side_effect = predict
+        with patch.object(model_module, 'SentimentAnalyzer', return_value=analyzer), \
+                patch.object(model_module.config, 'MODEL_BATCH_SIZE', 1):
+            model_module.get_model()
+            client.post('/api/analyze', json={'text': 'Great food'})
+
+            data = json.loads(client.get('/api/ready').data)
+
+        assert data['status'] == 'ready'
+        assert data['last_inference']['ok'] is True
+        assert data['last_inference']['source'] == 'request'
+
+    def test_cache_hits_are_not_inferences(self, fresh_model_state, tiny_model_dir):
+        """Answers served without a forward pass neither clear failures nor set the latency."""
+        with patch.multiple(model_module.config, MODEL_NAME=tiny_model_dir, MODEL_BATCH_SIZE=1,
+                            PREDICTION_CACHE_ENABLED=True, PREDICTION_STORE_PATH=None,
+                            PREDICTION_STORE_WARMUP_FILE=None, TIER0_MODEL_PATH=None):
+            analyzer = model_module.get_model()
+            model_module.predict("Great food")
+            monitor = model_module.get_health_monitor()
+            assert monitor.last_inference()['ok'] is True
+
+            with patch.object(analyzer, '_infer', side_effect=RuntimeError("model broken")), \
+                    patch.object(analyzer, '_call_pipeline', side_effect=RuntimeError("model broken")):
+                for i in range(monitor.max_consecutive_failures):
+                    text = f"Terrible service {i}"
+                    with pytest.raises(model_module.ModelError):
+                        model_module.predict(text)
+                assert model_module.predict("Great food")[0] in ('Positive', 'Negative', 'Neutral')
+
+        last = monitor.last_inference()
+        assert last['ok'] is False and 'model broken' in last['error']
+        assert not monitor.is_healthy()
+
+    def test_deep_health_check_runs_inference(self, client, fresh_model_state):
+        """?deep=1 runs one uncached inference."""
+        analyzer = MagicMock()
+        with patch.object(model_module, 'SentimentAnalyzer', return_value=analyzer):
+            model_module.get_model()
+            response = client.get('/api/health?deep=1')
+            client.get('/api/health?deep=1')
+
+        assert response.status_code == 200
+        assert json.loads(response.data)['deep_check']['ok'] is True
+        analyzer._run_pipeline.assert_called_once()
@@ -0,0 +1,82 @@
+"""
+Unit tests for sliding-window inference over long texts.
+Uses a tiny randomly initialised DistilBERT so no weights are downloaded.
+"""
+import sys
+import os
+from unittest.mock import patch
+
+import torch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.direct_inference import DirectClassifier
+from app.long_text import LongTextClassifier, build_classifier
+from app.model import SentimentAnalyzer
+from config.config import config
+
+SHORT_TEXTS = ["the food was great", "terrible service", "okay"]
+LONG_TEXT = " ".join(["the soup was cold but the staff were lovely and the view was great"] * 40)
+
+
+class TestLongTextClassifier:
+    """Test cases for LongTextClassifier."""
+
+    def test_short_texts_match_direct(self, tiny_pipeline):
+        """Texts that fit in one window score exactly as without windowing."""
+        expected = DirectClassifier(tiny_pipeline).predict_proba(SHORT_TEXTS)
+        actual = LongTextClassifier(tiny_pipeline).predict_proba(SHORT_TEXTS)
+
+        assert torch.allclose(actual, expected, atol=1e-5)
+
+    def test_long_text_is_weighted_mean_of_windows(self, tiny_pipeline):
+        """A long text scores as the token-weighted mean of its overlapping windows."""
+        classifier = LongTextClassifier(tiny_pipeline, window=64, stride=16)
+        encodings = classifier.windows([LONG_TEXT])
+        windows = [tiny_pipeline.tokenizer.decode(ids, skip_special_tokens=True) for ids in encodings['input_ids']]
+        assert len(windows) > 5
+
+        per_window = DirectClassifier(tiny_pipeline).predict_proba(windows)
+        weights = torch.tensor([len(ids) for ids in encodings['input_ids']], dtype=torch.float32)
+        expected = (per_window * weights[:, None]).sum(dim=0) / weights.sum()
+
+        assert torch.allclose(classifier.predict_proba([LONG_TEXT])[0], expected, atol=1e-4)
+
+    def test_windows_of_many_texts_share_forward_passes(self, tiny_pipeline):
+        """Windows from every text of a call are batched together within the token budget."""
+        classifier = LongTextClassifier(tiny_pipeline, window=64, stride=16, max_tokens=64 * 100)
+        texts = [LONG_TEXT, SHORT_TEXTS[0], LONG_TEXT[:1500]]
+
+        results = classifier.classify(texts)
+
+        stats = classifier.get_stats()
+        assert len(results) == 3
+        assert stats['forward_passes'] == 1
+        assert stats['windowed_texts'] == 2 and stats['windows'] > 10
+
+    def test_analyzer_scores_long_texts_in_long_mode(self, tiny_model_dir):
+        """With LONG_TEXT_MODE the analyzer windows instead of truncating."""
+        with patch.multiple(config, MODEL_NAME=tiny_model_dir, PREDICTION_CACHE_ENABLED=False,
+                            LONG_TEXT_MODE=True, LONG_TEXT_WINDOW=64):
+            analyzer = SentimentAnalyzer()
+            analyzer.store = None
+            assert isinstance(build_classifier(analyzer.pipeline), LongTextClassifier)
+
+            sentiment, score = analyzer.predict(LONG_TEXT)
+
+        assert sentiment in ("Negative", "Neutral", "Positive")
+        assert 0.0 < score <= 1.0
+        assert analyzer._direct.get_stats()['windows'] > 5
+
+    def test_long_text_settings_change_the_cache_fingerprint(self, tiny_model_dir):
+        """Truncated and windowed predictions never share cache entries."""
+        with patch.multiple(config, MODEL_NAME=tiny_model_dir, PREDICTION_CACHE_ENABLED=False):
+            analyzer = SentimentAnalyzer()
+            truncated = analyzer.fingerprint
+            with patch.multiple(config, LONG_TEXT_MODE=True, LONG_TEXT_STRIDE=128):
+                windowed = analyzer.fingerprint
+            with patch.multiple(config, LONG_TEXT_MODE=True, LONG_TEXT_STRIDE=64):
+                narrower = analyzer.fingerprint
+
+        assert len({truncated, windowed, narrower}) == 3
@@ -120,6 +120,39 @@ class TestSentimentAnalyzer:
         assert sentiment == "Negative"
         assert confidence == 0.85
     
+    @patch('app.model.pipeline')
+    def test_predict_batch_with_mock_pipeline(self, mock_loader):
+        """Test batched prediction keeps input order."""
+        analyzer = SentimentAnalyzer()
+        
+        # Mock pipeline returning one top_k=1 list per input
+        mock_pipeline = MagicMock()
+        mock_pipeline.return_value = [
+            [{"label": "POSITIVE", "score": 0.9}],
+            [{"label": "NEGATIVE", "score": 0.8}],
+        ]
+        analyzer.pipeline = mock_pipeline
+        
+        results = analyzer.predict_batch(["Great!", "Awful!"])
+        
+        assert results == [("Positive", 0.9), ("Negative", 0.8)]
+        mock_pipeline.assert_called_once_with(["Great!", "Awful!"], batch_size=2)
+    
+    @patch('app.model.pipeline')
+    def test_predict_served_from_cache(self, mock_loader):
+        """Test repeated texts are answered from the prediction cache."""
+        analyzer = SentimentAnalyzer()
+        
+        mock_pipeline = MagicMock()
+        mock_pipeline.return_value = [{"label": "POSITIVE", "score": 0.95}]
+        analyzer.pipeline = mock_pipeline
+        
+        assert analyzer.predict("Great  food!") == ("Positive", 0.95)
+        assert analyzer.predict(" Great food! ") == ("Positive", 0.95)
+        
+        mock_pipeline.assert_called_once()
+        assert analyzer.cache.get_stats()['hits'] == 1
+    
     def test_predict_empty_response(self):
         """Test prediction with empty response."""
         analyzer = SentimentAnalyzer()
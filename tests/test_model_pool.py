@@ -0,0 +1,179 @@
+"""
+Unit tests for the lazy, memory-budgeted model pool.
+"""
+import threading
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.model_pool import FAILED, LOADED, UNLOADED, ModelPool
+
+MB = 1024 * 1024
+
+
+class FakeOwner:
+    """Records loads and unloads; every model takes 40MB."""
+
+    def __init__(self, delay=0.0, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.loads = []
+        self.unloads = []
+        self._lock = threading.Lock()
+
+    def load(self, key):
+        time.sleep(self.delay)
+        if key in self.fail:
+            raise RuntimeError(f"cannot load {key}")
+        with self._lock:
+            self.loads.append(key)
+        return 40 * MB
+
+    def unload(self, key):
+        self.unloads.append(key)
+
+
+def make_pool(owner, budget_mb=0, retry_after=60):
+    return ModelPool(['a', 'b', 'c'], owner.load, owner.unload,
+                     memory_budget_mb=budget_mb, retry_after=retry_after)
+
+
+class TestModelPool:
+    """Test cases for ModelPool."""
+
+    def test_models_load_lazily(self):
+        """Nothing loads until a model is acquired."""
+        owner = FakeOwner()
+        pool = make_pool(owner)
+        assert owner.loads == []
+
+        assert pool.acquire(['b']) == ['b']
+        assert owner.loads == ['b']
+        assert pool.get_stats()['models']['a']['state'] == UNLOADED
+
+    def test_concurrent_acquires_load_once(self):
+        """Simultaneous requests for one model share a single load."""
+        owner = FakeOwner(delay=0.05)
+        pool = make_pool(owner)
+
+        threads = [threading.Thread(target=pool.acquire, args=(['a'],)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert owner.loads == ['a']
+        assert pool.is_loaded('a')
+
+    def test_missing_models_load_in_parallel(self):
+        """Several cold models load concurrently."""
+        owner = FakeOwner(delay=0.2)
+        pool = make_pool(owner)
+
+        start = time.perf_counter()
+        assert pool.acquire(['a', 'b', 'c']) == ['a', 'b', 'c']
+        assert time.perf_counter() - start < 0.5
+
+    def test_least_recently_used_evicted_over_budget(self):
+        """Exceeding the budget unloads the model used longest ago."""
+        owner = FakeOwner()
+        pool = make_pool(owner, budget_mb=100)
+
+        for keys in (['a'], ['b'], ['a'], ['c']):  # b is least recently used when c loads
+            with pool.using(keys):
+                pass
+
+        assert owner.unloads == ['b']
+        stats = pool.get_stats()
+        assert stats['models']['b']['state'] == UNLOADED
+        assert stats['resident_bytes'] == 80 * MB
+
+    def test_models_acquired_together_not_evicted(self):
+        """A request needing every model keeps them all resident."""
+        owner = FakeOwner()
+        pool = make_pool(owner, budget_mb=50)
+
+        assert pool.acquire(['a', 'b', 'c']) == ['a', 'b', 'c']
+        assert owner.unloads == []
+
+        pool.release(['a', 'b', 'c'])
+        assert pool.get_stats()['resident_bytes'] <= 50 * MB
+
+    def test_models_in_use_not_evicted_by_concurrent_requests(self):
+        """A request loading another model never evicts one still serving a different request."""
+        owner = FakeOwner()
+        pool = make_pool(owner, budget_mb=50)
+        holding_a, b_loaded, a_released = threading.Event(), threading.Event(), threading.Event()
+        seen = {}
+
+        def first_request():
+            with pool.using(['a']) as loaded:
+                holding_a.set()
+                b_loaded.wait(5)
+                seen['a'] = (loaded, pool.is_loaded('a'))
+            a_released.set()
+
+        def second_request():
+            holding_a.wait(5)
+            with pool.using(['b']) as loaded:
+                seen['b'] = (loaded, pool.is_loaded('b'))
+                b_loaded.set()
+                a_released.wait(5)
+
+        threads = [threading.Thread(target=first_request), threading.Thread(target=second_request)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert seen == {'a': (['a'], True), 'b': (['b'], True)}
+        assert owner.unloads == ['a']  # Evicted once released, restoring the budget
+        stats = pool.get_stats()
+        assert stats['resident_bytes'] == 40 * MB
+        assert all(model['in_use'] == 0 for model in stats['models'].values())
+
+    def test_unloading_does_not_block_the_pool(self):
+        """A slow teardown runs outside the pool lock, so other callers keep going."""
+        owner = FakeOwner()
+        pool = make_pool(owner, budget_mb=50)
+        unloading, finish = threading.Event(), threading.Event()
+
+        def slow_unload(key):
+            unloading.set()
+            finish.wait(5)
+            owner.unload(key)
+
+        pool._unloader = slow_unload
+        with pool.using(['a']):
+            pass
+        evicting = threading.Thread(target=pool.acquire, args=(['b'],))  # Over budget: a is evicted
+        evicting.start()
+        assert unloading.wait(5)
+
+        try:
+            assert pool.get_stats()['models']['a']['state'] == 'unloading'
+            start = time.perf_counter()
+            assert pool.acquire(['c']) == ['c']
+            assert time.perf_counter() - start < 1
+        finally:
+            finish.set()
+            evicting.join()
+
+        assert owner.unloads[0] == 'a'
+
+    def test_failed_model_retried_after_cooldown(self):
+        """A failed load is skipped until the retry delay passes."""
+        owner = FakeOwner(fail={'a'})
+        pool = make_pool(owner, retry_after=0.05)
+
+        assert pool.acquire(['a']) == []
+        assert pool.get_stats()['models']['a']['state'] == FAILED
+        assert not pool.is_available('a')
+
+        owner.fail.clear()
+        time.sleep(0.06)
+        assert pool.acquire(['a']) == ['a']
+        assert pool.get_stats()['models']['a']['state'] == LOADED
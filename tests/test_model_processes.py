@@ -0,0 +1,96 @@
+"""
+Unit tests for per-model process isolation of comparison models.
+Model processes load the tiny local DistilBERT classifier, so no weights are downloaded.
+"""
+import os
+import signal
+import sys
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.advanced_model import AdvancedSentimentAnalyzer
+from app.model_processes import parse_cpu_list, plan_cpu_sets
+from config.config import config
+
+TINY_LABELS = {'LABEL_0': 'Negative', 'LABEL_1': 'Neutral', 'LABEL_2': 'Positive'}
+TEXTS = ["the food was great", "terrible service", "it was okay"]
+
+
+def _tiny_analyzer(monkeypatch, model_dir, isolated):
+    monkeypatch.setattr(config, 'MODEL_PROCESS_ISOLATION', isolated)
+    monkeypatch.setattr(config, 'PREDICTION_CACHE_ENABLED', False)
+    monkeypatch.setattr(config, 'PREDICTION_STORE_PATH', None)
+    analyzer = AdvancedSentimentAnalyzer()
+    for model_config in analyzer.model_configs.values():
+        model_config.update(name=model_dir, label_mapping=TINY_LABELS)
+    return analyzer
+
+
+@pytest.fixture
+def isolated_analyzer(monkeypatch, tiny_model_dir):
+    analyzer = _tiny_analyzer(monkeypatch, tiny_model_dir, isolated=True)
+    yield analyzer
+    for key in list(analyzer.models):
+        analyzer._unload_model(key)
+
+
+class TestCpuPlanning:
+    """Test cases for CPU set assignment."""
+
+    def test_parse_cpu_list(self):
+        assert parse_cpu_list("0-2,5, 7") == [0, 1, 2, 5, 7]
+
+    def test_even_disjoint_shares(self):
+        sets = plan_cpu_sets(['a', 'b', 'c'], spec='', cpus=list(range(8)))
+        assert sets == {'a': [0, 1], 'b': [2, 3], 'c': [4, 5]}
+
+    def test_explicit_sets_and_oversubscription(self):
+        sets = plan_cpu_sets(['a', 'b', 'c'], spec='a=0-1;unknown=3', cpus=[0, 1, 2])
+        assert sets == {'a': [0, 1], 'b': [2], 'c': [2]}
+
+
+class TestModelProcesses:
+    """Test cases for comparisons fanned out to model processes."""
+
+    def test_comparison_matches_in_process(self, monkeypatch, tiny_model_dir, isolated_analyzer):
+        """Each model runs in its own pinned process and answers like the in-process model."""
+        models = ['primary', 'distilbert']
+        isolated = isolated_analyzer.predict_with_comparison(TEXTS[0], models=models)
+        in_process = _tiny_analyzer(monkeypatch, tiny_model_dir, isolated=False)
+        expected = in_process.predict_with_comparison(TEXTS[0], models=models)
+
+        assert isolated.consensus_sentiment == expected.consensus_sentiment
+        assert sorted(r.confidence for r in isolated.results) == pytest.approx(
+            sorted(r.confidence for r in expected.results))
+
+        stats = isolated_analyzer.get_process_stats()
+        pids = {stats[key]['pid'] for key in models}
+        assert len(pids) == 2 and os.getpid() not in pids
+        for key in models if hasattr(os, 'sched_getaffinity') else []:
+            assert sorted(os.sched_getaffinity(stats[key]['pid'])) == isolated_analyzer.cpu_sets[key]
+
+        batch = isolated_analyzer.batch_predict(TEXTS, 'primary')
+        assert [r.sentiment for r in batch] == [r.sentiment for r in in_process.batch_predict(TEXTS, 'primary')]
+
+    def test_dead_model_process_is_restarted(self, isolated_analyzer):
+        """A model whose process died is started again by its next call."""
+        models = ['primary', 'distilbert']
+        isolated_analyzer.load_models(models)
+        os.kill(isolated_analyzer.get_process_stats()['primary']['pid'], signal.SIGKILL)
+        isolated_analyzer.models['primary'].process.join(10)
+
+        comparison = isolated_analyzer.predict_with_comparison(TEXTS[1], models=models, use_cache=False)
+        assert all(r.sentiment != "Error" for r in comparison.results)
+        assert isolated_analyzer.get_process_stats()['primary']['restarts'] == 1
+
+    def test_eviction_stops_the_process(self, isolated_analyzer):
+        """Unloading a model exits its process, freeing its memory."""
+        isolated_analyzer.load_models(['finbert'])
+        process = isolated_analyzer.models['finbert'].process
+
+        isolated_analyzer._unload_model('finbert')
+        assert not process.is_alive()
+        assert 'finbert' not in isolated_analyzer.get_process_stats()
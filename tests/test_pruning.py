@@ -0,0 +1,61 @@
+"""
+Unit tests for the structured pruning toolkit.
+Prunes the tiny local two-layer DistilBERT.
+"""
+import sys
+import os
+import torch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.evaluation import load_eval_split
+from app.pruning import comparison_report, importance_scores, prune_checkpoint, prune_model
+
+TEXTS = ["the food was great", "terrible service", "it was okay", "love this place", "slow service"]
+
+
+class TestPruning:
+    """Test cases for importance scoring, pruning and the comparison report."""
+
+    def test_scores_cover_every_structure(self, tiny_pipeline):
+        scores = importance_scores(tiny_pipeline.model, tiny_pipeline.tokenizer, TEXTS)
+
+        assert scores['heads'].shape == (2, 2)
+        assert scores['ffn'].shape == (2, 64)
+        assert scores['layers'].shape == (2,)
+        assert bool((scores['ffn'] >= 0).all())
+
+    def test_pruning_nothing_keeps_outputs(self, tiny_pipeline):
+        model, tokenizer = tiny_pipeline.model, tiny_pipeline.tokenizer
+        encodings = tokenizer(TEXTS, padding=True, return_tensors='pt')
+        with torch.no_grad():
+            before = model(**encodings).logits
+
+        prune_model(model, importance_scores(model, tokenizer, TEXTS), drop_layers=0, ffn_keep=1.0)
+
+        with torch.no_grad():
+            assert torch.allclose(model(**encodings).logits, before)
+
+    def test_pruned_checkpoint_loads(self, tiny_model_dir, tmp_path):
+        from transformers import AutoModelForSequenceClassification
+
+        output = str(tmp_path / 'pruned')
+        summary = prune_checkpoint(tiny_model_dir, output, TEXTS, drop_layers=1, ffn_keep=0.5,
+                                   fine_tune_texts=TEXTS, fine_tune_epochs=1)
+
+        model = AutoModelForSequenceClassification.from_pretrained(output)
+        assert summary['layers'] == model.config.n_layers == 1
+        assert summary['ffn_neurons_per_layer'] == model.config.hidden_dim == 32
+        assert os.path.exists(os.path.join(output, 'pruning.json'))
+
+    def test_comparison_report(self, tiny_model_dir, tiny_eval_split, tmp_path):
+        output = str(tmp_path / 'pruned')
+        prune_checkpoint(tiny_model_dir, output, TEXTS, drop_layers=1, ffn_keep=0.5)
+        texts, labels = load_eval_split(tiny_eval_split)
+
+        report = comparison_report(tiny_model_dir, output, texts, labels)
+
+        assert report['pruned']['parameters'] < report['original']['parameters']
+        assert report['parameter_ratio'] < 1
+        assert set(report['pruned']) >= {'macro_f1', 'latency_per_text'}
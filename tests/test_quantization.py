@@ -0,0 +1,81 @@
+"""
+Unit tests for dynamic INT8 quantization and its accuracy guard.
+Uses a tiny randomly initialised DistilBERT so no weights are downloaded.
+"""
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+import torch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.evaluation import load_eval_split, macro_f1
+from app.model import SentimentAnalyzer
+from app.quantization import model_size_bytes, quantize_dynamic_int8, select_quantized_engine
+from config.config import config
+
+
+class TestEvaluationHelpers:
+    """Test cases for the evaluation helpers used by the guard."""
+
+    def test_macro_f1_perfect(self):
+        """Perfect predictions score 1.0."""
+        assert macro_f1([0, 1, 2, 2], [0, 1, 2, 2]) == 1.0
+
+    def test_macro_f1_averages_classes(self):
+        """Each class counts equally regardless of support."""
+        # Class 0: F1 = 0.5, class 1: F1 = 2/3
+        assert macro_f1([0, 0, 1, 1, 1], [0, 1, 1, 1, 0]) == pytest.approx((0.5 + 2 / 3) / 2)
+
+    def test_load_eval_split(self, tiny_eval_split):
+        """Texts and labels load from the on-disk split format."""
+        texts, labels = load_eval_split(tiny_eval_split, limit=4)
+        assert len(texts) == len(labels) == 4
+        assert labels[0] == 2
+
+
+class TestQuantization:
+    """Test cases for dynamic INT8 quantization."""
+
+    def test_select_engine(self):
+        """An engine supported by this PyTorch build is activated."""
+        engine = select_quantized_engine()
+        if engine is not None:
+            assert torch.backends.quantized.engine == engine
+
+    def test_quantized_model_is_smaller(self, tiny_pipeline):
+        """Quantized Linear weights shrink the serialized model."""
+        if select_quantized_engine() is None:
+            pytest.skip("No quantized engine in this PyTorch build")
+        quantized = quantize_dynamic_int8(tiny_pipeline.model)
+
+        assert model_size_bytes(quantized) < model_size_bytes(tiny_pipeline.model)
+        assert any(isinstance(m, torch.ao.nn.quantized.dynamic.Linear) for m in quantized.modules())
+
+    def test_guard_activates_within_threshold(self, tiny_model_dir, tiny_eval_split):
+        """INT8 serving is activated when macro-F1 stays within the allowed drop."""
+        if select_quantized_engine() is None:
+            pytest.skip("No quantized engine in this PyTorch build")
+        with patch.multiple(config, MODEL_NAME=tiny_model_dir, MODEL_QUANTIZATION='dynamic_int8',
+                            QUANTIZATION_EVAL_DATA=tiny_eval_split, QUANTIZATION_MAX_F1_DROP=1.0,
+                            PREDICTION_CACHE_ENABLED=False):
+            analyzer = SentimentAnalyzer()
+
+        assert analyzer.quantization == 'dynamic_int8'
+        assert analyzer.quantization_report['active'] is True
+        assert 'int8_macro_f1' in analyzer.quantization_report
+
+    def test_guard_refuses_on_accuracy_drop(self, tiny_model_dir, tiny_eval_split):
+        """fp32 is kept when the quantized model loses too much macro-F1."""
+        with patch.multiple(config, MODEL_NAME=tiny_model_dir, MODEL_QUANTIZATION='dynamic_int8',
+                            QUANTIZATION_EVAL_DATA=tiny_eval_split, QUANTIZATION_MAX_F1_DROP=-1.0,
+                            PREDICTION_CACHE_ENABLED=False):
+            analyzer = SentimentAnalyzer()
+
+        assert analyzer.quantization is None
+        assert analyzer.quantization_report['active'] is False
+        assert not any(isinstance(m, torch.ao.nn.quantized.dynamic.Linear)
+                       for m in analyzer.pipeline.model.modules())
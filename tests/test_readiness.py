@@ -0,0 +1,100 @@
+"""
+Unit tests for background model loading, liveness/readiness probes and
+readiness gating of model-bound endpoints.
+"""
+import json
+import threading
+import time
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.model as model_module
+from config.config import config
+
+
+def slow_analyzer(delay, calls):
+    def build():
+        calls.append(1)
+        time.sleep(delay)
+        analyzer = MagicMock()
+        analyzer.predict.return_value = ("Positive", 0.9)
+        return analyzer
+    return build
+
+
+class TestModelLoading:
+    """Test cases for single-flight and background loading."""
+
+    def test_concurrent_get_model_loads_once(self, fresh_model_state):
+        """Requests racing into get_model share one analyzer."""
+        calls = []
+        with patch.object(model_module, 'SentimentAnalyzer', side_effect=slow_analyzer(0.05, calls)):
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(model_module.get_model()))
+                       for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert len(calls) == 1
+        assert len({id(result) for result in results}) == 1
+        assert model_module.get_load_status()['state'] == 'ready'
+
+    def test_background_load(self, fresh_model_state):
+        """The loader thread reports loading, then ready."""
+        calls = []
+        with patch.object(model_module, 'SentimentAnalyzer', side_effect=slow_analyzer(0.1, calls)):
+            thread = model_module.start_background_load()
+            assert model_module.get_load_status()['state'] == 'loading'
+            assert not model_module.wait_for_model(0.01)
+
+            thread.join()
+
+        assert model_module.is_model_ready()
+        assert model_module.wait_for_model(0)
+
+
+class TestProbes:
+    """Test cases for liveness, readiness and gating."""
+
+    def test_liveness_never_touches_model(self, client, fresh_model_state):
+        """Liveness answers without loading anything."""
+        with patch.object(model_module, 'SentimentAnalyzer') as analyzer:
+            response = client.get('/api/live')
+
+        assert response.status_code == 200
+        assert json.loads(response.data)['status'] == 'alive'
+        analyzer.assert_not_called()
+
+    def test_readiness_and_gating_while_loading(self, client, fresh_model_state):
+        """Model-bound requests get a 503 until the background load finishes."""
+        release = threading.Event()
+
+        def blocked():
+            release.wait(5)
+            analyzer = MagicMock()
+            analyzer.predict.return_value = ("Positive", 0.9)
+            return analyzer
+
+        with patch.object(model_module, 'SentimentAnalyzer', side_effect=blocked), \
+                patch.multiple(config, MODEL_READY_TIMEOUT=0.01, MODEL_BATCH_SIZE=1):
+            response = client.get('/api/ready')
+            assert response.status_code == 503
+            assert json.loads(response.data)['status'] == 'loading'
+
+            response = client.post('/api/analyze', json={'text': 'Great food'})
+            assert response.status_code == 503
+            assert 'Retry-After' in response.headers
+
+            release.set()
+            model_module._loader_thread.join()
+
+            assert client.get('/api/ready').status_code == 200
+            response = client.post('/api/analyze', json={'text': 'Great food'})
+            assert response.status_code == 200
+            assert json.loads(response.data)['sentiment'] == 'Positive'
@@ -0,0 +1,81 @@
+"""
+Unit tests for multi-process inference replicas.
+Replicas share the tiny local DistilBERT classifier, so no weights are downloaded.
+"""
+import os
+import signal
+import sys
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.model import ModelError, SentimentAnalyzer
+from app.replicas import ReplicaPool
+from config.config import config
+
+TEXTS = ["the food was great", "terrible service", "it was okay", "love this place"]
+
+
+@pytest.fixture
+def tiny_analyzer(monkeypatch, tiny_model_dir):
+    """Analyzer around the tiny classifier, with no cache tier that could hide the replicas."""
+    monkeypatch.setattr(config, 'MODEL_NAME', tiny_model_dir)
+    monkeypatch.setattr(config, 'MODEL_QUANTIZATION', None)
+    monkeypatch.setattr(config, 'PREDICTION_CACHE_ENABLED', False)
+    monkeypatch.setattr(config, 'PREDICTION_STORE_PATH', None)
+    return SentimentAnalyzer()
+
+
+@pytest.fixture
+def replica_pool(tiny_analyzer):
+    pool = ReplicaPool(tiny_analyzer, replicas=2, threads=1, start_timeout=120)
+    yield pool
+    pool.close()
+
+
+class TestReplicaPool:
+    """Test cases for shared-weight replicas and least-loaded dispatch."""
+
+    def test_replicas_share_weights_and_match_in_process(self, tiny_analyzer, replica_pool):
+        """Replicas run in their own processes on shared weights and give the same answers."""
+        assert replica_pool.predict_batch(TEXTS) == tiny_analyzer.predict_batch(TEXTS)
+
+        stats = replica_pool.get_stats()
+        assert stats['replicas'] == 2 and stats['shared_weights_bytes'] > 0
+        pids = {worker['pid'] for worker in stats['workers']}
+        assert len(pids) == 2 and os.getpid() not in pids
+        assert all(worker['shared_weights'] for worker in stats['workers'])
+
+    def test_least_loaded_dispatch(self, replica_pool):
+        """Queued batches are spread across replicas by in-flight count."""
+        futures = [replica_pool.submit([text]) for text in TEXTS]
+        assert [len(future.result(30)) for future in futures] == [1] * len(TEXTS)
+
+        workers = replica_pool.get_stats()['workers']
+        assert [worker['dispatched'] for worker in workers] == [2, 2]
+        assert sum(worker['completed'] for worker in workers) == len(TEXTS)
+        assert all(worker['in_flight'] == 0 for worker in workers)
+
+    def test_dead_replica_is_restarted(self, replica_pool):
+        """A killed replica is replaced and serving continues."""
+        victim = replica_pool.get_stats()['workers'][0]
+        os.kill(victim['pid'], signal.SIGKILL)
+
+        assert replica_pool.wait_for_restart(0, timeout=120), "replica was not restarted"
+        worker = replica_pool.get_stats()['workers'][0]
+        assert worker['restarts'] == 1 and worker['pid'] != victim['pid']
+
+        assert len(replica_pool.predict_batch(TEXTS)) == len(TEXTS)
+
+    def test_timed_out_request_is_forgotten(self, replica_pool):
+        """A request that times out no longer counts against its replica."""
+        with pytest.raises(ModelError):
+            replica_pool.predict_batch(TEXTS * 200, timeout=1e-6)
+
+        workers = replica_pool.get_stats()['workers']
+        assert sum(worker['in_flight'] for worker in workers) == 0
+        assert sum(worker['failed'] for worker in workers) == 1
+        assert replica_pool._pending == {}
+        assert len(replica_pool.predict_batch(TEXTS)) == len(TEXTS)
@@ -0,0 +1,123 @@
+"""
+Unit tests for the tier-0 hashed n-gram classifier.
+Trained on a small synthetic corpus; the transformer is the tiny local DistilBERT.
+"""
+import pytest
+import sys
+import os
+import random
+import shutil
+import subprocess
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.model import SentimentAnalyzer
+from app.tier0 import Tier0Classifier, Tier0FastPath, coverage_report, featurize
+from config.config import config
+
+POSITIVE = ["amazing", "delicious", "friendly", "wonderful", "excellent", "love"]
+NEGATIVE = ["awful", "rude", "cold", "terrible", "disgusting", "hate"]
+NEUTRAL = ["okay", "average", "fine", "decent", "ordinary", "alright"]
+FILLER = ["the", "food", "service", "place", "staff", "was", "and", "really", "dinner", "table"]
+
+
+def _corpus(size, seed):
+    """Reviews built from a few sentiment words of one class plus filler, labelled with its id."""
+    rng = random.Random(seed)
+    texts, labels = [], []
+    for _ in range(size):
+        label = rng.randrange(3)
+        words = [NEGATIVE, NEUTRAL, POSITIVE][label]
+        tokens = rng.sample(FILLER, 5) + rng.sample(words, 2)
+        rng.shuffle(tokens)
+        texts.append(' '.join(tokens))
+        labels.append(label)
+    return texts, labels
+
+
+@pytest.fixture(scope='module')
+def tier0_classifier():
+    texts, labels = _corpus(600, seed=0)
+    classifier = Tier0Classifier.train(texts, labels, dim=2 ** 12, epochs=8, batch_size=16)
+    classifier.calibrate(*_corpus(200, seed=1))
+    return classifier
+
+
+class TestTier0Classifier:
+    """Test cases for features, training and calibration."""
+
+    def test_features_use_the_training_preprocessing(self):
+        """Case, punctuation, digits and markup do not change the features."""
+        raw = featurize(["<b>GREAT</b> food, 10/10!!"], dim=2 ** 12)
+        clean = featurize(["great food"], dim=2 ** 12)
+
+        for left, right in zip(raw, clean):
+            assert left.tolist() == right.tolist()
+
+    def test_learns_the_corpus(self, tier0_classifier):
+        texts, labels = _corpus(300, seed=2)
+        report = coverage_report(tier0_classifier, texts, labels, thresholds=[0.5, 0.9])
+
+        assert report['tier0_accuracy'] > 0.95
+        assert report['thresholds'][0]['coverage'] >= report['thresholds'][1]['coverage']
+
+    def test_save_and_load_round_trip(self, tier0_classifier, tmp_path):
+        path = str(tmp_path / 'tier0.npz')
+        tier0_classifier.save(path)
+
+        loaded = Tier0Classifier.load(path)
+        texts, _ = _corpus(20, seed=3)
+        assert loaded.temperature == tier0_classifier.temperature
+        assert loaded.predict_proba(texts) == pytest.approx(tier0_classifier.predict_proba(texts), abs=1e-6)
+
+    def test_combined_report_with_transformer_fallback(self, tier0_classifier):
+        """Where tier 0 is not confident, the fallback's labels count."""
+        texts, labels = _corpus(100, seed=4)
+        report = coverage_report(tier0_classifier, texts, labels, thresholds=[1.01], fallback=labels)
+
+        assert report['thresholds'][0]['coverage'] == 0.0
+        assert report['thresholds'][0]['combined_accuracy'] == 1.0
+
+
+def test_serving_code_imports_without_utils(tmp_path):
+    """The Docker image layout (app/ and config/ only) still imports when tier 0 is off."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    shutil.copytree(os.path.join(root, 'app'), tmp_path / 'app', ignore=shutil.ignore_patterns('__pycache__'))
+    shutil.copytree(os.path.join(root, 'config'), tmp_path / 'config', ignore=shutil.ignore_patterns('__pycache__'))
+    env = {key: value for key, value in os.environ.items() if key not in ('PYTHONPATH', 'TIER0_MODEL_PATH')}
+
+    result = subprocess.run([sys.executable, '-c', 'import app.model'], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, timeout=120)
+
+    assert result.returncode == 0, result.stderr
+
+
+class TestTier0FastPath:
+    """Test cases for tier 0 in front of SentimentAnalyzer."""
+
+    @pytest.fixture
+    def analyzer(self, tiny_model_dir, tier0_classifier):
+        with patch.multiple(config, MODEL_NAME=tiny_model_dir, PREDICTION_CACHE_ENABLED=False):
+            analyzer = SentimentAnalyzer()
+        analyzer.store = None
+        analyzer.tier0 = Tier0FastPath(tier0_classifier, threshold=0.9)
+        return analyzer
+
+    def test_confident_texts_skip_the_transformer(self, analyzer):
+        with patch.object(analyzer, '_infer', wraps=analyzer._infer) as infer:
+            sentiment, score = analyzer.predict("the food was amazing and delicious")
+
+        infer.assert_not_called()
+        assert sentiment == 'Positive' and score >= 0.9
+
+    def test_uncertain_texts_fall_through(self, analyzer):
+        texts = ["the staff were rude and the food cold", "we went there on tuesday"]
+        with patch.object(analyzer, '_infer', wraps=analyzer._infer) as infer:
+            results = analyzer.predict_batch(texts)
+
+        infer.assert_called_once_with([texts[1]])
+        assert results[0][0] == 'Negative'
+        stats = analyzer.tier0.get_stats()
+        assert stats['texts'] == 2 and stats['answered'] == 1 and stats['coverage'] == 0.5
@@ -0,0 +1,124 @@
+"""
+Unit tests for memory-mapped safetensors loading and preload-then-fork serving.
+Uses the tiny local DistilBERT classifier, so no weights are downloaded.
+"""
+import gc
+import multiprocessing
+import os
+import sys
+
+import pytest
+import torch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.model import SentimentAnalyzer
+from app.weights import load_mapped_model, map_safetensors
+from config.config import config
+
+TEXTS = ["the food was great", "terrible service", "it was okay"]
+
+
+def _file_mappings(directory):
+    """Address ranges of this process's mappings of safetensors files under directory."""
+    ranges = []
+    with open('/proc/self/maps', 'r') as handle:
+        for line in handle:
+            fields = line.split()
+            if len(fields) >= 6 and fields[5].startswith(directory) and fields[5].endswith('.safetensors'):
+                start, end = (int(value, 16) for value in fields[0].split('-'))
+                ranges.append((start, end))
+    return ranges
+
+
+def _predict_in_child(analyzer, connection):
+    connection.send(analyzer.predict_batch(TEXTS))
+    connection.close()
+
+
+def _serve_in_worker(connection):
+    from app.model import get_model, init_worker_process
+
+    init_worker_process(workers=2)
+    connection.send((torch.get_num_threads(), get_model().predict_batch(TEXTS)))
+    connection.close()
+
+
+class TestMappedWeights:
+    """Test cases for safetensors memory mapping."""
+
+    def test_mapped_model_matches_from_pretrained(self, tiny_model_dir):
+        """Parameters are views of the mapped file and give the same logits."""
+        from transformers import AutoModelForSequenceClassification
+
+        model, tokenizer = load_mapped_model(tiny_model_dir)
+        reference = AutoModelForSequenceClassification.from_pretrained(tiny_model_dir).eval()
+
+        inputs = tokenizer(TEXTS, padding=True, return_tensors='pt')
+        with torch.no_grad():
+            assert torch.allclose(model(**inputs).logits, reference(**inputs).logits)
+
+        mapped = map_safetensors(os.path.join(tiny_model_dir, 'model.safetensors'))
+        name = 'distilbert.embeddings.word_embeddings.weight'
+        assert torch.equal(model.state_dict()[name], mapped[name])
+        if os.path.exists('/proc/self/maps'):
+            address = model.state_dict()[name].data_ptr()
+            assert any(start <= address < end for start, end in _file_mappings(tiny_model_dir))
+
+    def test_missing_safetensors_returns_none(self, tmp_path):
+        """Models without safetensors weights are left to the regular loader."""
+        assert load_mapped_model(str(tmp_path)) is None
+
+    @pytest.mark.skipif(sys.platform == 'win32', reason="fork is POSIX-only")
+    def test_forked_worker_serves_preloaded_model(self, monkeypatch, tiny_model_dir):
+        """A worker forked after loading (and a gc freeze) predicts like the master."""
+        monkeypatch.setattr(config, 'MODEL_NAME', tiny_model_dir)
+        monkeypatch.setattr(config, 'MODEL_QUANTIZATION', None)
+        monkeypatch.setattr(config, 'PREDICTION_CACHE_ENABLED', False)
+        monkeypatch.setattr(config, 'PREDICTION_STORE_PATH', None)
+        monkeypatch.setattr(config, 'MODEL_MMAP_WEIGHTS', True)
+
+        analyzer = SentimentAnalyzer()
+        assert analyzer.backend.get_stats()['mapped_weights']
+        expected = analyzer.predict_batch(TEXTS)
+
+        gc.freeze()
+        try:
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.get_context('fork').Process(target=_predict_in_child,
+                                                                  args=(analyzer, child))
+            process.start()
+            assert parent.recv() == expected
+            process.join(30)
+            assert process.exitcode == 0
+        finally:
+            gc.unfreeze()
+
+    @pytest.mark.skipif(sys.platform == 'win32', reason="fork is POSIX-only")
+    def test_worker_predicts_after_preload(self, monkeypatch, tiny_model_dir, fresh_model_state):
+        """The master preloads (and predicts) single-threaded; a forked worker then serves multi-threaded."""
+        from app.model import preload_model
+
+        monkeypatch.setattr(config, 'MODEL_NAME', tiny_model_dir)
+        monkeypatch.setattr(config, 'MODEL_QUANTIZATION', None)
+        monkeypatch.setattr(config, 'PREDICTION_CACHE_ENABLED', False)
+        monkeypatch.setattr(config, 'PREDICTION_STORE_PATH', None)
+        monkeypatch.setattr(config, 'MODEL_THREAD_BUDGET', 4)
+        threads = torch.get_num_threads()
+        torch.set_num_threads(4)  # As on a multi-core host
+
+        try:
+            expected = preload_model().predict_batch(TEXTS)
+            assert torch.get_num_threads() == 1
+
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.get_context('fork').Process(target=_serve_in_worker, args=(child,))
+            process.start()
+            assert parent.poll(60), "forked worker hung on its first prediction"
+            assert parent.recv() == (2, expected)
+            process.join(30)
+            assert process.exitcode == 0
+        finally:
+            gc.unfreeze()
+            torch.set_num_threads(threads)
@@ -0,0 +1,29 @@
+## --- Text Preprocessing ---
+# Dependency-free text cleaning shared by the training notebooks (utils/utility.py)
+# and the serving-time tier-0 classifier (app/tier0.py)
+import re
+
+
+def advanced_text_preprocessing(text):
+    """
+    Advanced text preprocessing with comprehensive cleaning.
+
+    Args:
+        text (str): Input text to preprocess.
+
+    Returns:
+        str: Cleaned and preprocessed text.
+    """
+    # Remove HTML tags
+    text = re.sub(r'<.*?>', '', text)
+
+    # Remove special characters and digits
+    text = re.sub(r'[^a-zA-Z\s]', '', text)
+
+    # Convert to lowercase
+    text = text.lower()
+
+    # Remove extra whitespaces
+    text = ' '.join(text.split())
+
+    return text
@@ -37,6 +37,10 @@ import seaborn as sns
 import nltk # Import the nltk library
 from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
+try:
+    from .text_preprocessing import advanced_text_preprocessing  # Shared with the serving code (app/tier0.py)
+except ImportError:  # utils/ itself is on sys.path (e.g. the Colab notebooks)
+    from text_preprocessing import advanced_text_preprocessing
 
 # Download required NLTK resources
 nltk.download('stopwords')
@@ -130,32 +134,6 @@ def preprocess_yelp_reviews(review_df):
     return review_df
 
 
-# Text Preprocessing
-def advanced_text_preprocessing(text):
-    """
-    Advanced text preprocessing with comprehensive cleaning.
-
-    Args:
-        text (str): Input text to preprocess.
-
-    Returns:
-        str: Cleaned and preprocessed text.
-    """
-    # Remove HTML tags
-    text = re.sub(r'<.*?>', '', text)
-
-    # Remove special characters and digits
-    text = re.sub(r'[^a-zA-Z\s]', '', text)
-
-    # Convert to lowercase
-    text = text.lower()
-
-    # Remove extra whitespaces
-    text = ' '.join(text.split())
-
-    return text
-
-
 # Dataset Preparation
 def prepare_datasets(review_df, model_name="distilbert-base-uncased", test_size=0.3):
     """